@@ -8,6 +8,7 @@ pipeline for the overall flow.
 
 from google.adk.agents import ParallelAgent, SequentialAgent
 
+from .sampler import metrics_sampler
 from .subagents.cpu_info_agent import cpu_info_agent
 from .subagents.disk_info_agent import disk_info_agent
 from .subagents.memory_info_agent import memory_info_agent
@@ -24,3 +25,7 @@ root_agent = SequentialAgent(
     name="system_monitor_agent",
     sub_agents=[system_info_gatherer, system_report_synthesizer],
 )
+
+# Start sampling as soon as the agent is loaded, so the metrics window is
+# already filling by the time the first report is requested
+metrics_sampler.start()
@@ -0,0 +1,128 @@
+"""
+System Metrics Sampler
+
+This module keeps a rolling window of CPU, memory and disk samples, taken
+on a background thread, so the info tools can answer instantly instead of
+blocking inside the ParallelAgent while psutil measures.
+
+The rate and window size come from the environment:
+    SYSTEM_MONITOR_INTERVAL   seconds between samples (default 1.0)
+    SYSTEM_MONITOR_WINDOW     samples kept in the ring buffer (default 60)
+"""
+
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List
+
+import psutil
+
+SAMPLE_INTERVAL = float(os.getenv("SYSTEM_MONITOR_INTERVAL", "1.0"))
+WINDOW_SIZE = int(os.getenv("SYSTEM_MONITOR_WINDOW", "60"))
+
+# Mounted partitions rarely change, so they are only re-listed this often
+PARTITION_REFRESH_SECONDS = 60
+
+
+class MetricsSampler:
+    """Samples system metrics at a fixed rate into a ring buffer."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL, window: int = WINDOW_SIZE):
+        self.interval = interval
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._partitions = []
+        self._partitions_listed = 0.0
+
+    def start(self) -> "MetricsSampler":
+        """Start the sampling thread (no-op if it is already running)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="system-metrics-sampler", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def samples(self, timeout: float = None) -> List[Dict[str, Any]]:
+        """
+        Return the samples currently in the window, oldest first.
+
+        Starts the sampler if needed and waits for the first sample.
+        """
+        self.start()
+        if not self._ready.wait(self.interval * 2 + 1 if timeout is None else timeout):
+            raise RuntimeError("No system metrics have been sampled yet")
+        with self._lock:
+            return list(self._samples)
+
+    def window_info(self, samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Describe the sampling window the statistics were computed over."""
+        return {
+            "samples": len(samples),
+            "window_seconds": round(samples[-1]["timestamp"] - samples[0]["timestamp"], 1),
+            "sample_interval_seconds": self.interval,
+        }
+
+    def _run(self) -> None:
+        # The first cpu_percent call only sets the baseline and always reads 0
+        psutil.cpu_percent(percpu=True)
+        while not self._stop.wait(self.interval):
+            try:
+                sample = self._take_sample()
+            except Exception:
+                # Skip this tick; a transient psutil failure shouldn't kill the thread
+                continue
+            with self._lock:
+                self._samples.append(sample)
+            self._ready.set()
+
+    def _take_sample(self) -> Dict[str, Any]:
+        # Per-core usage since the previous tick; the aggregate is derived from
+        # the same reading so the two always describe the same window
+        per_core = psutil.cpu_percent(percpu=True)
+
+        disks = []
+        for partition in self._current_partitions():
+            try:
+                disks.append((partition, psutil.disk_usage(partition.mountpoint)))
+            except (PermissionError, FileNotFoundError):
+                # Some partitions may not be accessible
+                pass
+
+        return {
+            "timestamp": time.time(),
+            "cpu_per_core": per_core,
+            "cpu_percent": sum(per_core) / len(per_core),
+            "memory": psutil.virtual_memory(),
+            "swap": psutil.swap_memory(),
+            "disks": disks,
+        }
+
+    def _current_partitions(self):
+        now = time.monotonic()
+        if not self._partitions_listed or now - self._partitions_listed > PARTITION_REFRESH_SECONDS:
+            self._partitions = psutil.disk_partitions()
+            self._partitions_listed = now
+        return self._partitions
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Min/avg/max of a metric over the window, rounded for the report."""
+    return {
+        "min": round(min(values), 1),
+        "avg": round(statistics.fmean(values), 1),
+        "max": round(max(values), 1),
+    }
+
+
+# Shared by the CPU, memory and disk tools
+metrics_sampler = MetricsSampler()
@@ -4,36 +4,45 @@ CPU Information Tool
 This module provides a tool for gathering CPU information.
 """
 
-import time
 from typing import Any, Dict
 
 import psutil
 
+from ...sampler import metrics_sampler, summarize
+
 
 def get_cpu_info() -> Dict[str, Any]:
     """
     Gather CPU information including core count and usage.
 
+    Usage comes from the background sampler, so the tool answers instantly:
+    per-core and average figures are from the latest sample, and min/avg/max
+    cover the whole sampling window.
+
     Returns:
         Dict[str, Any]: Dictionary with CPU information structured for ADK
     """
     try:
+        samples = metrics_sampler.samples()
+        latest = samples[-1]
+        usage_window = summarize([sample["cpu_percent"] for sample in samples])
+
         # Get CPU information
         cpu_info = {
             "physical_cores": psutil.cpu_count(logical=False),
             "logical_cores": psutil.cpu_count(logical=True),
             "cpu_usage_per_core": [
                 f"Core {i}: {percentage:.1f}%"
-                for i, percentage in enumerate(
-                    psutil.cpu_percent(interval=1, percpu=True)
-                )
+                for i, percentage in enumerate(latest["cpu_per_core"])
             ],
-            "avg_cpu_usage": f"{psutil.cpu_percent(interval=1):.1f}%",
+            "avg_cpu_usage": f"{latest['cpu_percent']:.1f}%",
+            "usage_over_window": {
+                name: f"{value:.1f}%" for name, value in usage_window.items()
+            },
         }
 
-        # Calculate some stats for the result summary
-        avg_usage = float(cpu_info["avg_cpu_usage"].strip("%"))
-        high_usage = avg_usage > 80
+        # Sustained load matters more than one spike, so alert on the window average
+        high_usage = usage_window["avg"] > 80
 
         # Format for ADK tool return structure
         return {
@@ -41,12 +50,14 @@ def get_cpu_info() -> Dict[str, Any]:
             "stats": {
                 "physical_cores": cpu_info["physical_cores"],
                 "logical_cores": cpu_info["logical_cores"],
-                "avg_usage_percentage": avg_usage,
+                "avg_usage_percentage": round(latest["cpu_percent"], 1),
+                "window_usage_percentage": usage_window,
                 "high_usage_alert": high_usage,
             },
             "additional_info": {
                 "data_format": "dictionary",
-                "collection_timestamp": time.time(),
+                "collection_timestamp": latest["timestamp"],
+                "sampling_window": metrics_sampler.window_info(samples),
                 "performance_concern": (
                     "High CPU usage detected" if high_usage else None
                 ),
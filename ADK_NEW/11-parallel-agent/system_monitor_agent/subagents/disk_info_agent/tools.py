@@ -4,59 +4,66 @@ Disk Information Tool
 This module provides a tool for gathering disk information.
 """
 
-import time
 from typing import Any, Dict
 
-import psutil
+from ...sampler import metrics_sampler, summarize
+
+
+def _overall_disk_usage(sample: Dict[str, Any]) -> float:
+    """Used space across all partitions in a sample, as a percentage."""
+    total = sum(usage.total for _, usage in sample["disks"])
+    used = sum(usage.used for _, usage in sample["disks"])
+    return used / total * 100 if total > 0 else 0
 
 
 def get_disk_info() -> Dict[str, Any]:
     """
     Gather disk information including partitions and usage.
 
+    Reads from the background sampler: partitions are from the latest sample
+    and min/avg/max overall usage covers the whole sampling window.
+
     Returns:
         Dict[str, Any]: Dictionary with disk information structured for ADK
     """
     try:
+        samples = metrics_sampler.samples()
+        latest = samples[-1]
+
         # Get disk information
         disk_info = {"partitions": []}
         partitions_over_threshold = []
         total_space = 0
         used_space = 0
 
-        for partition in psutil.disk_partitions():
-            try:
-                partition_usage = psutil.disk_usage(partition.mountpoint)
-
-                # Track high usage partitions
-                if partition_usage.percent > 85:
-                    partitions_over_threshold.append(
-                        f"{partition.mountpoint} ({partition_usage.percent:.1f}%)"
-                    )
+        for partition, partition_usage in latest["disks"]:
+            # Track high usage partitions
+            if partition_usage.percent > 85:
+                partitions_over_threshold.append(
+                    f"{partition.mountpoint} ({partition_usage.percent:.1f}%)"
+                )
 
-                # Add to totals
-                total_space += partition_usage.total
-                used_space += partition_usage.used
+            # Add to totals
+            total_space += partition_usage.total
+            used_space += partition_usage.used
 
-                disk_info["partitions"].append(
-                    {
-                        "device": partition.device,
-                        "mountpoint": partition.mountpoint,
-                        "filesystem_type": partition.fstype,
-                        "total_size": f"{partition_usage.total / (1024 ** 3):.2f} GB",
-                        "used": f"{partition_usage.used / (1024 ** 3):.2f} GB",
-                        "free": f"{partition_usage.free / (1024 ** 3):.2f} GB",
-                        "percentage": f"{partition_usage.percent:.1f}%",
-                    }
-                )
-            except (PermissionError, FileNotFoundError):
-                # Some partitions may not be accessible
-                pass
+            disk_info["partitions"].append(
+                {
+                    "device": partition.device,
+                    "mountpoint": partition.mountpoint,
+                    "filesystem_type": partition.fstype,
+                    "total_size": f"{partition_usage.total / (1024 ** 3):.2f} GB",
+                    "used": f"{partition_usage.used / (1024 ** 3):.2f} GB",
+                    "free": f"{partition_usage.free / (1024 ** 3):.2f} GB",
+                    "percentage": f"{partition_usage.percent:.1f}%",
+                }
+            )
 
         # Calculate overall disk stats
         overall_usage_percent = (
             (used_space / total_space * 100) if total_space > 0 else 0
         )
+        usage_window = summarize([_overall_disk_usage(sample) for sample in samples])
 
         # Format for ADK tool return structure
         return {
@@ -67,10 +74,12 @@ def get_disk_info() -> Dict[str, Any]:
                 "used_space_gb": used_space / (1024**3),
                 "overall_usage_percent": overall_usage_percent,
                 "partitions_with_high_usage": len(partitions_over_threshold),
+                "window_usage_percent": usage_window,
             },
             "additional_info": {
                 "data_format": "dictionary",
-                "collection_timestamp": time.time(),
+                "collection_timestamp": latest["timestamp"],
+                "sampling_window": metrics_sampler.window_info(samples),
                 "high_usage_partitions": (
                     partitions_over_threshold if partitions_over_threshold else None
                 ),
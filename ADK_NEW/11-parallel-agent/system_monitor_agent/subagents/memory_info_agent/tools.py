@@ -4,24 +4,30 @@ Memory Information Tool
 This module provides a tool for gathering memory information.
 """
 
-import time
 from typing import Any, Dict
 
-import psutil
+from ...sampler import metrics_sampler, summarize
 
 
 def get_memory_info() -> Dict[str, Any]:
     """
     Gather memory information including RAM and swap usage.
 
+    Reads from the background sampler: sizes are from the latest sample and
+    min/avg/max percentages cover the whole sampling window.
+
     Returns:
         Dict[str, Any]: Dictionary with memory information structured for ADK
     """
     try:
-        # Get memory information
-        memory = psutil.virtual_memory()
-        swap = psutil.swap_memory()
+        samples = metrics_sampler.samples()
+        latest = samples[-1]
+        memory = latest["memory"]
+        swap = latest["swap"]
+        memory_window = summarize([sample["memory"].percent for sample in samples])
+        swap_window = summarize([sample["swap"].percent for sample in samples])
 
+        # Get memory information
         memory_info = {
             "total_memory": f"{memory.total / (1024 ** 3):.2f} GB",
             "available_memory": f"{memory.available / (1024 ** 3):.2f} GB",
@@ -30,6 +36,9 @@ def get_memory_info() -> Dict[str, Any]:
             "swap_total": f"{swap.total / (1024 ** 3):.2f} GB",
             "swap_used": f"{swap.used / (1024 ** 3):.2f} GB",
             "swap_percentage": f"{swap.percent:.1f}%",
+            "memory_percentage_over_window": {
+                name: f"{value:.1f}%" for name, value in memory_window.items()
+            },
         }
 
         # Calculate stats
@@ -44,12 +53,15 @@ def get_memory_info() -> Dict[str, Any]:
             "stats": {
                 "memory_usage_percentage": memory_usage,
                 "swap_usage_percentage": swap_usage,
+                "window_memory_usage_percentage": memory_window,
+                "window_swap_usage_percentage": swap_window,
                 "total_memory_gb": memory.total / (1024**3),
                 "available_memory_gb": memory.available / (1024**3),
             },
             "additional_info": {
                 "data_format": "dictionary",
-                "collection_timestamp": time.time(),
+                "collection_timestamp": latest["timestamp"],
+                "sampling_window": metrics_sampler.window_info(samples),
                 "performance_concern": (
                     "High memory usage detected" if high_memory_usage else None
                 ),
@@ -2,16 +2,15 @@ import asyncio
 
 from dotenv import load_dotenv
 from google.adk.runners import Runner
-from google.adk.sessions import DatabaseSessionService
 from memory_agent.agent import memory_agent
+from session_backend import SESSION_DB_URL, create_session_service, start_compaction
 from utils import call_agent_async
 
 load_dotenv()
 
 # ===== PART 1: Initialize Persistent Session Service =====
-# Using SQLite database for persistent storage
-db_url = "sqlite:///./my_agent_data.db"
-session_service = DatabaseSessionService(db_url=db_url)
+# SQLite in WAL mode behind a connection pool (see session_backend.py)
+session_service = create_session_service(db_url=SESSION_DB_URL)
 
 
 # ===== PART 2: Define Initial State =====
@@ -27,6 +26,9 @@ async def main_async():
     APP_NAME = "Memory Agent"
     USER_ID = "aiwithbrandon"
 
+    # Trim old events before loading the session, then keep trimming hourly
+    start_compaction(session_service)
+
     # ===== PART 3: Session Management - Find or Create =====
     # Check for existing sessions for this user
     existing_sessions = session_service.list_sessions(
@@ -75,10 +75,11 @@ def update_reminder(index: int, updated_text: str, tool_context: ToolContext) ->
 
     # Update the reminder (adjusting for 0-based indices)
     old_reminder = reminders[index - 1]
-    reminders[index - 1] = updated_text
 
-    # Update state with the modified list
-    tool_context.state["reminders"] = reminders
+    # Only write state when the text changes; every write stores the whole list
+    if updated_text != old_reminder:
+        reminders[index - 1] = updated_text
+        tool_context.state["reminders"] = reminders
 
     return {
         "action": "update_reminder",
@@ -0,0 +1,175 @@
+"""Tuned DatabaseSessionService setup and event compaction.
+
+``DatabaseSessionService(db_url)`` builds a plain SQLAlchemy engine. This
+module swaps in a pooled engine and, for SQLite, turns on WAL mode and a
+larger statement cache. It also trims old events so that ``get_session``
+(called by the Runner on every turn) does not reload months of history.
+
+Settings come from the environment:
+
+    SESSION_DB_URL             database URL (default sqlite:///./my_agent_data.db)
+    SESSION_DB_POOL_SIZE       pooled connections kept open (default 5)
+    SESSION_KEEP_INVOCATIONS   most recent turns kept per session (default 50)
+    SESSION_COMPACT_INTERVAL   seconds between compactions, 0 disables (default 3600)
+"""
+
+import os
+import threading
+import time
+
+from google.adk.sessions import DatabaseSessionService
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+SESSION_DB_URL = os.getenv("SESSION_DB_URL", "sqlite:///./my_agent_data.db")
+POOL_SIZE = int(os.getenv("SESSION_DB_POOL_SIZE", "5"))
+KEEP_INVOCATIONS = int(os.getenv("SESSION_KEEP_INVOCATIONS", "50"))
+COMPACT_INTERVAL = float(os.getenv("SESSION_COMPACT_INTERVAL", "3600"))
+
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",  # readers never block the writer
+    "PRAGMA synchronous=NORMAL",  # safe with WAL, one fsync per checkpoint
+    "PRAGMA foreign_keys=ON",  # lets delete_session cascade to events
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-16000",  # 16 MB page cache per connection
+    "PRAGMA temp_store=MEMORY",
+)
+
+# get_session filters events by session_id alone and sorts by timestamp;
+# the primary key starts with the event id, so without this it scans the
+# whole table on every turn.
+EVENT_INDEX = "CREATE INDEX IF NOT EXISTS ix_events_session_timestamp ON events (session_id, timestamp)"
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def create_session_engine(db_url=SESSION_DB_URL, pool_size=POOL_SIZE):
+    """Create a pooled engine; SQLite connections get WAL and the pragmas above."""
+    is_sqlite = db_url.startswith("sqlite")
+    engine = create_engine(
+        db_url,
+        pool_size=pool_size,
+        max_overflow=pool_size * 2,
+        pool_pre_ping=not is_sqlite,
+        pool_recycle=-1 if is_sqlite else 1800,
+        # Compiled SQL cache: ADK issues the same handful of statements each turn.
+        query_cache_size=1200,
+        # sqlite3 keeps this many prepared statements per connection.
+        connect_args={"check_same_thread": False, "cached_statements": 256} if is_sqlite else {},
+    )
+    if is_sqlite:
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+
+def create_session_service(db_url=SESSION_DB_URL, pool_size=POOL_SIZE):
+    """Build a DatabaseSessionService that runs on the tuned engine.
+
+    The service creates the tables with its own default engine, which is
+    then disposed of and replaced, so the ADK schema stays authoritative.
+    """
+    service = DatabaseSessionService(db_url=db_url)
+    service.db_engine.dispose()
+
+    engine = create_session_engine(db_url, pool_size)
+    service.db_engine = engine
+    service.inspector = inspect(engine)
+    service.DatabaseSessionFactory = sessionmaker(bind=engine)
+
+    with engine.begin() as connection:
+        connection.execute(text(EVENT_INDEX))
+    return service
+
+
+def compact_sessions(service, keep_invocations=KEEP_INVOCATIONS):
+    """Drop all but the newest ``keep_invocations`` turns of every session.
+
+    ADK applies each event's state_delta to the ``sessions.state`` row when
+    the event is appended, so that row already is the folded snapshot and
+    old events only carry conversation history. Whole invocations are
+    removed so a tool call is never separated from its response. The
+    sessions row itself is left untouched: changing its update_time would
+    make a running Runner's next append_event fail as stale.
+
+    Returns the number of events deleted.
+    """
+    engine = service.db_engine
+    deleted = 0
+    with engine.begin() as connection:
+        sessions = connection.execute(
+            text(
+                "SELECT app_name, user_id, session_id FROM events "
+                "GROUP BY app_name, user_id, session_id "
+                "HAVING COUNT(DISTINCT invocation_id) > :keep"
+            ),
+            {"keep": keep_invocations},
+        ).all()
+
+        for app_name, user_id, session_id in sessions:
+            key = {"app_name": app_name, "user_id": user_id, "session_id": session_id}
+            # Start time of the oldest invocation we keep.
+            cutoff = connection.execute(
+                text(
+                    "SELECT MIN(started) FROM ("
+                    " SELECT MIN(timestamp) AS started FROM events"
+                    " WHERE app_name = :app_name AND user_id = :user_id AND session_id = :session_id"
+                    " GROUP BY invocation_id ORDER BY started DESC LIMIT :keep"
+                    ") AS recent"
+                ),
+                {**key, "keep": keep_invocations},
+            ).scalar()
+            result = connection.execute(
+                text(
+                    "DELETE FROM events"
+                    " WHERE app_name = :app_name AND user_id = :user_id AND session_id = :session_id"
+                    " AND invocation_id IN ("
+                    "  SELECT invocation_id FROM events"
+                    "  WHERE app_name = :app_name AND user_id = :user_id AND session_id = :session_id"
+                    "  GROUP BY invocation_id HAVING MAX(timestamp) < :cutoff"
+                    " )"
+                ),
+                {**key, "cutoff": cutoff},
+            )
+            deleted += result.rowcount
+
+    if deleted and engine.dialect.name == "sqlite":
+        with engine.connect() as connection:
+            # Fold the WAL back into the main file and refresh planner stats.
+            # Freed pages are reused by later inserts, so no VACUUM is needed.
+            connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+            connection.exec_driver_sql("PRAGMA optimize")
+    return deleted
+
+
+def _compact_and_report(service, keep_invocations):
+    started = time.perf_counter()
+    try:
+        deleted = compact_sessions(service, keep_invocations)
+    except Exception as e:
+        print(f"Session compaction failed: {e}")
+        return
+    if deleted:
+        print(f"Compacted {deleted} old events in {time.perf_counter() - started:.2f}s")
+
+
+def start_compaction(service, interval=COMPACT_INTERVAL, keep_invocations=KEEP_INVOCATIONS):
+    """Compact now, then every ``interval`` seconds on a daemon thread.
+
+    Returns a ``threading.Event``; set it to stop the job. With interval 0
+    only the initial compaction runs.
+    """
+    _compact_and_report(service, keep_invocations)
+    stop = threading.Event()
+    if interval > 0:
+
+        def run():
+            while not stop.wait(interval):
+                _compact_and_report(service, keep_invocations)
+
+        threading.Thread(target=run, name="session-compaction", daemon=True).start()
+    return stop
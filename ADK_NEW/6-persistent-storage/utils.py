@@ -1,3 +1,6 @@
+import copy
+import os
+
 from google.genai import types
 
 
@@ -58,6 +61,115 @@ def display_state(
         print(f"Error displaying state: {e}")
 
 
+# Set STATE_OBSERVER=off to skip state snapshots entirely: no session reads
+# and no output, just a None check per turn
+STATE_OBSERVER_ENABLED = os.getenv("STATE_OBSERVER", "on").lower() not in ("0", "off", "false", "no")
+
+
+def _list_overlap(old, new):
+    """How many leading items of ``new`` are the trailing items of ``old``.
+
+    Covers plain appends and sliding windows (items dropped from the front as
+    new ones arrive). Returns None unless ``new`` is such a continuation of
+    ``old`` with at least one item added, so that anything else (front
+    removals, reorders, edits) is reported as a whole-value change.
+    """
+    if len(new) > len(old) and new[: len(old)] == old:
+        return len(old)
+    # Longest suffix of old that new starts with, still leaving a new item
+    for size in range(min(len(old), len(new)) - 1, 0, -1):
+        if new[:size] == old[-size:]:
+            return size
+    return None
+
+
+def diff_state(old, new, path=""):
+    """Structural diff of two state values as a list of (op, path, old, new).
+
+    ``op`` is "+" (added), "-" (removed) or "~" (changed). Dicts are compared
+    key by key; for lists that only gained items at the end, just the new
+    items are reported.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in new:
+            key_path = f"{path}.{key}" if path else str(key)
+            if key not in old:
+                changes.append(("+", key_path, None, new[key]))
+            else:
+                changes.extend(diff_state(old[key], new[key], key_path))
+        for key in old:
+            if key not in new:
+                changes.append(("-", f"{path}.{key}" if path else str(key), old[key], None))
+        return changes
+
+    if isinstance(old, list) and isinstance(new, list) and old != new:
+        overlap = _list_overlap(old, new)
+        if overlap is not None:
+            return [("+", f"{path}[{i}]", None, item) for i, item in enumerate(new[overlap:], overlap)]
+
+    if old != new:
+        return [("~", path, old, new)]
+    return []
+
+
+def _short(value, limit=100):
+    text = repr(value)
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+class StateObserver:
+    """Prints only what changed in session state after each turn.
+
+    The last snapshot of each session is kept, so a turn costs a single
+    get_session (plus one extra read the first time a session is seen).
+    """
+
+    def __init__(self):
+        self._snapshots = {}
+
+    def has_snapshot(self, app_name, user_id, session_id):
+        return (app_name, user_id, session_id) in self._snapshots
+
+    def observe(self, session_service, app_name, user_id, session_id, label="State changes"):
+        try:
+            session = session_service.get_session(
+                app_name=app_name, user_id=user_id, session_id=session_id
+            )
+        except Exception as e:
+            print(f"Error reading state: {e}")
+            return
+
+        key = (app_name, user_id, session_id)
+        # Copy: some session services hand back their live state dict
+        state = copy.deepcopy(dict(session.state))
+        previous = self._snapshots.get(key)
+        self._snapshots[key] = state
+
+        if previous is None:
+            print(f"\n{'-' * 10} Current State {'-' * 10}")
+            for name, value in state.items():
+                print(f"  {name}: {_short(value)}")
+            print("-" * 35)
+            return
+
+        changes = diff_state(previous, state)
+        print(f"\n{'-' * 10} {label} {'-' * 10}")
+        if not changes:
+            print("  (no changes)")
+        for op, path, old, new in changes:
+            if op == "+":
+                print(f"{Colors.GREEN}  + {path}: {_short(new)}{Colors.RESET}")
+            elif op == "-":
+                print(f"{Colors.RED}  - {path}: {_short(old)}{Colors.RESET}")
+            else:
+                print(f"{Colors.YELLOW}  ~ {path}: {_short(old)} → {_short(new)}{Colors.RESET}")
+        print("-" * (22 + len(label)))
+
+
+state_observer = StateObserver() if STATE_OBSERVER_ENABLED else None
+
+
 async def process_agent_response(event):
     """Process and display agent response events."""
     # Log basic event info
@@ -113,22 +225,21 @@ async def process_agent_response(event):
     return final_response
 
 
-async def call_agent_async(runner, user_id, session_id, query):
-    """Call the agent asynchronously with the user's query."""
+async def call_agent_async(runner, user_id, session_id, query, observer=state_observer):
+    """Call the agent asynchronously with the user's query.
+
+    ``observer`` prints the state changes made by the turn; pass None (or set
+    STATE_OBSERVER=off) to skip reading state altogether.
+    """
     content = types.Content(role="user", parts=[types.Part(text=query)])
     print(
         f"\n{Colors.BG_GREEN}{Colors.BLACK}{Colors.BOLD}--- Running Query: {query} ---{Colors.RESET}"
     )
     final_response_text = None
 
-    # Display state before processing
-    display_state(
-        runner.session_service,
-        runner.app_name,
-        user_id,
-        session_id,
-        "State BEFORE processing",
-    )
+    # Take a baseline the first time this session is seen
+    if observer and not observer.has_snapshot(runner.app_name, user_id, session_id):
+        observer.observe(runner.session_service, runner.app_name, user_id, session_id)
 
     try:
         async for event in runner.run_async(
@@ -141,13 +252,8 @@ async def call_agent_async(runner, user_id, session_id, query):
     except Exception as e:
         print(f"Error during agent call: {e}")
 
-    # Display state after processing the message
-    display_state(
-        runner.session_service,
-        runner.app_name,
-        user_id,
-        session_id,
-        "State AFTER processing",
-    )
+    # Show only what this turn changed
+    if observer:
+        observer.observe(runner.session_service, runner.app_name, user_id, session_id)
 
     return final_response_text
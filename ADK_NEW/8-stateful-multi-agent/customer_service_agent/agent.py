@@ -1,5 +1,6 @@
 from google.adk.agents import Agent
 
+from .history import with_interaction_history
 from .sub_agents.course_support_agent.agent import course_support_agent
 from .sub_agents.order_agent.agent import order_agent
 from .sub_agents.policy_agent.agent import policy_agent
@@ -10,7 +11,7 @@ customer_service_agent = Agent(
     name="customer_service",
     model="gemini-2.0-flash",
     description="Customer service agent for AI Developer Accelerator community",
-    instruction="""
+    instruction=with_interaction_history("""
     You are the primary customer service agent for the AI Developer Accelerator community.
     Your role is to help users with their questions and direct them to the appropriate specialized agent.
 
@@ -74,7 +75,7 @@ customer_service_agent = Agent(
 
     Always maintain a helpful and professional tone. If you're unsure which agent to delegate to,
     ask clarifying questions to better understand the user's needs.
-    """,
+    """),
     sub_agents=[policy_agent, sales_agent, course_support_agent, order_agent],
     tools=[],
 )
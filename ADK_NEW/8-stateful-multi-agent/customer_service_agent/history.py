@@ -0,0 +1,64 @@
+"""Recent interaction history, kept in session state one entry per key.
+
+ADK replaces a state key wholesale on every write, so keeping the history
+as one list would mean re-sending the whole list with each new entry.
+Instead, entry ``seq`` lives under ``interaction_history_<seq % HISTORY_WINDOW>``
+and ``interaction_count`` holds the number of entries recorded so far:
+recording an entry writes just that entry and the counter, and the slots
+form a ring holding the last HISTORY_WINDOW entries.
+
+Agents see the window through ``with_interaction_history``, which fills the
+``{interaction_history}`` placeholder in their instruction.
+"""
+
+# How many of the most recent interactions the agents' prompts see
+HISTORY_WINDOW = 20
+
+COUNT_KEY = "interaction_count"
+SLOT_PREFIX = "interaction_history_"
+
+_NO_BRACES = str.maketrans("{}", "()")
+
+
+def slot_key(seq):
+    return f"{SLOT_PREFIX}{seq % HISTORY_WINDOW}"
+
+
+def is_history_key(key):
+    return key == COUNT_KEY or key.startswith(SLOT_PREFIX)
+
+
+def record_interaction(state, entry):
+    """Store ``entry`` as the next interaction in ``state`` and return it, numbered.
+
+    ``state`` is anything dict-like: a tool's ``tool_context.state``, or a
+    ``ChainMap(delta, session.state)`` collecting a state delta.
+    """
+    seq = state.get(COUNT_KEY, 0)
+    entry = dict(entry, seq=seq)
+    state[slot_key(seq)] = entry
+    state[COUNT_KEY] = seq + 1
+    return entry
+
+
+def recent_interactions(state, start=0):
+    """The entries still in the window with ``seq >= start``, oldest first."""
+    count = state.get(COUNT_KEY, 0)
+    entries = []
+    for seq in range(max(start, count - HISTORY_WINDOW), count):
+        entry = state.get(slot_key(seq))
+        if entry is not None and entry.get("seq") == seq:
+            entries.append(entry)
+    return entries
+
+
+def with_interaction_history(instruction):
+    """An instruction provider that fills ``{interaction_history}`` from the slots."""
+
+    def provide(context):
+        # ADK then resolves every {name} in the result against state, which
+        # would also catch the dict braces and anything a user typed in braces
+        history = str(recent_interactions(context.state)).translate(_NO_BRACES)
+        return instruction.replace("{interaction_history}", history)
+
+    return provide
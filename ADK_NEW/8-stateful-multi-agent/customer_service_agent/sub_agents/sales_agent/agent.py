@@ -3,6 +3,8 @@ from datetime import datetime
 from google.adk.agents import Agent
 from google.adk.tools.tool_context import ToolContext
 
+from ...history import record_interaction, with_interaction_history
+
 
 def purchase_course(tool_context: ToolContext) -> dict:
     """
@@ -35,18 +37,12 @@ def purchase_course(tool_context: ToolContext) -> dict:
     # Update purchased courses in state via assignment
     tool_context.state["purchased_courses"] = new_purchased_courses
 
-    # Get current interaction history
-    current_interaction_history = tool_context.state.get("interaction_history", [])
-
-    # Create new interaction history with purchase added
-    new_interaction_history = current_interaction_history.copy()
-    new_interaction_history.append(
-        {"action": "purchase_course", "course_id": course_id, "timestamp": current_time}
+    # Record the purchase in the interaction history
+    record_interaction(
+        tool_context.state,
+        {"action": "purchase_course", "course_id": course_id, "timestamp": current_time},
     )
 
-    # Update interaction history in state via assignment
-    tool_context.state["interaction_history"] = new_interaction_history
-
     return {
         "status": "success",
         "message": "Successfully purchased the AI Marketing Platform course!",
@@ -60,7 +56,7 @@ sales_agent = Agent(
     name="sales_agent",
     model="gemini-2.0-flash",
     description="Sales agent for the AI Marketing Platform course",
-    instruction="""
+    instruction=with_interaction_history("""
     You are a sales agent for the AI Developer Accelerator community, specifically handling sales
     for the Fullstack AI Marketing Platform course.
 
@@ -107,6 +103,6 @@ sales_agent = Agent(
     - Be helpful but not pushy
     - Focus on the value and practical skills they'll gain
     - Emphasize the hands-on nature of building a real AI application
-    """,
+    """),
     tools=[purchase_course],
 )
@@ -19,7 +19,7 @@ session_service = InMemorySessionService()
 initial_state = {
     "user_name": "Brandon Hancock",
     "purchased_courses": [],
-    "interaction_history": [],
+    "interaction_count": 0,
 }
 
 
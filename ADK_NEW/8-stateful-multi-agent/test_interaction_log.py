@@ -0,0 +1,74 @@
+"""Tests for the interaction history in utils.py.
+
+Run from ``8-stateful-multi-agent``:
+
+    python -m pytest test_interaction_log.py
+"""
+
+import json
+
+import pytest
+from customer_service_agent.history import COUNT_KEY, HISTORY_WINDOW
+from google.adk.sessions import DatabaseSessionService
+
+import utils
+
+APP_NAME = "Customer Support"
+USER_ID = "test_user"
+
+
+@pytest.fixture(autouse=True)
+def fresh_logs(monkeypatch):
+    # Each test starts like a new process: no InteractionLogs in memory
+    monkeypatch.setattr(utils, "_interaction_logs", {})
+
+
+def restart():
+    utils._interaction_logs.clear()
+
+
+def add_queries(service, session_id, n):
+    for i in range(n):
+        utils.add_user_query_to_history(service, APP_NAME, USER_ID, session_id, f"question {i}")
+
+
+def interaction_count(service, session_id):
+    session = service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+    return session.state[COUNT_KEY]
+
+
+def test_resumed_session_keeps_seqs_in_line_with_interaction_count(tmp_path):
+    db_url = f"sqlite:///{tmp_path / 'sessions.db'}"
+    service = DatabaseSessionService(db_url=db_url)
+    session = service.create_session(app_name=APP_NAME, user_id=USER_ID, state={COUNT_KEY: 0})
+    add_queries(service, session.id, 101)
+
+    # A new process resumes the same session from the database
+    restart()
+    service = DatabaseSessionService(db_url=db_url)
+    for expected_count in (102, 103, 104):
+        add_queries(service, session.id, 1)
+        log = utils.get_interaction_log(APP_NAME, USER_ID, session.id)
+        count = interaction_count(service, session.id)
+        assert count == expected_count
+        assert len(log) == count
+        # The state window is adopted once, with its own seqs, then one entry per call
+        assert [entry["seq"] for entry in log.read()] == list(range(101 - HISTORY_WINDOW, count))
+
+
+def test_cold_file_continues_after_restart(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "INTERACTION_LOG_DIR", str(tmp_path / "logs"))
+    monkeypatch.setattr(utils, "HOT_HISTORY_SIZE", 5)
+    db_url = f"sqlite:///{tmp_path / 'sessions.db'}"
+    service = DatabaseSessionService(db_url=db_url)
+    session = service.create_session(app_name=APP_NAME, user_id=USER_ID, state={COUNT_KEY: 0})
+    add_queries(service, session.id, 30)  # seqs 0-24 on disk, 25-29 only in memory
+
+    restart()
+    add_queries(service, session.id, 10)
+    log = utils.get_interaction_log(APP_NAME, USER_ID, session.id)
+    assert len(log) == interaction_count(service, session.id) == 40
+    # Nothing written twice; after the restart the log picks up from the state window
+    assert [entry["seq"] for entry in log.read()] == list(range(40))
+    with open(log.cold_path) as f:
+        assert [json.loads(line)["seq"] for line in f] == list(range(35))
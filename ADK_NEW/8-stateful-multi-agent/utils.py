@@ -1,7 +1,31 @@
+import copy
+import json
+import os
+import re
+import time
+from bisect import bisect_left
+from collections import ChainMap, deque
 from datetime import datetime
 
+from customer_service_agent.history import (
+    COUNT_KEY,
+    is_history_key,
+    recent_interactions,
+    record_interaction,
+)
+from google.adk.events import Event, EventActions
+from google.adk.sessions.base_session_service import GetSessionConfig
 from google.genai import types
 
+# Session state only holds the last HISTORY_WINDOW interactions, one entry
+# per key (see customer_service_agent/history.py). The full history lives in
+# an InteractionLog, so the cost of each write stays constant.
+
+# Entries kept in memory per session before older ones roll over to disk
+# (or are dropped if INTERACTION_LOG_DIR isn't set)
+HOT_HISTORY_SIZE = 1000
+INTERACTION_LOG_DIR = os.getenv("INTERACTION_LOG_DIR")
+
 
 # ANSI color codes for terminal output
 class Colors:
@@ -30,8 +54,122 @@ class Colors:
     BG_WHITE = "\033[47m"
 
 
+class InteractionLog:
+    """Append-only interaction history for one session.
+
+    Entries arrive numbered (``seq``, from ``record_interaction``) and keep
+    their number, so the log lines up with the session's
+    ``interaction_count``. The newest ``hot_size`` entries are kept in
+    memory; older ones are appended to a JSONL file at ``cold_path`` (with
+    their byte offsets indexed, so ranged reads seek straight to them), or
+    dropped if there is no ``cold_path``.
+
+    An existing ``cold_path`` is re-indexed on creation, so after a restart
+    the log continues after the last entry on disk. Entries that were only in
+    memory are lost, apart from the ones still in the session's state window.
+    """
+
+    def __init__(self, hot_size=HOT_HISTORY_SIZE, cold_path=None):
+        self.hot_size = hot_size
+        self.cold_path = cold_path
+        self._hot = deque()
+        self._last_seq = -1  # newest entry appended
+        self._first_seq = 0  # oldest entry still readable
+        # seq and byte offset of each entry in cold_path, in file order
+        self._cold_seqs = []
+        self._cold_offsets = []
+        if cold_path is not None and os.path.exists(cold_path):
+            self._index_cold_file()
+
+    def _index_cold_file(self):
+        offset = 0
+        with open(self.cold_path, "r+b") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Half-written by a crash; drop it so the next entry starts on its own line
+                    f.truncate(offset)
+                    break
+                self._cold_seqs.append(json.loads(line)["seq"])
+                self._cold_offsets.append(offset)
+                offset += len(line)
+        if self._cold_seqs:
+            self._first_seq = self._cold_seqs[0]
+            self._last_seq = self._cold_seqs[-1]
+
+    def __len__(self):
+        """Entries recorded so far, readable or not (the newest ``seq`` + 1)."""
+        return self._last_seq + 1
+
+    @property
+    def last_seq(self):
+        return self._last_seq
+
+    def append(self, entry):
+        """Add an entry numbered past the newest one. Returns False if it was already logged."""
+        if entry["seq"] <= self._last_seq:
+            return False
+        if not self._hot and not self._cold_seqs:
+            self._first_seq = entry["seq"]
+        self._last_seq = entry["seq"]
+        self._hot.append(entry)
+        if len(self._hot) > self.hot_size:
+            self._roll_over(self._hot.popleft())
+        return True
+
+    def _roll_over(self, entry):
+        if self.cold_path is None:
+            self._first_seq = self._hot[0]["seq"]
+            return
+        with open(self.cold_path, "ab") as f:
+            self._cold_seqs.append(entry["seq"])
+            self._cold_offsets.append(f.tell())
+            f.write(json.dumps(entry).encode() + b"\n")
+
+    def read(self, start=0, stop=None):
+        """Entries with ``start <= seq < stop``, oldest first."""
+        start = max(start, self._first_seq)
+        stop = self._last_seq + 1 if stop is None else min(stop, self._last_seq + 1)
+        if start >= stop:
+            return []
+
+        entries = []
+        first = bisect_left(self._cold_seqs, start)
+        last = bisect_left(self._cold_seqs, stop)
+        if first < last:
+            with open(self.cold_path, "rb") as f:
+                f.seek(self._cold_offsets[first])
+                for _ in range(last - first):
+                    entries.append(json.loads(f.readline()))
+        entries.extend(entry for entry in self._hot if start <= entry["seq"] < stop)
+        return entries
+
+    def tail(self, n):
+        """The last ``n`` entries."""
+        return self.read(self._last_seq + 1 - n)
+
+
+_interaction_logs = {}
+
+
+def get_interaction_log(app_name, user_id, session_id):
+    """The InteractionLog for a session, created on first use."""
+    key = (app_name, user_id, session_id)
+    if key not in _interaction_logs:
+        cold_path = None
+        if INTERACTION_LOG_DIR:
+            os.makedirs(INTERACTION_LOG_DIR, exist_ok=True)
+            name = re.sub(r"[^\w.-]", "_", "_".join(key))
+            cold_path = os.path.join(INTERACTION_LOG_DIR, f"{name}.jsonl")
+        _interaction_logs[key] = InteractionLog(hot_size=HOT_HISTORY_SIZE, cold_path=cold_path)
+    return _interaction_logs[key]
+
+
 def update_interaction_history(session_service, app_name, user_id, session_id, entry):
-    """Add an entry to the interaction history in state.
+    """Add an entry to the interaction history.
+
+    The entry is appended to the session's InteractionLog and written to
+    state as a state-delta event holding just that entry and the updated
+    count, so the cost of a turn doesn't grow with the conversation.
 
     Args:
         session_service: The session service instance
@@ -43,31 +181,40 @@ def update_interaction_history(session_service, app_name, user_id, session_id, e
             - other keys are flexible depending on the action type
     """
     try:
-        # Get current session
+        # Only the state is needed, so don't load the session's past events.
+        # after_timestamp is set too: DatabaseSessionService (google-adk 0.3.0)
+        # filters on it whenever a config is passed, and fails if it is None.
         session = session_service.get_session(
-            app_name=app_name, user_id=user_id, session_id=session_id
+            app_name=app_name,
+            user_id=user_id,
+            session_id=session_id,
+            config=GetSessionConfig(num_recent_events=1, after_timestamp=time.time()),
         )
 
-        # Get current interaction history
-        interaction_history = session.state.get("interaction_history", [])
+        log = get_interaction_log(app_name, user_id, session_id)
+
+        # Tools (e.g. purchase_course) record entries straight into state, and
+        # a resumed session's window predates this process; pick up any entry
+        # newer than the log's last one, keeping its seq
+        for pending in recent_interactions(session.state, start=log.last_seq + 1):
+            log.append(pending)
 
         # Add timestamp if not already present
         if "timestamp" not in entry:
             entry["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-        # Add the entry to interaction history
-        interaction_history.append(entry)
-
-        # Create updated state
-        updated_state = session.state.copy()
-        updated_state["interaction_history"] = interaction_history
-
-        # Create a new session with updated state
-        session_service.create_session(
-            app_name=app_name,
-            user_id=user_id,
-            session_id=session_id,
-            state=updated_state,
+        # Record the entry; the writes land in delta, reads fall through to state
+        delta = {}
+        entry = record_interaction(ChainMap(delta, session.state), entry)
+        log.append(entry)
+
+        session_service.append_event(
+            session=session,
+            event=Event(
+                invocation_id="interaction_history",
+                author="system",
+                actions=EventActions(state_delta=delta),
+            ),
         )
     except Exception as e:
         print(f"Error updating interaction history: {e}")
@@ -135,10 +282,12 @@ def display_state(
             print("📚 Courses: None")
 
         # Handle interaction history in a more readable way
-        interaction_history = session.state.get("interaction_history", [])
+        interaction_history = recent_interactions(session.state)
         if interaction_history:
-            print("📝 Interaction History:")
-            for idx, interaction in enumerate(interaction_history, 1):
+            # State only holds the most recent window; number entries by their place in the full history
+            total = session.state.get(COUNT_KEY, 0)
+            print(f"📝 Interaction History (last {len(interaction_history)} of {total}):")
+            for idx, interaction in enumerate(interaction_history, total - len(interaction_history) + 1):
                 # Pretty format dict entries, or just show strings
                 if isinstance(interaction, dict):
                     action = interaction.get("action", "interaction")
@@ -158,7 +307,7 @@ def display_state(
                         details = ", ".join(
                             f"{k}: {v}"
                             for k, v in interaction.items()
-                            if k not in ["action", "timestamp"]
+                            if k not in ["action", "timestamp", "seq"]
                         )
                         print(
                             f"  {idx}. {action} at {timestamp}"
@@ -173,7 +322,7 @@ def display_state(
         other_keys = [
             k
             for k in session.state.keys()
-            if k not in ["user_name", "purchased_courses", "interaction_history"]
+            if k not in ["user_name", "purchased_courses"] and not is_history_key(k)
         ]
         if other_keys:
             print("🔑 Additional State:")
@@ -185,6 +334,115 @@ def display_state(
         print(f"Error displaying state: {e}")
 
 
+# Set STATE_OBSERVER=off to skip state snapshots entirely: no session reads
+# and no output, just a None check per turn
+STATE_OBSERVER_ENABLED = os.getenv("STATE_OBSERVER", "on").lower() not in ("0", "off", "false", "no")
+
+
+def _list_overlap(old, new):
+    """How many leading items of ``new`` are the trailing items of ``old``.
+
+    Covers plain appends and sliding windows (items dropped from the front as
+    new ones arrive). Returns None unless ``new`` is such a continuation of
+    ``old`` with at least one item added, so that anything else (front
+    removals, reorders, edits) is reported as a whole-value change.
+    """
+    if len(new) > len(old) and new[: len(old)] == old:
+        return len(old)
+    # Longest suffix of old that new starts with, still leaving a new item
+    for size in range(min(len(old), len(new)) - 1, 0, -1):
+        if new[:size] == old[-size:]:
+            return size
+    return None
+
+
+def diff_state(old, new, path=""):
+    """Structural diff of two state values as a list of (op, path, old, new).
+
+    ``op`` is "+" (added), "-" (removed) or "~" (changed). Dicts are compared
+    key by key; for lists that only gained items at the end, just the new
+    items are reported.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in new:
+            key_path = f"{path}.{key}" if path else str(key)
+            if key not in old:
+                changes.append(("+", key_path, None, new[key]))
+            else:
+                changes.extend(diff_state(old[key], new[key], key_path))
+        for key in old:
+            if key not in new:
+                changes.append(("-", f"{path}.{key}" if path else str(key), old[key], None))
+        return changes
+
+    if isinstance(old, list) and isinstance(new, list) and old != new:
+        overlap = _list_overlap(old, new)
+        if overlap is not None:
+            return [("+", f"{path}[{i}]", None, item) for i, item in enumerate(new[overlap:], overlap)]
+
+    if old != new:
+        return [("~", path, old, new)]
+    return []
+
+
+def _short(value, limit=100):
+    text = repr(value)
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+class StateObserver:
+    """Prints only what changed in session state after each turn.
+
+    The last snapshot of each session is kept, so a turn costs a single
+    get_session (plus one extra read the first time a session is seen).
+    """
+
+    def __init__(self):
+        self._snapshots = {}
+
+    def has_snapshot(self, app_name, user_id, session_id):
+        return (app_name, user_id, session_id) in self._snapshots
+
+    def observe(self, session_service, app_name, user_id, session_id, label="State changes"):
+        try:
+            session = session_service.get_session(
+                app_name=app_name, user_id=user_id, session_id=session_id
+            )
+        except Exception as e:
+            print(f"Error reading state: {e}")
+            return
+
+        key = (app_name, user_id, session_id)
+        # Copy: some session services hand back their live state dict
+        state = copy.deepcopy(dict(session.state))
+        previous = self._snapshots.get(key)
+        self._snapshots[key] = state
+
+        if previous is None:
+            print(f"\n{'-' * 10} Current State {'-' * 10}")
+            for name, value in state.items():
+                print(f"  {name}: {_short(value)}")
+            print("-" * 35)
+            return
+
+        changes = diff_state(previous, state)
+        print(f"\n{'-' * 10} {label} {'-' * 10}")
+        if not changes:
+            print("  (no changes)")
+        for op, path, old, new in changes:
+            if op == "+":
+                print(f"{Colors.GREEN}  + {path}: {_short(new)}{Colors.RESET}")
+            elif op == "-":
+                print(f"{Colors.RED}  - {path}: {_short(old)}{Colors.RESET}")
+            else:
+                print(f"{Colors.YELLOW}  ~ {path}: {_short(old)} → {_short(new)}{Colors.RESET}")
+        print("-" * (22 + len(label)))
+
+
+state_observer = StateObserver() if STATE_OBSERVER_ENABLED else None
+
+
 async def process_agent_response(event):
     """Process and display agent response events."""
     print(f"Event ID: {event.id}, Author: {event.author}")
@@ -222,8 +480,12 @@ async def process_agent_response(event):
     return final_response
 
 
-async def call_agent_async(runner, user_id, session_id, query):
-    """Call the agent asynchronously with the user's query."""
+async def call_agent_async(runner, user_id, session_id, query, observer=state_observer):
+    """Call the agent asynchronously with the user's query.
+
+    ``observer`` prints the state changes made by the turn; pass None (or set
+    STATE_OBSERVER=off) to skip reading state altogether.
+    """
     content = types.Content(role="user", parts=[types.Part(text=query)])
     print(
         f"\n{Colors.BG_GREEN}{Colors.BLACK}{Colors.BOLD}--- Running Query: {query} ---{Colors.RESET}"
@@ -231,14 +493,9 @@ async def call_agent_async(runner, user_id, session_id, query):
     final_response_text = None
     agent_name = None
 
-    # Display state before processing the message
-    display_state(
-        runner.session_service,
-        runner.app_name,
-        user_id,
-        session_id,
-        "State BEFORE processing",
-    )
+    # Take a baseline the first time this session is seen
+    if observer and not observer.has_snapshot(runner.app_name, user_id, session_id):
+        observer.observe(runner.session_service, runner.app_name, user_id, session_id)
 
     try:
         async for event in runner.run_async(
@@ -265,14 +522,9 @@ async def call_agent_async(runner, user_id, session_id, query):
             final_response_text,
         )
 
-    # Display state after processing the message
-    display_state(
-        runner.session_service,
-        runner.app_name,
-        user_id,
-        session_id,
-        "State AFTER processing",
-    )
+    # Show only what this turn changed
+    if observer:
+        observer.observe(runner.session_service, runner.app_name, user_id, session_id)
 
     print(f"{Colors.YELLOW}{'-' * 30}{Colors.RESET}")
     return final_response_text
@@ -0,0 +1,289 @@
+"""Concurrent multi-user throughput benchmark for the ADK Runner examples.
+
+Replays a scripted conversation for N simulated users at once through
+``runner.run_async``, for the memory agent (6-persistent-storage) and the
+customer service agent (8-stateful-multi-agent). Every agent's Gemini model
+is replaced by ``ScriptedLlm``, a local stub that makes the tool calls and
+agent transfers the script asks for, so nothing leaves the machine and
+only the Runner and session store are measured.
+
+Reports turns/second, per-turn latency percentiles, and session-store
+reads (get_session, list_sessions, list_events) and writes (create_session,
+append_event) for each backend:
+
+    memory     InMemorySessionService
+    database   DatabaseSessionService on a fresh SQLite file, default settings
+    tuned      the same, built by 6-persistent-storage/session_backend.py
+
+Run from ``ADK_NEW``:
+
+    python -m benchmarks.bench_runner_throughput --users 50
+    python -m benchmarks.bench_runner_throughput --examples memory --backends memory,tuned --model-latency-ms 200
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib.util
+import io
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+from google.adk.models import BaseLlm, LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import DatabaseSessionService, InMemorySessionService
+from google.genai import types
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path[:0] = [str(ROOT / "6-persistent-storage"), str(ROOT / "8-stateful-multi-agent")]
+
+from customer_service_agent.agent import customer_service_agent  # noqa: E402
+from memory_agent.agent import memory_agent  # noqa: E402
+from session_backend import create_session_service  # noqa: E402
+
+
+def _load_module(name, path):
+    # Both examples ship a utils.py, so load this one under its own name
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+stateful_utils = _load_module("stateful_utils", ROOT / "8-stateful-multi-agent" / "utils.py")
+
+# The interaction-history events written by 8's utils are authored by
+# "system", which the Runner warns about on every turn
+logging.getLogger("google.adk.runners").setLevel(logging.ERROR)
+
+BACKENDS = ("memory", "database", "tuned")
+READS = ("get_session", "list_sessions", "list_events")
+WRITES = ("create_session", "append_event")
+
+
+def transfer(agent_name):
+    return ("transfer_to_agent", {"agent_name": agent_name})
+
+
+# Each turn: (user message, tool calls in the order the agents make them).
+# "{user}" is replaced by the simulated user's id.
+EXAMPLES = {
+    "memory": {
+        "agent": memory_agent,
+        "app_name": "Memory Agent",
+        "initial_state": {"user_name": "", "reminders": []},
+        "script": [
+            ("Hi, my name is {user}", [("update_user_name", {"name": "{user}"})]),
+            ("Remind me to buy groceries", [("add_reminder", {"reminder": "buy groceries"})]),
+            ("Remind me to finish the report", [("add_reminder", {"reminder": "finish the report"})]),
+            ("Remind me to call the dentist", [("add_reminder", {"reminder": "call the dentist"})]),
+            ("What are my reminders?", [("view_reminders", {})]),
+            ("Change my second reminder to submit the report by Friday",
+             [("update_reminder", {"index": 2, "updated_text": "submit the report by Friday"})]),
+            ("Delete the first reminder", [("delete_reminder", {"index": 1})]),
+            ("Thanks, that's all for now", []),
+        ],
+    },
+    "stateful": {
+        "agent": customer_service_agent,
+        "app_name": "Customer Support",
+        "initial_state": {"user_name": "{user}", "purchased_courses": [], "interaction_count": 0},
+        "script": [
+            ("What is your refund policy?", [transfer("policy_agent")]),
+            ("I'd like to buy the AI Marketing Platform course",
+             [transfer("sales_agent"), ("purchase_course", {})]),
+            ("What courses have I bought?", [transfer("order_agent")]),
+            ("How do I get started with the first module?", [transfer("course_support")]),
+            ("This isn't for me, I want a refund", [transfer("order_agent"), ("refund_course", {})]),
+            ("Thanks, that's all for now", []),
+        ],
+        # main.py logs every query to the interaction history before the turn
+        "before_turn": stateful_utils.add_user_query_to_history,
+    },
+}
+
+
+class ScriptedLlm(BaseLlm):
+    """Stand-in model that replays the tool calls scripted for each message.
+
+    Given the latest user message, it calls the last scripted tool that
+    this agent has, unless that tool has already answered this turn, in
+    which case it replies with text. Transfers to itself are skipped.
+    """
+
+    model: str = "scripted"
+    agent_name: str = ""
+    routes: dict = {}
+    latency: float = 0.0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        query, answered = self._current_turn(llm_request.contents)
+        calls = [
+            (name, args)
+            for name, args in self.routes.get(query, [])
+            if name in llm_request.tools_dict and args.get("agent_name") != self.agent_name
+        ]
+        if calls and calls[-1][0] not in answered:
+            name, args = calls[-1]
+            part = types.Part(function_call=types.FunctionCall(name=name, args=args))
+        else:
+            part = types.Part(text=f"[{self.agent_name}] done: {query}")
+        yield LlmResponse(content=types.Content(role="model", parts=[part]))
+
+    @staticmethod
+    def _current_turn(contents):
+        """The user's latest message, and the tools that have responded since."""
+        answered = set()
+        for content in reversed(contents):
+            for part in content.parts or []:
+                if part.function_response:
+                    answered.add(part.function_response.name)
+                elif part.text and "` tool returned result:" in part.text:
+                    # Another agent's tool call, as rewritten by ADK for context
+                    answered.add(part.text.split("`")[1])
+            first = (content.parts or [types.Part()])[0]
+            if content.role == "user" and first.text and first.text != "For context:":
+                return first.text, answered
+        return "", answered
+
+
+def use_scripted_models(agent, routes, latency):
+    agent.model = ScriptedLlm(agent_name=agent.name, routes=routes, latency=latency)
+    for sub_agent in agent.sub_agents:
+        use_scripted_models(sub_agent, routes, latency)
+
+
+def count_store_calls(service):
+    """Wrap the service's methods on the instance so every call is counted."""
+    counts = Counter()
+
+    def counted(name, method):
+        def wrapper(*args, **kwargs):
+            counts[name] += 1
+            return method(*args, **kwargs)
+
+        return wrapper
+
+    for name in READS + WRITES:
+        setattr(service, name, counted(name, getattr(service, name)))
+    return counts
+
+
+def make_service(backend, workdir):
+    if backend == "memory":
+        return InMemorySessionService()
+    workdir.mkdir(parents=True, exist_ok=True)
+    db_url = f"sqlite:///{workdir / f'{backend}.db'}"
+    if backend == "database":
+        return DatabaseSessionService(db_url=db_url)
+    return create_session_service(db_url=db_url)
+
+
+def fill(value, user):
+    if isinstance(value, str):
+        return value.replace("{user}", user)
+    if isinstance(value, dict):
+        return {key: fill(item, user) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(fill(item, user) for item in value)
+    return value
+
+
+async def simulate_user(runner, service, example, user_id, latencies):
+    app_name = example["app_name"]
+    session = service.create_session(
+        app_name=app_name, user_id=user_id, state=fill(example["initial_state"], user_id)
+    )
+    before_turn = example.get("before_turn")
+    for message, _ in example["script"]:
+        query = fill(message, user_id)
+        started = time.perf_counter()
+        if before_turn:
+            before_turn(service, app_name, user_id, session.id, query)
+        async for _ in runner.run_async(
+            user_id=user_id,
+            session_id=session.id,
+            new_message=types.Content(role="user", parts=[types.Part(text=query)]),
+        ):
+            pass
+        latencies.append(time.perf_counter() - started)
+
+
+async def run_scenario(example, backend, users, workdir):
+    service = make_service(backend, workdir)
+    counts = count_store_calls(service)
+    runner = Runner(agent=example["agent"], app_name=example["app_name"], session_service=service)
+
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        simulate_user(runner, service, example, f"user{i:04d}", latencies) for i in range(users)
+    ))
+    elapsed = time.perf_counter() - started
+
+    cuts = statistics.quantiles(latencies, n=100)
+    reads = sum(counts[name] for name in READS)
+    writes = sum(counts[name] for name in WRITES)
+    return {
+        "turns": len(latencies),
+        "seconds": elapsed,
+        "turns/s": len(latencies) / elapsed,
+        "p50 ms": cuts[49] * 1000,
+        "p90 ms": cuts[89] * 1000,
+        "p99 ms": cuts[98] * 1000,
+        "reads": reads,
+        "writes": writes,
+        "reads/turn": reads / len(latencies),
+        "writes/turn": writes / len(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="simulated users per scenario")
+    parser.add_argument("--examples", default=",".join(EXAMPLES), help=f"comma-separated, any of {','.join(EXAMPLES)}")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help=f"comma-separated, any of {','.join(BACKENDS)}")
+    parser.add_argument("--model-latency-ms", type=float, default=0.0,
+                        help="simulated model latency per call, to see how the store behaves while turns overlap")
+    args = parser.parse_args()
+
+    examples = [name.strip() for name in args.examples.split(",") if name.strip()]
+    backends = [name.strip() for name in args.backends.split(",") if name.strip()]
+    if not set(examples) <= set(EXAMPLES) or not set(backends) <= set(BACKENDS):
+        parser.error(f"--examples must be from {','.join(EXAMPLES)}, --backends from {','.join(BACKENDS)}")
+
+    for name in examples:
+        example = EXAMPLES[name]
+        routes = {}
+        for i in range(args.users):
+            for message, calls in example["script"]:
+                routes[fill(message, f"user{i:04d}")] = fill(calls, f"user{i:04d}")
+        use_scripted_models(example["agent"], routes, args.model_latency_ms / 1000)
+
+    print(f"{args.users} users, model latency {args.model_latency_ms:g} ms\n")
+    header = f"{'example':<10} {'backend':<9} {'turns':>6} {'turns/s':>9} {'p50 ms':>8} {'p90 ms':>8} " \
+             f"{'p99 ms':>8} {'reads':>7} {'writes':>7} {'r/turn':>7} {'w/turn':>7}"
+    print(header)
+    print("-" * len(header))
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in examples:
+            for backend in backends:
+                # The example tools print a line per call; keep the table readable
+                with contextlib.redirect_stdout(io.StringIO()):
+                    result = asyncio.run(run_scenario(EXAMPLES[name], backend, args.users, Path(workdir) / name))
+                print(f"{name:<10} {backend:<9} {result['turns']:>6} {result['turns/s']:>9.1f} "
+                      f"{result['p50 ms']:>8.1f} {result['p90 ms']:>8.1f} {result['p99 ms']:>8.1f} "
+                      f"{result['reads']:>7} {result['writes']:>7} "
+                      f"{result['reads/turn']:>7.1f} {result['writes/turn']:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
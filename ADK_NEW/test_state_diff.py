@@ -0,0 +1,89 @@
+"""Tests for the state observer's diffing in examples 6 and 8.
+
+Both examples ship their own copy of ``diff_state`` and ``StateObserver`` in
+their ``utils.py``, so every case runs against each copy, and the shared
+definitions must stay identical.
+
+Run from ``ADK_NEW``:
+
+    python -m pytest test_state_diff.py
+"""
+
+import ast
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+from google.adk.events import Event, EventActions
+from google.adk.sessions import InMemorySessionService
+
+ROOT = Path(__file__).resolve().parent
+EXAMPLES = ("6-persistent-storage", "8-stateful-multi-agent")
+SHARED = ("Colors", "_list_overlap", "diff_state", "_short", "StateObserver")
+
+
+def load_utils(example):
+    # 8's utils imports customer_service_agent from its own directory
+    sys.path.insert(0, str(ROOT / example))
+    name = f"utils_{example.split('-')[0]}"
+    spec = importlib.util.spec_from_file_location(name, ROOT / example / "utils.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="module", params=EXAMPLES)
+def utils(request):
+    return load_utils(request.param)
+
+
+@pytest.mark.parametrize("old, new, expected", [
+    pytest.param(["a", "b"], ["a", "b", "c"], [("+", "[2]", None, "c")], id="append"),
+    pytest.param([], ["a"], [("+", "[0]", None, "a")], id="append-to-empty"),
+    pytest.param(["a", "b", "c"], ["b", "c", "d"], [("+", "[2]", None, "d")], id="sliding-window"),
+    pytest.param(["a", "b", "c"], ["b", "c"], [("~", "", ["a", "b", "c"], ["b", "c"])], id="front-removal"),
+    pytest.param(["a", "b", "c"], ["c"], [("~", "", ["a", "b", "c"], ["c"])], id="front-removal-to-one"),
+    pytest.param(["a", "a", "b"], ["a", "b", "c"], [("+", "[2]", None, "c")], id="duplicates-slide-by-one"),
+    pytest.param(["a", "b", "a"], ["a", "b", "a", "c"], [("+", "[3]", None, "c")], id="duplicates-append"),
+    pytest.param(["a", "b", "a"], ["a", "c"], [("+", "[1]", None, "c")], id="duplicates-slide-by-two"),
+    pytest.param(["a", "a"], ["a", "b"], [("+", "[1]", None, "b")], id="all-duplicates"),
+    pytest.param(["a", "a"], ["a"], [("~", "", ["a", "a"], ["a"])], id="duplicate-removed"),
+    pytest.param(["a", "b", "c"], ["b", "a", "c"], [("~", "", ["a", "b", "c"], ["b", "a", "c"])], id="reorder"),
+    pytest.param(["a", "b"], ["a", "b"], [], id="unchanged"),
+])
+def test_list_diff(utils, old, new, expected):
+    assert utils.diff_state(old, new) == expected
+
+
+def test_observer_reports_front_removal(utils, capsys):
+    service = InMemorySessionService()
+    session = service.create_session(app_name="app", user_id="user", state={"reminders": ["a", "b", "c"]})
+    observer = utils.StateObserver()
+    observer.observe(service, "app", "user", session.id)
+
+    service.append_event(session, Event(
+        invocation_id="test", author="user", actions=EventActions(state_delta={"reminders": ["b", "c"]}),
+    ))
+    capsys.readouterr()
+    observer.observe(service, "app", "user", session.id)
+    output = capsys.readouterr().out
+    assert "(no changes)" not in output
+    assert "~ reminders: ['a', 'b', 'c'] → ['b', 'c']" in output
+
+
+def test_copies_stay_identical():
+    definitions = {}
+    for example in EXAMPLES:
+        source = (ROOT / example / "utils.py").read_text()
+        tree = ast.parse(source)
+        definitions[example] = {
+            node.name: ast.get_source_segment(source, node)
+            for node in tree.body
+            if isinstance(node, (ast.FunctionDef, ast.ClassDef)) and node.name in SHARED
+        }
+    first, second = (definitions[example] for example in EXAMPLES)
+    assert set(first) == set(SHARED)
+    for name in SHARED:
+        assert first[name] == second[name], f"{name} differs between {EXAMPLES[0]} and {EXAMPLES[1]}"
@@ -0,0 +1,57 @@
+"""JSON encoding and compressed responses for the ShimmerCV API.
+
+``orjson`` and ``brotli`` are used when installed and are otherwise
+replaced by the standard library (``json`` and gzip-only compression).
+"""
+
+import gzip
+import json
+
+from fastapi import Request, Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_array(items) -> bytes:
+    """Join already-encoded JSON documents into one JSON array."""
+    return b"[" + b",".join(items) + b"]"
+
+
+def json_response(request: Request, body: bytes, min_compress_bytes: int = 1024, headers=None) -> Response:
+    """Send pre-encoded JSON, compressed with brotli or gzip when the client accepts it."""
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+
+    if len(body) >= min_compress_bytes:
+        accepted = {
+            encoding.split(";")[0].strip()
+            for encoding in request.headers.get("accept-encoding", "").split(",")
+        }
+        if brotli is not None and "br" in accepted:
+            body = brotli.compress(body, quality=4)
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in accepted:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,89 @@
+"""Password hashing off the event loop for the ShimmerCV API.
+
+bcrypt takes 100-300 ms per call. Running it directly inside an
+``async def`` route blocks every other request for that long, so hashes
+and verifications are sent to a bounded thread pool instead (the bcrypt
+package releases the GIL while hashing, so threads run in parallel).
+
+When more than ``max_pending`` operations are already queued or running,
+new ones are rejected with ``HashingBusy`` so a login burst can't build an
+unbounded backlog; the API turns that into a 503 with ``Retry-After``.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class HashingBusy(Exception):
+    """Raised when the password hashing queue is full."""
+
+
+class _Timing:
+    """Running count / average / max of a duration, in milliseconds."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, seconds: float):
+        ms = seconds * 1000
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def as_dict(self) -> dict:
+        avg = self.total_ms / self.count if self.count else 0.0
+        return {"count": self.count, "avg_ms": round(avg, 2), "max_ms": round(self.max_ms, 2)}
+
+
+class PasswordHasher:
+    def __init__(self, pwd_context, workers: int, max_pending: int):
+        self.pwd_context = pwd_context
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        # Only touched from the event loop thread, so no lock is needed
+        self._pending = 0
+        self._rejected = 0
+        self._hash_time = _Timing()
+        self._queue_wait = _Timing()
+
+    async def _run(self, fn, *args):
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise HashingBusy()
+
+        def job():
+            started = time.perf_counter()
+            result = fn(*args)
+            return result, started, time.perf_counter()
+
+        self._pending += 1
+        queued_at = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started, finished = await loop.run_in_executor(self._executor, job)
+        finally:
+            self._pending -= 1
+
+        self._queue_wait.add(started - queued_at)
+        self._hash_time.add(finished - started)
+        return result
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(self.pwd_context.verify, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.pwd_context.hash, password)
+
+    def metrics(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "rejected": self._rejected,
+            "hash_time": self._hash_time.as_dict(),
+            "queue_wait": self._queue_wait.as_dict(),
+        }
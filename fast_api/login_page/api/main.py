@@ -1,92 +1,110 @@
-<<<<<<< HEAD
-from fastapi import FastAPI, Depends, HTTPException, status
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import OAuth2PasswordBearer
-from pydantic import BaseModel
-from typing import List, Optional
-import os
-from dotenv import load_dotenv
-import httpx
-
-load_dotenv()  # Load environment variables from .env file
-
-app = FastAPI(title="ShimmerCV API")
-
-# Configure CORS
-origins = [
-    "http://localhost:5173",
-    "http://localhost:4173",
-]
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-=======
-from fastapi import FastAPI, Depends, HTTPException, status, Request, Response
+from fastapi import APIRouter, FastAPI, Depends, Header, HTTPException, Query, status, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel
 from typing import List, Optional
+from contextlib import asynccontextmanager
 import os
 import uuid
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
 from passlib.context import CryptContext
-import json
 from pathlib import Path
+from dotenv import load_dotenv
+from api import supabase_backend
+from api.fast_json import json_array, json_response, loads
+from api.hashing import HashingBusy, PasswordHasher
+from api.pagination import decode_cursor, encode_cursor, parse_fields, project
+from api.pdf_render import TEMPLATES, PDFRenderer, UnknownTemplateError
+from api.storage import ConflictError, DuplicateEmailError, get_storage
+from api.token_cache import TokenCache
+from api.user_cache import UserDirectory
 
-# Create data directory if it doesn't exist
-data_dir = Path("data")
-data_dir.mkdir(exist_ok=True)
-users_file = data_dir / "users.json"
-cvs_file = data_dir / "cvs.json"
+load_dotenv()  # Load environment variables from .env file
 
-# Initialize empty data files if they don't exist
-if not users_file.exists():
-    users_file.write_text(json.dumps([]))
+# Where CVs live: "local" (the storage backend below, signed in with this
+# API's own tokens) or "supabase" (Supabase tables and Supabase auth tokens,
+# see api/supabase_backend.py)
+CV_BACKEND = os.environ.get("CV_BACKEND", "local").lower()
+if CV_BACKEND not in ("local", "supabase"):
+    raise ValueError(f"Unknown CV_BACKEND {CV_BACKEND!r}, expected 'local' or 'supabase'")
 
-if not cvs_file.exists():
-    cvs_file.write_text(json.dumps([]))
+# Storage backend (SQLite by default, migrated from the JSON files on first start)
+data_dir = Path("data")
+storage = get_storage(data_dir)
+
+# In-memory user lookups by id and email, in front of the storage backend
+users = UserDirectory(storage, max_size=int(os.environ.get("USER_CACHE_SIZE", "10000")))
+
+# Opt-in read path that serves CVs straight from their stored JSON encoding
+# (written once at save time) instead of re-validating them through the CV
+# model on every request. Bodies of COMPRESS_MIN_BYTES or more are sent
+# brotli/gzip-compressed when the client accepts it.
+FAST_CV_RESPONSES = os.environ.get("FAST_CV_RESPONSES", "").lower() in ("1", "true", "yes")
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024"))
+
+# PDF export: rendered in worker processes, cached on disk by content hash
+pdf_renderer = PDFRenderer(
+    cache_dir=data_dir / "pdf_cache",
+    workers=int(os.environ.get("PDF_RENDER_WORKERS", "2")),
+    max_bytes=int(os.environ.get("PDF_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+)
 
 # Security
 SECRET_KEY = os.environ.get("SECRET_KEY", "a_very_secret_key_for_development")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.environ.get("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+
+# Prepared HMAC key, so jose doesn't rebuild it from SECRET_KEY on every call
+signing_key = jwk.construct(SECRET_KEY, ALGORITHM)
+
+# Claims of recently verified access tokens, dropped at the token's exp
+verified_claims = TokenCache(
+    ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    max_size=int(os.environ.get("TOKEN_CACHE_SIZE", "10000")),
+)
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hasher = PasswordHasher(
+    pwd_context,
+    workers=int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 4)),
+    max_pending=int(os.environ.get("PASSWORD_HASH_MAX_PENDING", "32")),
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The pooled Supabase client is only needed when it serves the CVs
+    if CV_BACKEND == "supabase":
+        await supabase_backend.open_client()
+    yield
+    if CV_BACKEND == "supabase":
+        await supabase_backend.close_client()
+
 # Initialize FastAPI app
-app = FastAPI(title="ShimmerCV API")
+app = FastAPI(title="ShimmerCV API", lifespan=lifespan)
+
+# Local CV routes, mounted below unless CV_BACKEND is "supabase"
+cv_router = APIRouter()
+
+# Configure CORS
+origins = [
+    "http://localhost:5173",
+    "http://localhost:4173",
+]
 
-# CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, replace with specific origins
->>>>>>> ca37b1b5e09e2f953b100fb69347e0da9580f893
+    allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
-<<<<<<< HEAD
-# Supabase configuration
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
-
-# Models
-class PersonalInfo(BaseModel):
-    fullName: str
-    email: str
-    phone: Optional[str] = None
-    address: Optional[str] = None
-    linkedin: Optional[str] = None
-    website: Optional[str] = None
-    summary: Optional[str] = None
-=======
 # Models
 class UserBase(BaseModel):
     email: str
@@ -102,6 +120,10 @@ class User(UserBase):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     user_id: Optional[str] = None
@@ -119,281 +141,24 @@ class PersonalInfo(BaseModel):
     website: Optional[str] = None
     linkedin: Optional[str] = None
     github: Optional[str] = None
->>>>>>> ca37b1b5e09e2f953b100fb69347e0da9580f893
 
 class Education(BaseModel):
     institution: str
     degree: str
-<<<<<<< HEAD
-    field: Optional[str] = None
-    startDate: Optional[str] = None
-    endDate: Optional[str] = None
-=======
     field_of_study: Optional[str] = None
     start_date: str
     end_date: Optional[str] = None
->>>>>>> ca37b1b5e09e2f953b100fb69347e0da9580f893
     description: Optional[str] = None
 
 class Experience(BaseModel):
     company: str
     position: str
-<<<<<<< HEAD
-    location: Optional[str] = None
-    startDate: Optional[str] = None
-    endDate: Optional[str] = None
-    current: Optional[bool] = False
-=======
     start_date: str
     end_date: Optional[str] = None
->>>>>>> ca37b1b5e09e2f953b100fb69347e0da9580f893
     description: Optional[str] = None
 
 class Skill(BaseModel):
     name: str
-<<<<<<< HEAD
-    level: int
-
-class CVCreate(BaseModel):
-    personalInfo: PersonalInfo
-    education: List[Education]
-    experience: List[Experience]
-    skills: List[Skill]
-    template: str
-
-class CV(BaseModel):
-    id: str
-    title: str
-    template: str
-    created_at: str
-    updated_at: str
-
-# Helper functions for Supabase
-async def make_supabase_request(endpoint: str, method: str = "GET", token: str = None, data=None):
-    url = f"{SUPABASE_URL}/rest/v1/{endpoint}"
-    headers = {
-        "apikey": SUPABASE_KEY,
-        "Content-Type": "application/json",
-    }
-    
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
-    
-    async with httpx.AsyncClient() as client:
-        if method == "GET":
-            response = await client.get(url, headers=headers)
-        elif method == "POST":
-            response = await client.post(url, headers=headers, json=data)
-        elif method == "PUT":
-            response = await client.put(url, headers=headers, json=data)
-        elif method == "DELETE":
-            response = await client.delete(url, headers=headers)
-        else:
-            raise ValueError(f"Unsupported method: {method}")
-        
-        if response.status_code >= 400:
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Supabase error: {response.text}"
-            )
-        
-        return response.json() if response.text else None
-
-async def verify_token(token: str = Depends(oauth2_scheme)):
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{SUPABASE_URL}/auth/v1/user",
-                headers={
-                    "apikey": SUPABASE_KEY,
-                    "Authorization": f"Bearer {token}"
-                }
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Invalid authentication credentials",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"Authentication error: {str(e)}",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
-# Routes
-@app.get("/")
-def read_root():
-    return {"message": "Welcome to ShimmerCV API"}
-
-@app.get("/cvs", response_model=List[CV])
-async def get_cvs(user=Depends(verify_token)):
-    user_id = user["id"]
-    return await make_supabase_request(
-        f"cvs?user_id=eq.{user_id}&order=updated_at.desc",
-        token=SUPABASE_KEY
-    )
-
-@app.post("/cvs")
-async def create_cv(cv: CVCreate, user=Depends(verify_token)):
-    user_id = user["id"]
-    
-    # Create CV record
-    cv_data = {
-        "user_id": user_id,
-        "title": cv.personalInfo.fullName + "'s CV",
-        "template": cv.template,
-        "personal_info": cv.personalInfo.dict(),
-    }
-    
-    cv_response = await make_supabase_request(
-        "cvs",
-        method="POST",
-        token=SUPABASE_KEY,
-        data=cv_data
-    )
-    
-    # Get the created CV ID
-    cv_id = cv_response[0]["id"]
-    
-    # Create education records
-    for edu in cv.education:
-        edu_data = {
-            "cv_id": cv_id,
-            "institution": edu.institution,
-            "degree": edu.degree,
-            "field": edu.field,
-            "start_date": edu.startDate,
-            "end_date": edu.endDate,
-            "description": edu.description,
-        }
-        await make_supabase_request(
-            "education",
-            method="POST",
-            token=SUPABASE_KEY,
-            data=edu_data
-        )
-    
-    # Create experience records
-    for exp in cv.experience:
-        exp_data = {
-            "cv_id": cv_id,
-            "company": exp.company,
-            "position": exp.position,
-            "location": exp.location,
-            "start_date": exp.startDate,
-            "end_date": exp.endDate,
-            "current": exp.current,
-            "description": exp.description,
-        }
-        await make_supabase_request(
-            "experience",
-            method="POST",
-            token=SUPABASE_KEY,
-            data=exp_data
-        )
-    
-    # Create skill records
-    for skill in cv.skills:
-        skill_data = {
-            "cv_id": cv_id,
-            "name": skill.name,
-            "level": skill.level,
-        }
-        await make_supabase_request(
-            "skills",
-            method="POST",
-            token=SUPABASE_KEY,
-            data=skill_data
-        )
-    
-    return {"message": "CV created successfully", "cv_id": cv_id}
-
-@app.get("/cvs/{cv_id}")
-async def get_cv(cv_id: str, user=Depends(verify_token)):
-    user_id = user["id"]
-    
-    # Get CV
-    cv_data = await make_supabase_request(
-        f"cvs?id=eq.{cv_id}&user_id=eq.{user_id}",
-        token=SUPABASE_KEY
-    )
-    
-    if not cv_data:
-        raise HTTPException(status_code=404, detail="CV not found")
-    
-    # Get education
-    education_data = await make_supabase_request(
-        f"education?cv_id=eq.{cv_id}&order=start_date.desc",
-        token=SUPABASE_KEY
-    )
-    
-    # Get experience
-    experience_data = await make_supabase_request(
-        f"experience?cv_id=eq.{cv_id}&order=start_date.desc",
-        token=SUPABASE_KEY
-    )
-    
-    # Get skills
-    skills_data = await make_supabase_request(
-        f"skills?cv_id=eq.{cv_id}&order=name.asc",
-        token=SUPABASE_KEY
-    )
-    
-    return {
-        "cv": cv_data[0],
-        "education": education_data,
-        "experience": experience_data,
-        "skills": skills_data
-    }
-
-@app.delete("/cvs/{cv_id}")
-async def delete_cv(cv_id: str, user=Depends(verify_token)):
-    user_id = user["id"]
-    
-    # Verify ownership
-    cv_data = await make_supabase_request(
-        f"cvs?id=eq.{cv_id}&user_id=eq.{user_id}",
-        token=SUPABASE_KEY
-    )
-    
-    if not cv_data:
-        raise HTTPException(status_code=404, detail="CV not found")
-    
-    # Delete skills
-    await make_supabase_request(
-        f"skills?cv_id=eq.{cv_id}",
-        method="DELETE",
-        token=SUPABASE_KEY
-    )
-    
-    # Delete experiences
-    await make_supabase_request(
-        f"experience?cv_id=eq.{cv_id}",
-        method="DELETE",
-        token=SUPABASE_KEY
-    )
-    
-    # Delete education
-    await make_supabase_request(
-        f"education?cv_id=eq.{cv_id}",
-        method="DELETE",
-        token=SUPABASE_KEY
-    )
-    
-    # Delete CV
-    await make_supabase_request(
-        f"cvs?id=eq.{cv_id}",
-        method="DELETE",
-        token=SUPABASE_KEY
-    )
-    
-    return {"message": "CV deleted successfully"}
-=======
     level: Optional[int] = None
 
 class CVCreate(CVBase):
@@ -409,39 +174,32 @@ class CV(CVCreate):
     updated_at: str
 
 # Helper functions
-def get_users():
-    users_data = json.loads(users_file.read_text())
-    return {user["id"]: user for user in users_data}
-
-def save_users(users):
-    users_file.write_text(json.dumps(list(users.values()), indent=2))
-
-def get_cvs():
-    cvs_data = json.loads(cvs_file.read_text())
-    return {cv["id"]: cv for cv in cvs_data}
+async def verify_password(plain_password, hashed_password):
+    return await password_hasher.verify(plain_password, hashed_password)
 
-def save_cvs(cvs):
-    cvs_file.write_text(json.dumps(list(cvs.values()), indent=2))
-
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    return await password_hasher.hash(password)
 
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, signing_key, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_refresh_token(user_id: str):
+    expire = datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    return jwt.encode({"sub": user_id, "type": "refresh", "exp": expire}, signing_key, algorithm=ALGORITHM)
+
+def issue_tokens(user_id: str):
+    return {
+        "access_token": create_access_token(data={"sub": user_id}),
+        "refresh_token": create_refresh_token(user_id),
+        "token_type": "bearer",
+    }
+
 def get_user_by_email(email: str):
-    users = get_users()
-    for user_id, user in users.items():
-        if user["email"] == email:
-            return user
-    return None
+    return users.get_by_email(email)
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
@@ -449,33 +207,70 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         detail="Invalid authentication credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+    payload = verified_claims.get(token)
+    if payload is None:
+        try:
+            payload = jwt.decode(token, signing_key, algorithms=[ALGORITHM])
+        except JWTError:
             raise credentials_exception
-        token_data = TokenData(user_id=user_id)
-    except JWTError:
+        verified_claims.put(token, payload, expires_at=payload.get("exp"))
+    
+    user_id: str = payload.get("sub")
+    # Refresh tokens are only accepted by /token/refresh
+    if user_id is None or payload.get("type") == "refresh":
         raise credentials_exception
-    users = get_users()
+    token_data = TokenData(user_id=user_id)
     user = users.get(token_data.user_id)
     if user is None:
         raise credentials_exception
     return user
 
+@app.exception_handler(HashingBusy)
+async def hashing_busy_handler(request: Request, exc: HashingBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Too many login attempts in progress, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
 # Routes
+@app.get("/")
+def read_root():
+    return {"message": "Welcome to ShimmerCV API"}
+
+@app.get("/metrics/password-hashing")
+async def password_hashing_metrics():
+    return password_hasher.metrics()
 
 @app.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
     user = get_user_by_email(form_data.username)
-    if not user or not verify_password(form_data.password, user["password"]):
+    if not user or not await verify_password(form_data.password, user["password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = create_access_token(data={"sub": user["id"]})
-    return {"access_token": access_token, "token_type": "bearer"}
+    return issue_tokens(user["id"])
+
+@app.post("/token/refresh", response_model=Token)
+async def refresh_access_token(body: RefreshRequest):
+    """Trade a refresh token for a new access token without re-entering the password.
+
+    A new refresh token is returned too, so an active session keeps sliding forward.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(body.refresh_token, signing_key, algorithms=[ALGORITHM])
+    except JWTError:
+        raise credentials_exception
+    if payload.get("type") != "refresh" or users.get(payload.get("sub", "")) is None:
+        raise credentials_exception
+    return issue_tokens(payload["sub"])
 
 @app.post("/users", response_model=User)
 async def create_user(user: UserCreate):
@@ -486,12 +281,11 @@ async def create_user(user: UserCreate):
             detail="Email already registered",
         )
     
-    users = get_users()
     user_id = str(uuid.uuid4())
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash(user.password)
     created_at = datetime.utcnow().isoformat()
     
-    users[user_id] = {
+    new_user = {
         "id": user_id,
         "email": user.email,
         "name": user.name,
@@ -499,8 +293,15 @@ async def create_user(user: UserCreate):
         "created_at": created_at
     }
     
-    save_users(users)
-    user_data = users[user_id].copy()
+    try:
+        users.save_user(new_user)
+    except DuplicateEmailError:
+        # Another registration for this email landed while we were hashing
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered",
+        )
+    user_data = new_user.copy()
     user_data.pop("password")  # Don't return the password
     return user_data
 
@@ -510,9 +311,8 @@ async def get_current_user_info(current_user: dict = Depends(get_current_user)):
     user_data.pop("password")  # Don't return the password
     return user_data
 
-@app.post("/cvs", response_model=CV)
+@cv_router.post("/cvs", response_model=CV)
 async def create_cv(cv: CVCreate, current_user: dict = Depends(get_current_user)):
-    cvs = get_cvs()
     cv_id = str(uuid.uuid4())
     now = datetime.utcnow().isoformat()
     
@@ -524,20 +324,88 @@ async def create_cv(cv: CVCreate, current_user: dict = Depends(get_current_user)
         "updated_at": now
     }
     
-    cvs[cv_id] = new_cv
-    save_cvs(cvs)
+    storage.save_cv(new_cv)
     return new_cv
 
-@app.get("/cvs", response_model=List[CV])
-async def get_user_cvs(current_user: dict = Depends(get_current_user)):
-    cvs = get_cvs()
-    user_cvs = [cv for cv in cvs.values() if cv["user_id"] == current_user["id"]]
-    return user_cvs
+@cv_router.get("/cvs", response_model=List[CV])
+async def get_user_cvs(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+):
+    """List the user's CVs, newest first.
+
+    Pass ``limit`` to paginate; the ``X-Next-Cursor`` response header holds the
+    ``after`` value for the next page. ``fields=id,title,template,updated_at``
+    returns only those fields instead of full CVs.
+    """
+    try:
+        cursor = decode_cursor(after) if after else None
+        projection = parse_fields(fields, CV.model_fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    if FAST_CV_RESPONSES and projection is None:
+        # Serve the stored JSON documents as-is, without decoding or revalidating them
+        documents = storage.get_user_cvs_json(
+            current_user["id"],
+            limit=None if limit is None else limit + 1,
+            after=cursor,
+        )
+        headers = {}
+        if limit is not None and len(documents) > limit:
+            documents = documents[:limit]
+            headers["X-Next-Cursor"] = encode_cursor(loads(documents[-1]))
+        return json_response(request, json_array(documents), COMPRESS_MIN_BYTES, headers)
+    
+    # Fetch one extra CV to know whether there is a next page
+    cvs = storage.get_user_cvs(
+        current_user["id"],
+        limit=None if limit is None else limit + 1,
+        after=cursor,
+    )
+    headers = {}
+    if limit is not None and len(cvs) > limit:
+        cvs = cvs[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(cvs[-1])
+    
+    if projection is not None:
+        # Partial CVs don't match the CV model, so skip response validation
+        return JSONResponse(content=project(cvs, projection), headers=headers)
+    response.headers.update(headers)
+    return cvs
+
+@cv_router.get("/cvs/{cv_id}", response_model=CV)
+async def get_cv(cv_id: str, request: Request, current_user: dict = Depends(get_current_user)):
+    if FAST_CV_RESPONSES:
+        stored = storage.get_cv_json(cv_id)
+        owner_id, cv = stored if stored else (None, None)
+    else:
+        cv = storage.get_cv(cv_id)
+        owner_id = cv["user_id"] if cv else None
+    
+    if not cv:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="CV not found"
+        )
+    
+    if owner_id != current_user["id"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to access this CV"
+        )
+    
+    if FAST_CV_RESPONSES:
+        return json_response(request, cv, COMPRESS_MIN_BYTES)
+    return cv
 
-@app.get("/cvs/{cv_id}", response_model=CV)
-async def get_cv(cv_id: str, current_user: dict = Depends(get_current_user)):
-    cvs = get_cvs()
-    cv = cvs.get(cv_id)
+@cv_router.get("/cvs/{cv_id}/pdf")
+async def get_cv_pdf(cv_id: str, current_user: dict = Depends(get_current_user)):
+    cv = storage.get_cv(cv_id)
     
     if not cv:
         raise HTTPException(
@@ -551,12 +419,32 @@ async def get_cv(cv_id: str, current_user: dict = Depends(get_current_user)):
             detail="Not authorized to access this CV"
         )
     
-    return cv
+    try:
+        pdf = await pdf_renderer.render(cv)
+    except UnknownTemplateError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown template {str(e)!r}, expected one of: {', '.join(TEMPLATES)}"
+        )
+    return Response(
+        content=pdf,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'inline; filename="cv-{cv_id}.pdf"'},
+    )
 
-@app.put("/cvs/{cv_id}", response_model=CV)
-async def update_cv(cv_id: str, cv_update: CVCreate, current_user: dict = Depends(get_current_user)):
-    cvs = get_cvs()
-    existing_cv = cvs.get(cv_id)
+@cv_router.put("/cvs/{cv_id}", response_model=CV)
+async def update_cv(
+    cv_id: str,
+    cv_update: CVCreate,
+    if_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user),
+):
+    """Update a CV.
+
+    Send the ``updated_at`` you last read in an ``If-Match`` header to make sure
+    you don't overwrite someone else's edit; a stale value gets ``409 Conflict``.
+    """
+    existing_cv = storage.get_cv(cv_id)
     
     if not existing_cv:
         raise HTTPException(
@@ -576,29 +464,36 @@ async def update_cv(cv_id: str, cv_update: CVCreate, current_user: dict = Depend
         "updated_at": datetime.utcnow().isoformat()
     }
     
-    cvs[cv_id] = updated_cv
-    save_cvs(cvs)
+    # Without If-Match, still refuse to clobber a write that landed after our read
+    expected_updated_at = if_match.strip('"') if if_match else existing_cv["updated_at"]
+    try:
+        storage.save_cv(updated_cv, expected_updated_at=expected_updated_at)
+    except ConflictError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="CV was modified by another request, reload it and try again"
+        )
     return updated_cv
 
-@app.delete("/cvs/{cv_id}", status_code=status.HTTP_204_NO_CONTENT)
+@cv_router.delete("/cvs/{cv_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_cv(cv_id: str, current_user: dict = Depends(get_current_user)):
-    cvs = get_cvs()
-    if cv_id not in cvs:
+    cv = storage.get_cv(cv_id)
+    if not cv:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="CV not found"
         )
     
-    if cvs[cv_id]["user_id"] != current_user["id"]:
+    if cv["user_id"] != current_user["id"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to delete this CV"
         )
     
-    del cvs[cv_id]
-    save_cvs(cvs)
+    storage.delete_cv(cv_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
->>>>>>> ca37b1b5e09e2f953b100fb69347e0da9580f893
+
+app.include_router(supabase_backend.router if CV_BACKEND == "supabase" else cv_router)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,46 @@
+"""Cursor pagination and field projection helpers for CV listings.
+
+Listings are ordered newest first by ``(updated_at, id)``. A cursor is the
+``(updated_at, id)`` of the last item on a page, base64url-encoded so
+clients treat it as opaque; the next page starts strictly after it.
+"""
+
+import base64
+import json
+from typing import Iterable, List, Optional, Tuple
+
+
+def encode_cursor(record: dict) -> str:
+    raw = json.dumps([record["updated_at"], record["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Return ``(updated_at, id)`` from a cursor. Raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        updated_at, record_id = json.loads(raw)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    return str(updated_at), str(record_id)
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """Turn ``fields=id,title`` into a list. Raises ValueError on unknown fields."""
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    # The cursor is built from these, so they are always returned
+    for field in ("id", "updated_at"):
+        if field not in requested:
+            requested.append(field)
+    return requested
+
+
+def project(records: List[dict], fields: Optional[List[str]]) -> List[dict]:
+    if fields is None:
+        return records
+    return [{field: record.get(field) for field in fields} for record in records]
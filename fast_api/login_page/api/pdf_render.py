@@ -0,0 +1,146 @@
+"""CV to PDF rendering for the ShimmerCV API.
+
+WeasyPrint rendering is CPU-heavy and synchronous, so it runs in a process
+pool rather than on the event loop. On top of that:
+
+- each worker process compiles a Jinja template once and reuses it;
+- finished PDFs are stored in a content-addressed cache directory, keyed by
+  a hash of the CV content plus the template source, so an unchanged CV is
+  never rendered twice and editing a template invalidates its PDFs;
+- the cache directory is capped at ``max_bytes``, evicting the least
+  recently used PDFs (by mtime, refreshed on every hit) first;
+- concurrent requests for the same PDF share a single render.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
+
+TEMPLATE_DIR = Path(__file__).parent / "templates"
+DEFAULT_TEMPLATE = "modern"
+
+# The templates a CV can ask for; base.html is only their shared layout
+TEMPLATES = ("modern", "minimal")
+
+# Only these fields affect the rendered document
+CONTENT_FIELDS = ("title", "template", "personal_info", "education", "experience", "skills")
+
+
+class UnknownTemplateError(ValueError):
+    """Raised when a CV names a template that isn't one of ``TEMPLATES``."""
+
+
+def template_name(cv: dict) -> str:
+    # The name comes from the client, so it is never used as a path unchecked
+    name = cv.get("template") or DEFAULT_TEMPLATE
+    if name not in TEMPLATES:
+        raise UnknownTemplateError(name)
+    return name
+
+
+@lru_cache(maxsize=None)
+def _template_version(name: str) -> str:
+    sources = [(TEMPLATE_DIR / "base.html").read_bytes(), (TEMPLATE_DIR / f"{name}.html").read_bytes()]
+    return hashlib.sha256(b"".join(sources)).hexdigest()[:16]
+
+
+# --- Worker process side ---
+
+@lru_cache(maxsize=None)
+def _compiled_template(name: str):
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+    env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=select_autoescape(["html"]))
+    return env.get_template(f"{name}.html")
+
+
+def _render_pdf(cv: dict, name: str) -> bytes:
+    # Imported here so the API process never loads WeasyPrint itself
+    from weasyprint import HTML
+
+    html = _compiled_template(name).render(cv=cv)
+    return HTML(string=html, base_url=str(TEMPLATE_DIR)).write_pdf()
+
+
+# --- API process side ---
+
+class PDFRenderer:
+    def __init__(self, cache_dir: Path, workers: int, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.workers = workers
+        self.max_bytes = max_bytes
+        self._executor = None
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # Started on first use so importing the API doesn't spawn processes
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def cache_key(self, cv: dict) -> str:
+        name = template_name(cv)
+        content = {field: cv.get(field) for field in CONTENT_FIELDS}
+        payload = json.dumps(content, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(f"{name}:{_template_version(name)}:{payload}".encode()).hexdigest()
+
+    async def render(self, cv: dict) -> bytes:
+        key = self.cache_key(cv)
+        path = self.cache_dir / f"{key}.pdf"
+        try:
+            return await asyncio.to_thread(self._read_cached, path)
+        except FileNotFoundError:
+            pass
+
+        # Someone is already rendering this exact PDF: wait for their result
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._render_and_store(cv, path))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _render_and_store(self, cv: dict, path: Path) -> bytes:
+        loop = asyncio.get_running_loop()
+        pdf = await loop.run_in_executor(self._pool(), _render_pdf, cv, template_name(cv))
+
+        # Write to a temp file first so readers never see a partial PDF
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        await asyncio.to_thread(tmp_path.write_bytes, pdf)
+        os.replace(tmp_path, path)
+        await asyncio.to_thread(self._evict)
+        return pdf
+
+    @staticmethod
+    def _read_cached(path: Path) -> bytes:
+        pdf = path.read_bytes()
+        try:
+            # Mark it as recently used, so eviction takes older PDFs first
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted (possibly by another worker) right after we read it
+            pass
+        return pdf
+
+    def _evict(self):
+        """Delete the least recently used PDFs until the cache fits in ``max_bytes``."""
+        entries = []
+        for path in self.cache_dir.glob("*.pdf"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,485 @@
+"""Storage backends for the ShimmerCV API.
+
+Two backends share the same small interface:
+
+- ``SQLiteStorage`` (default): an embedded SQLite database in WAL mode with
+  indexes on ``id``, ``user_id`` and ``email``. Single-record reads and
+  writes touch one row instead of the whole dataset.
+- ``JSONFileStorage``: the original ``users.json`` / ``cvs.json`` files,
+  kept for development and as the migration source.
+
+Pick one with the ``STORAGE_BACKEND`` environment variable (``sqlite`` or
+``json``). The SQLite backend imports the existing JSON files the first
+time it starts against an empty database.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from api.fast_json import dumps, loads
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class ConflictError(Exception):
+    """Raised when a record changed since the caller read it (optimistic concurrency)."""
+
+
+class DuplicateEmailError(Exception):
+    """Raised when saving a user whose email (case-insensitively) belongs to another user."""
+
+
+class MigrationError(Exception):
+    """Raised when the JSON data can't be imported without losing records."""
+
+
+@contextmanager
+def _file_lock(path: Path, shared: bool = False):
+    """Cross-process lock on ``path`` (a separate ``.lock`` file next to the data)."""
+    lock_path = path.with_name(path.name + ".lock")
+    with open(lock_path, "a+") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            # Windows has no shared locks; lock the first byte exclusively
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _atomic_write(path: Path, text: str):
+    """Replace ``path`` so readers (and crashes) only ever see the old or the new file."""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    if hasattr(os, "O_DIRECTORY"):
+        # Make the rename itself durable
+        dir_fd = os.open(path.parent, os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class JSONFileStorage:
+    """Whole-file JSON storage (the original ShimmerCV data layout).
+
+    Writes are read-modify-write under a cross-process file lock and replace
+    the file atomically, so concurrent workers don't lose updates and a crash
+    never leaves a truncated file.
+
+    With ``journal=True``, writes are appended to a ``.journal`` file next to
+    each data file instead (one fsync per batch, no full rewrite), and the
+    journal is folded back into the JSON file once it grows past
+    ``compact_bytes``.
+    """
+
+    def __init__(self, data_dir: Path, journal: bool = False, compact_bytes: int = 4 * 1024 * 1024):
+        self.users_file = data_dir / "users.json"
+        self.cvs_file = data_dir / "cvs.json"
+        self.journal = journal
+        self.compact_bytes = compact_bytes
+
+        # Initialize empty data files if they don't exist
+        if not self.users_file.exists():
+            self.users_file.write_text(json.dumps([]))
+        if not self.cvs_file.exists():
+            self.cvs_file.write_text(json.dumps([]))
+
+    @staticmethod
+    def _journal_path(path: Path) -> Path:
+        return path.with_name(path.name + ".journal")
+
+    def _read_journal(self, path: Path) -> List[dict]:
+        journal_path = self._journal_path(path)
+        if not journal_path.exists():
+            return []
+        entries = []
+        for line in journal_path.read_text().splitlines():
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # A torn final line from a crash mid-append: that write never completed
+                break
+        return entries
+
+    def _load_unlocked(self, path: Path) -> Dict[str, dict]:
+        records = {record["id"]: record for record in json.loads(path.read_text())}
+        if self.journal:
+            for entry in self._read_journal(path):
+                if entry["op"] == "put":
+                    records[entry["record"]["id"]] = entry["record"]
+                else:
+                    records.pop(entry["id"], None)
+        return records
+
+    def _load(self, path: Path) -> Dict[str, dict]:
+        if not self.journal:
+            # The file is only ever replaced atomically, so no lock is needed
+            return self._load_unlocked(path)
+        with _file_lock(path, shared=True):
+            return self._load_unlocked(path)
+
+    def _dump(self, path: Path, records: Dict[str, dict]):
+        _atomic_write(path, json.dumps(list(records.values()), indent=2))
+
+    def _write(self, path: Path, records: Dict[str, dict], entries: List[dict]):
+        """Persist ``entries`` (already applied to ``records``). Caller holds the lock."""
+        if not self.journal:
+            self._dump(path, records)
+            return
+
+        journal_path = self._journal_path(path)
+        with open(journal_path, "a") as f:
+            f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+            f.flush()
+            os.fsync(f.fileno())
+
+        if journal_path.stat().st_size >= self.compact_bytes:
+            self._dump(path, records)
+            journal_path.unlink()
+
+    def users_version(self) -> int:
+        """Changes whenever any process rewrites the users file (or its journal)."""
+        mtimes = [self.users_file.stat().st_mtime_ns]
+        journal_path = self._journal_path(self.users_file)
+        if journal_path.exists():
+            mtimes.append(journal_path.stat().st_mtime_ns)
+        return max(mtimes)
+
+    # Users
+    def get_user(self, user_id: str) -> Optional[dict]:
+        return self._load(self.users_file).get(user_id)
+
+    def get_user_by_email(self, email: str) -> Optional[dict]:
+        email = email.lower()
+        for user in self._load(self.users_file).values():
+            if user["email"].lower() == email:
+                return user
+        return None
+
+    def save_user(self, user: dict):
+        email = user["email"].lower()
+        with _file_lock(self.users_file):
+            users = self._load_unlocked(self.users_file)
+            # Checked under the lock, so two racing registrations can't both succeed
+            if any(other["email"].lower() == email and other["id"] != user["id"] for other in users.values()):
+                raise DuplicateEmailError(user["email"])
+            users[user["id"]] = user
+            self._write(self.users_file, users, [{"op": "put", "record": user}])
+
+    def delete_user(self, user_id: str) -> bool:
+        with _file_lock(self.users_file):
+            users = self._load_unlocked(self.users_file)
+            if users.pop(user_id, None) is None:
+                return False
+            self._write(self.users_file, users, [{"op": "delete", "id": user_id}])
+        return True
+
+    # CVs
+    def get_cv(self, cv_id: str) -> Optional[dict]:
+        return self._load(self.cvs_file).get(cv_id)
+
+    def get_user_cvs(
+        self, user_id: str, limit: Optional[int] = None, after: Optional[Tuple[str, str]] = None
+    ) -> List[dict]:
+        cvs = [cv for cv in self._load(self.cvs_file).values() if cv["user_id"] == user_id]
+        cvs.sort(key=lambda cv: (cv["updated_at"], cv["id"]), reverse=True)
+        if after is not None:
+            cvs = [cv for cv in cvs if (cv["updated_at"], cv["id"]) < after]
+        return cvs if limit is None else cvs[:limit]
+
+    # This backend keeps no per-record encoding, so these just encode on read
+    def get_cv_json(self, cv_id: str) -> Optional[Tuple[str, bytes]]:
+        cv = self.get_cv(cv_id)
+        return (cv["user_id"], dumps(cv)) if cv else None
+
+    def get_user_cvs_json(
+        self, user_id: str, limit: Optional[int] = None, after: Optional[Tuple[str, str]] = None
+    ) -> List[bytes]:
+        return [dumps(cv) for cv in self.get_user_cvs(user_id, limit=limit, after=after)]
+
+    def save_cv(self, cv: dict, expected_updated_at: Optional[str] = None):
+        """Insert or replace a CV.
+
+        If ``expected_updated_at`` is given, the stored CV must still have that
+        ``updated_at``, otherwise ``ConflictError`` is raised and nothing is written.
+        """
+        with _file_lock(self.cvs_file):
+            cvs = self._load_unlocked(self.cvs_file)
+            if expected_updated_at is not None:
+                current = cvs.get(cv["id"])
+                if current is None or current["updated_at"] != expected_updated_at:
+                    raise ConflictError(cv["id"])
+            cvs[cv["id"]] = cv
+            self._write(self.cvs_file, cvs, [{"op": "put", "record": cv}])
+
+    def save_cvs(self, new_cvs: List[dict]):
+        """Insert or replace many CVs with a single write (one fsync)."""
+        with _file_lock(self.cvs_file):
+            cvs = self._load_unlocked(self.cvs_file)
+            for cv in new_cvs:
+                cvs[cv["id"]] = cv
+            self._write(self.cvs_file, cvs, [{"op": "put", "record": cv} for cv in new_cvs])
+
+    def delete_cv(self, cv_id: str) -> bool:
+        with _file_lock(self.cvs_file):
+            cvs = self._load_unlocked(self.cvs_file)
+            if cvs.pop(cv_id, None) is None:
+                return False
+            self._write(self.cvs_file, cvs, [{"op": "delete", "id": cv_id}])
+        return True
+
+
+def _encode(record: dict) -> str:
+    return dumps(record).decode()
+
+
+class SQLiteStorage:
+    """Indexed SQLite storage. Each user and CV is one row holding its JSON document."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS users (
+        id TEXT PRIMARY KEY,
+        email TEXT NOT NULL UNIQUE COLLATE NOCASE,
+        data TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS cvs (
+        id TEXT PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        updated_at TEXT NOT NULL,
+        data TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_cvs_user_updated ON cvs (user_id, updated_at, id);
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO meta (key, value) VALUES ('users_version', 0);
+    """
+
+    # Run in the same transaction as every write to the users table
+    BUMP_USERS_VERSION = "UPDATE meta SET value = value + 1 WHERE key = 'users_version'"
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        # sqlite3 connections must not be shared across threads, and FastAPI
+        # runs sync work in a threadpool, so keep one connection per thread.
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            # WAL lets readers proceed while a writer commits, and NORMAL
+            # sync is durable across application crashes in WAL mode.
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def users_version(self) -> int:
+        """A counter bumped by every committed user write, from any process (CV writes leave it alone)."""
+        return self._connect().execute("SELECT value FROM meta WHERE key = 'users_version'").fetchone()[0]
+
+    def is_empty(self) -> bool:
+        conn = self._connect()
+        users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        cvs = conn.execute("SELECT COUNT(*) FROM cvs").fetchone()[0]
+        return users == 0 and cvs == 0
+
+    def migrate_from_json(self, source: JSONFileStorage) -> int:
+        """Copy every user and CV from the JSON files into an empty database.
+
+        Returns the number of records imported, or 0 if the database already
+        holds data. The emptiness check and the inserts share one write
+        transaction, so when several workers start at once exactly one of them
+        imports and the others find the data already there.
+
+        The JSON files never enforced unique emails, but this database does
+        (case-insensitively). If several users share an email, nothing is
+        imported and ``MigrationError`` names them, so they can be merged or
+        renamed by hand instead of all but one being dropped.
+        """
+        conn = self._connect()
+        # Take the write lock before looking, so no other process can migrate in between
+        conn.execute("BEGIN IMMEDIATE")
+        with conn:
+            if not self.is_empty():
+                return 0
+            return self._import_records(conn, source)
+
+    def _import_records(self, conn: sqlite3.Connection, source: JSONFileStorage) -> int:
+        users = list(source._load(source.users_file).values())
+        cvs = list(source._load(source.cvs_file).values())
+
+        ids_by_email = {}
+        for user in users:
+            ids_by_email.setdefault(user["email"].lower(), []).append(user["id"])
+        duplicates = {email: ids for email, ids in ids_by_email.items() if len(ids) > 1}
+        if duplicates:
+            details = "; ".join(f"{email}: {', '.join(ids)}" for email, ids in sorted(duplicates.items()))
+            raise MigrationError(
+                f"{source.users_file} has users sharing an email (case-insensitive), "
+                f"fix them before migrating: {details}"
+            )
+
+        # Plain INSERTs: any other conflict aborts the whole import instead of skipping rows
+        conn.executemany(
+            "INSERT INTO users (id, email, data) VALUES (?, ?, ?)",
+            [(u["id"], u["email"], _encode(u)) for u in users],
+        )
+        conn.execute(self.BUMP_USERS_VERSION)
+        conn.executemany(
+            "INSERT INTO cvs (id, user_id, updated_at, data) VALUES (?, ?, ?, ?)",
+            [(cv["id"], cv["user_id"], cv["updated_at"], _encode(cv)) for cv in cvs],
+        )
+        return len(users) + len(cvs)
+
+    # Users
+    def get_user(self, user_id: str) -> Optional[dict]:
+        row = self._connect().execute("SELECT data FROM users WHERE id = ?", (user_id,)).fetchone()
+        return loads(row[0]) if row else None
+
+    def get_user_by_email(self, email: str) -> Optional[dict]:
+        row = self._connect().execute("SELECT data FROM users WHERE email = ?", (email,)).fetchone()
+        return loads(row[0]) if row else None
+
+    def save_user(self, user: dict):
+        """Insert a new user or update an existing one (matched by id).
+
+        Raises ``DuplicateEmailError`` if another user already has the email.
+        """
+        try:
+            with self._connect() as conn:
+                # Only an id conflict is an update; an email conflict must fail
+                # rather than replace (and so delete) the other user's row
+                conn.execute(
+                    "INSERT INTO users (id, email, data) VALUES (?, ?, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET email = excluded.email, data = excluded.data",
+                    (user["id"], user["email"], _encode(user)),
+                )
+                conn.execute(self.BUMP_USERS_VERSION)
+        except sqlite3.IntegrityError:
+            raise DuplicateEmailError(user["email"])
+
+    def delete_user(self, user_id: str) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
+            if cursor.rowcount:
+                conn.execute(self.BUMP_USERS_VERSION)
+        return cursor.rowcount > 0
+
+    # CVs
+    def get_cv(self, cv_id: str) -> Optional[dict]:
+        row = self._connect().execute("SELECT data FROM cvs WHERE id = ?", (cv_id,)).fetchone()
+        return loads(row[0]) if row else None
+
+    def get_user_cvs(
+        self, user_id: str, limit: Optional[int] = None, after: Optional[Tuple[str, str]] = None
+    ) -> List[dict]:
+        """A user's CVs, newest first. ``after`` is the (updated_at, id) of the previous page's last CV.
+
+        Served from the (user_id, updated_at, id) index, so the cost grows with
+        ``limit`` rather than with the number of CVs stored.
+        """
+        return [loads(data) for data in self._user_cv_documents(user_id, limit, after)]
+
+    def get_cv_json(self, cv_id: str) -> Optional[Tuple[str, bytes]]:
+        """The CV's owner id and its stored JSON document, without decoding it."""
+        row = self._connect().execute("SELECT user_id, data FROM cvs WHERE id = ?", (cv_id,)).fetchone()
+        return (row[0], row[1].encode()) if row else None
+
+    def get_user_cvs_json(
+        self, user_id: str, limit: Optional[int] = None, after: Optional[Tuple[str, str]] = None
+    ) -> List[bytes]:
+        """Like ``get_user_cvs``, but returns each CV's stored JSON document as-is."""
+        return [data.encode() for data in self._user_cv_documents(user_id, limit, after)]
+
+    def _user_cv_documents(self, user_id: str, limit: Optional[int], after: Optional[Tuple[str, str]]) -> List[str]:
+        query = "SELECT data FROM cvs WHERE user_id = ?"
+        params = [user_id]
+        if after is not None:
+            query += " AND (updated_at, id) < (?, ?)"
+            params.extend(after)
+        query += " ORDER BY updated_at DESC, id DESC LIMIT ?"
+        params.append(-1 if limit is None else limit)
+        rows = self._connect().execute(query, params).fetchall()
+        return [row[0] for row in rows]
+
+    def save_cv(self, cv: dict, expected_updated_at: Optional[str] = None):
+        """Insert or replace a CV.
+
+        If ``expected_updated_at`` is given, the stored CV must still have that
+        ``updated_at``, otherwise ``ConflictError`` is raised and nothing is written.
+        """
+        with self._connect() as conn:
+            if expected_updated_at is None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cvs (id, user_id, updated_at, data) VALUES (?, ?, ?, ?)",
+                    (cv["id"], cv["user_id"], cv["updated_at"], _encode(cv)),
+                )
+                return
+            cursor = conn.execute(
+                "UPDATE cvs SET user_id = ?, updated_at = ?, data = ? WHERE id = ? AND updated_at = ?",
+                (cv["user_id"], cv["updated_at"], _encode(cv), cv["id"], expected_updated_at),
+            )
+        if cursor.rowcount == 0:
+            raise ConflictError(cv["id"])
+
+    def save_cvs(self, cvs: List[dict]):
+        """Insert or replace many CVs in one transaction."""
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO cvs (id, user_id, updated_at, data) VALUES (?, ?, ?, ?)",
+                [(cv["id"], cv["user_id"], cv["updated_at"], _encode(cv)) for cv in cvs],
+            )
+
+    def delete_cv(self, cv_id: str) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM cvs WHERE id = ?", (cv_id,))
+        return cursor.rowcount > 0
+
+
+def get_storage(data_dir: Path):
+    """Build the storage backend selected by ``STORAGE_BACKEND``."""
+    data_dir.mkdir(exist_ok=True)
+    backend = os.environ.get("STORAGE_BACKEND", "sqlite").lower()
+
+    json_storage = JSONFileStorage(
+        data_dir,
+        journal=os.environ.get("JSON_JOURNAL", "").lower() in ("1", "true", "yes"),
+        compact_bytes=int(os.environ.get("JSON_JOURNAL_COMPACT_BYTES", str(4 * 1024 * 1024))),
+    )
+    if backend == "json":
+        return json_storage
+    if backend != "sqlite":
+        raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+    storage = SQLiteStorage(data_dir / "shimmercv.db")
+    # One-time migration into an empty database: the JSON files are left in place as a backup
+    imported = storage.migrate_from_json(json_storage)
+    if imported:
+        print(f"Migrated {imported} records from JSON files into {storage.db_path}")
+    return storage
@@ -0,0 +1,369 @@
+"""CV routes backed by Supabase (PostgREST tables and Supabase auth).
+
+Selected in main.py with ``CV_BACKEND=supabase``; users then sign in through
+Supabase and send its access token, instead of the API's own JWTs. Every
+Supabase call goes through one pooled HTTP/2 client, opened and closed with
+the app by ``open_client`` and ``close_client``.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.security import OAuth2PasswordBearer
+from pydantic import BaseModel
+from typing import List, Optional
+from collections import OrderedDict
+from urllib.parse import quote
+import asyncio
+import hashlib
+import os
+from dotenv import load_dotenv
+import httpx
+from api.pagination import decode_cursor, encode_cursor, parse_fields
+from api.token_cache import TokenCache, token_expiry
+
+load_dotenv()  # Load environment variables from .env file
+
+# Supabase configuration
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+
+# Verified Supabase users by token, so repeat requests skip /auth/v1/user.
+# Entries never outlive the token's exp, and are re-checked after TOKEN_CACHE_TTL
+# seconds so revoked sessions are noticed.
+verified_tokens = TokenCache(ttl=float(os.getenv("TOKEN_CACHE_TTL", "300")))
+
+# Assembled GET /cvs/{id} responses, keyed by (cv_id, updated_at), LRU-bounded
+CV_CACHE_SIZE = int(os.getenv("CV_CACHE_SIZE", "1000"))
+cv_response_cache = OrderedDict()
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+
+router = APIRouter()
+
+# One pooled HTTP/2 client for every Supabase call
+client: Optional[httpx.AsyncClient] = None
+
+async def open_client():
+    global client
+    client = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30),
+        timeout=httpx.Timeout(10.0),
+    )
+
+async def close_client():
+    await client.aclose()
+
+# Models
+class PersonalInfo(BaseModel):
+    fullName: str
+    email: str
+    phone: Optional[str] = None
+    address: Optional[str] = None
+    linkedin: Optional[str] = None
+    website: Optional[str] = None
+    summary: Optional[str] = None
+
+class Education(BaseModel):
+    institution: str
+    degree: str
+    field: Optional[str] = None
+    startDate: Optional[str] = None
+    endDate: Optional[str] = None
+    description: Optional[str] = None
+
+class Experience(BaseModel):
+    company: str
+    position: str
+    location: Optional[str] = None
+    startDate: Optional[str] = None
+    endDate: Optional[str] = None
+    current: Optional[bool] = False
+    description: Optional[str] = None
+
+class Skill(BaseModel):
+    name: str
+    level: int
+
+class CVCreate(BaseModel):
+    personalInfo: PersonalInfo
+    education: List[Education]
+    experience: List[Experience]
+    skills: List[Skill]
+    template: str
+
+class CV(BaseModel):
+    id: str
+    title: str
+    template: str
+    created_at: str
+    updated_at: str
+
+# Helper functions for Supabase
+async def make_supabase_request(endpoint: str, method: str = "GET", token: str = None, data=None):
+    url = f"{SUPABASE_URL}/rest/v1/{endpoint}"
+    headers = {
+        "apikey": SUPABASE_KEY,
+        "Content-Type": "application/json",
+    }
+
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+
+    if method == "GET":
+        response = await client.get(url, headers=headers)
+    elif method == "POST":
+        response = await client.post(url, headers=headers, json=data)
+    elif method == "PUT":
+        response = await client.put(url, headers=headers, json=data)
+    elif method == "DELETE":
+        response = await client.delete(url, headers=headers)
+    else:
+        raise ValueError(f"Unsupported method: {method}")
+
+    if response.status_code >= 400:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Supabase error: {response.text}"
+        )
+
+    return response.json() if response.text else None
+
+async def verify_token(token: str = Depends(oauth2_scheme)):
+    user = verified_tokens.get(token)
+    if user is not None:
+        return user
+
+    try:
+        response = await client.get(
+            f"{SUPABASE_URL}/auth/v1/user",
+            headers={
+                "apikey": SUPABASE_KEY,
+                "Authorization": f"Bearer {token}"
+            }
+        )
+
+        if response.status_code == 200:
+            user = response.json()
+            verified_tokens.put(token, user, expires_at=token_expiry(token))
+            return user
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid authentication credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Authentication error: {str(e)}",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+async def delete_cv_rows(cv_id: str):
+    """Delete a CV and all of its child rows.
+
+    The child tables don't depend on each other, so their deletes run
+    concurrently; the CV row goes last because the children reference it.
+    """
+    await asyncio.gather(*(
+        make_supabase_request(f"{table}?cv_id=eq.{cv_id}", method="DELETE", token=SUPABASE_KEY)
+        for table in ("skills", "experience", "education")
+    ))
+    await make_supabase_request(f"cvs?id=eq.{cv_id}", method="DELETE", token=SUPABASE_KEY)
+
+# Routes
+@router.get("/cvs", response_model=List[CV])
+async def get_cvs(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    user=Depends(verify_token),
+):
+    """List the user's CVs, newest first.
+
+    Pass ``limit`` to paginate; the ``X-Next-Cursor`` response header holds the
+    ``after`` value for the next page. ``fields=id,title,template,updated_at``
+    returns only those columns.
+    """
+    user_id = user["id"]
+    try:
+        cursor = decode_cursor(after) if after else None
+        projection = parse_fields(fields, CV.model_fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    # Column projection, ordering and the keyset filter all run in PostgREST
+    endpoint = f"cvs?user_id=eq.{user_id}&order=updated_at.desc,id.desc"
+    if projection is not None:
+        endpoint += "&select=" + ",".join(projection)
+    if cursor is not None:
+        updated_at, cv_id = (quote(value, safe="") for value in cursor)
+        endpoint += f"&or=(updated_at.lt.{updated_at},and(updated_at.eq.{updated_at},id.lt.{cv_id}))"
+    if limit is not None:
+        # Fetch one extra CV to know whether there is a next page
+        endpoint += f"&limit={limit + 1}"
+
+    cvs = await make_supabase_request(endpoint, token=SUPABASE_KEY)
+    headers = {}
+    if limit is not None and len(cvs) > limit:
+        cvs = cvs[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(cvs[-1])
+
+    if projection is not None:
+        # Partial CVs don't match the CV model, so skip response validation
+        return JSONResponse(content=cvs, headers=headers)
+    response.headers.update(headers)
+    return cvs
+
+@router.post("/cvs")
+async def create_cv(cv: CVCreate, user=Depends(verify_token)):
+    user_id = user["id"]
+
+    # Create CV record
+    cv_data = {
+        "user_id": user_id,
+        "title": cv.personalInfo.fullName + "'s CV",
+        "template": cv.template,
+        "personal_info": cv.personalInfo.dict(),
+    }
+
+    cv_response = await make_supabase_request(
+        "cvs",
+        method="POST",
+        token=SUPABASE_KEY,
+        data=cv_data
+    )
+
+    # Get the created CV ID
+    cv_id = cv_response[0]["id"]
+
+    # Build the education, experience and skill rows
+    child_rows = {
+        "education": [
+            {
+                "cv_id": cv_id,
+                "institution": edu.institution,
+                "degree": edu.degree,
+                "field": edu.field,
+                "start_date": edu.startDate,
+                "end_date": edu.endDate,
+                "description": edu.description,
+            }
+            for edu in cv.education
+        ],
+        "experience": [
+            {
+                "cv_id": cv_id,
+                "company": exp.company,
+                "position": exp.position,
+                "location": exp.location,
+                "start_date": exp.startDate,
+                "end_date": exp.endDate,
+                "current": exp.current,
+                "description": exp.description,
+            }
+            for exp in cv.experience
+        ],
+        "skills": [
+            {
+                "cv_id": cv_id,
+                "name": skill.name,
+                "level": skill.level,
+            }
+            for skill in cv.skills
+        ],
+    }
+
+    # One bulk insert per table (PostgREST accepts an array body), all tables at once
+    results = await asyncio.gather(
+        *(
+            make_supabase_request(table, method="POST", token=SUPABASE_KEY, data=rows)
+            for table, rows in child_rows.items()
+            if rows
+        ),
+        return_exceptions=True,
+    )
+
+    # If any insert failed, remove the partial CV rather than leave it half-written
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors:
+        await delete_cv_rows(cv_id)
+        raise errors[0]
+
+    return {"message": "CV created successfully", "cv_id": cv_id}
+
+@router.get("/cvs/{cv_id}")
+async def get_cv(cv_id: str, request: Request, user=Depends(verify_token)):
+    user_id = user["id"]
+
+    # Cheap freshness check: only the CV's updated_at (also verifies ownership)
+    cv_meta = await make_supabase_request(
+        f"cvs?id=eq.{cv_id}&user_id=eq.{user_id}&select=updated_at",
+        token=SUPABASE_KEY
+    )
+
+    if not cv_meta:
+        raise HTTPException(status_code=404, detail="CV not found")
+
+    # Writes to the education, experience and skills rows bump the CV's
+    # updated_at (migration 20250601100000_touch_cv_on_child_change), so
+    # (id, updated_at) identifies a version of the whole document
+    cache_key = (cv_id, cv_meta[0]["updated_at"])
+    etag = '"' + hashlib.sha256(":".join(cache_key).encode()).hexdigest()[:32] + '"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    body = cv_response_cache.get(cache_key)
+    if body is None:
+        # One request for the CV and its education, experience and skills
+        # using PostgREST resource embedding
+        rows = await make_supabase_request(
+            f"cvs?id=eq.{cv_id}&user_id=eq.{user_id}"
+            "&select=*,education(*),experience(*),skills(*)"
+            "&education.order=start_date.desc"
+            "&experience.order=start_date.desc"
+            "&skills.order=name.asc",
+            token=SUPABASE_KEY
+        )
+
+        if not rows:
+            raise HTTPException(status_code=404, detail="CV not found")
+
+        cv_data = rows[0]
+        education_data = cv_data.pop("education")
+        experience_data = cv_data.pop("experience")
+        skills_data = cv_data.pop("skills")
+        body = {
+            "cv": cv_data,
+            "education": education_data,
+            "experience": experience_data,
+            "skills": skills_data
+        }
+
+        cv_response_cache[cache_key] = body
+        while len(cv_response_cache) > CV_CACHE_SIZE:
+            cv_response_cache.popitem(last=False)
+    else:
+        cv_response_cache.move_to_end(cache_key)
+
+    return JSONResponse(content=body, headers={"ETag": etag})
+
+@router.delete("/cvs/{cv_id}")
+async def delete_cv(cv_id: str, user=Depends(verify_token)):
+    user_id = user["id"]
+
+    # Verify ownership
+    cv_data = await make_supabase_request(
+        f"cvs?id=eq.{cv_id}&user_id=eq.{user_id}",
+        token=SUPABASE_KEY
+    )
+
+    if not cv_data:
+        raise HTTPException(status_code=404, detail="CV not found")
+
+    # Delete the child rows concurrently, then the CV itself
+    await delete_cv_rows(cv_id)
+
+    return {"message": "CV deleted successfully"}
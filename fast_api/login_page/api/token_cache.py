@@ -0,0 +1,63 @@
+"""Short-lived cache of verified bearer tokens for the ShimmerCV API.
+
+Entries are keyed by a SHA-256 of the token (raw tokens are never kept as
+keys), expire at the token's own ``exp`` claim or after ``ttl`` seconds,
+whichever comes first, and the cache holds at most ``max_size`` entries
+(least recently used are dropped first).
+"""
+
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+def token_expiry(token: str) -> Optional[float]:
+    """Read the ``exp`` claim of a JWT without verifying it, or None if it has none."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp is not None else None
+    except (IndexError, ValueError, TypeError, AttributeError):
+        return None
+
+
+class TokenCache:
+    def __init__(self, ttl: float, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # token hash -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[Any]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, token: str, value: Any, expires_at: Optional[float] = None):
+        """Cache ``value`` for ``token`` until ``expires_at`` (capped at now + ttl)."""
+        expires_at = min(expires_at or float("inf"), time.time() + self.ttl)
+        if expires_at <= time.time():
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
@@ -0,0 +1,92 @@
+"""In-process user directory for the ShimmerCV API.
+
+Keeps recently used user records in memory, keyed by id and by lowercase
+email, so login, registration and token checks don't hit storage on every
+request. The directory is:
+
+- write-through: ``save_user`` and ``delete_user`` update storage and the
+  cache together;
+- invalidated by ``storage.users_version()``, so writes made by other
+  uvicorn workers are picked up on the next lookup;
+- bounded by an LRU (``USER_CACHE_SIZE`` entries, default 10000).
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+class UserDirectory:
+    def __init__(self, storage, max_size: int = 10000):
+        self.storage = storage
+        self.max_size = max_size
+        self._by_id = OrderedDict()  # user id -> user record, in LRU order
+        self._id_by_email = {}  # lowercase email -> user id
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _check_version(self):
+        # Another process wrote to the users store: drop everything we hold
+        version = self.storage.users_version()
+        if version != self._version:
+            self._by_id.clear()
+            self._id_by_email.clear()
+            self._version = version
+
+    def _remember(self, user: dict):
+        user_id = user["id"]
+        old = self._by_id.pop(user_id, None)
+        if old is not None:
+            self._id_by_email.pop(old["email"].lower(), None)
+
+        self._by_id[user_id] = user
+        self._id_by_email[user["email"].lower()] = user_id
+
+        while len(self._by_id) > self.max_size:
+            _, evicted = self._by_id.popitem(last=False)
+            self._id_by_email.pop(evicted["email"].lower(), None)
+
+    def get(self, user_id: str) -> Optional[dict]:
+        with self._lock:
+            self._check_version()
+            user = self._by_id.get(user_id)
+            if user is not None:
+                self._by_id.move_to_end(user_id)
+                return user
+
+        user = self.storage.get_user(user_id)
+        if user is not None:
+            with self._lock:
+                self._remember(user)
+        return user
+
+    def get_by_email(self, email: str) -> Optional[dict]:
+        email = email.lower()
+        with self._lock:
+            self._check_version()
+            user_id = self._id_by_email.get(email)
+            if user_id is not None:
+                self._by_id.move_to_end(user_id)
+                return self._by_id[user_id]
+
+        user = self.storage.get_user_by_email(email)
+        if user is not None:
+            with self._lock:
+                self._remember(user)
+        return user
+
+    def save_user(self, user: dict):
+        self.storage.save_user(user)
+        with self._lock:
+            # Our own write bumped the version; record it so the cache survives
+            self._version = self.storage.users_version()
+            self._remember(user)
+
+    def delete_user(self, user_id: str) -> bool:
+        deleted = self.storage.delete_user(user_id)
+        with self._lock:
+            self._version = self.storage.users_version()
+            user = self._by_id.pop(user_id, None)
+            if user is not None:
+                self._id_by_email.pop(user["email"].lower(), None)
+        return deleted
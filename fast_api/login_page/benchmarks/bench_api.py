@@ -0,0 +1,245 @@
+"""Load test and latency benchmark for the ShimmerCV API.
+
+Seeds N users with M CVs each, then drives concurrent traffic against the
+app in-process through httpx's ASGI transport (no server, no network) and
+reports throughput plus p50/p95/p99 latency per route at each data size.
+
+Run from ``fast_api/login_page``:
+
+    python -m benchmarks.bench_api --backend sqlite --users 100,1000 --cvs-per-user 5
+    python -m benchmarks.bench_api --backend json --users 100,1000
+    python -m benchmarks.bench_api --backend supabase --users 100 --latency-ms 20
+
+``sqlite`` and ``json`` exercise the local CV routes on each storage backend.
+``supabase`` starts the API with ``CV_BACKEND=supabase`` and points its
+Supabase routes (``api/supabase_backend.py``) at an in-memory PostgREST stub
+(``benchmarks/postgrest_stub.py``) with a simulated round-trip latency, so
+both backends can be compared side by side.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+BENCH_PASSWORD = "benchmark-password"
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def local_cv_payload(i: int) -> dict:
+    return {
+        "title": f"Benchmark CV {i}",
+        "template": random.choice(["modern", "minimal"]),
+        "personal_info": {"full_name": f"Bench User {i}", "email": f"bench{i}@example.com", "summary": "x" * 200},
+        "education": [
+            {"institution": "University", "degree": "BSc", "start_date": "2015-09-01", "end_date": "2019-06-30"}
+            for _ in range(3)
+        ],
+        "experience": [
+            {"company": f"Company {n}", "position": "Engineer", "start_date": "2019-07-01", "description": "y" * 300}
+            for n in range(5)
+        ],
+        "skills": [{"name": f"Skill {n}", "level": n % 5 + 1} for n in range(10)],
+    }
+
+
+def supabase_cv_payload(i: int) -> dict:
+    return {
+        "template": random.choice(["modern", "minimal"]),
+        "personalInfo": {"fullName": f"Bench User {i}", "email": f"bench{i}@example.com", "summary": "x" * 200},
+        "education": [
+            {"institution": "University", "degree": "BSc", "startDate": "2015-09-01", "endDate": "2019-06-30"}
+            for _ in range(3)
+        ],
+        "experience": [
+            {"company": f"Company {n}", "position": "Engineer", "startDate": "2019-07-01", "description": "y" * 300}
+            for n in range(5)
+        ],
+        "skills": [{"name": f"Skill {n}", "level": n % 5 + 1} for n in range(10)],
+    }
+
+
+# --- Seeding ---
+
+def seed_local(main, num_users: int, cvs_per_user: int):
+    """Fill fresh storage with users and CVs. Returns [(user, token, [cv_ids])]."""
+    from api.storage import get_storage
+    from api.user_cache import UserDirectory
+
+    data_dir = Path(tempfile.mkdtemp(prefix="shimmercv-bench-")) / "data"
+    main.storage = get_storage(data_dir)
+    main.users = UserDirectory(main.storage)
+
+    # One bcrypt hash shared by every user, otherwise seeding alone takes minutes
+    password_hash = main.pwd_context.hash(BENCH_PASSWORD)
+    start = datetime.utcnow() - timedelta(days=365)
+    seeded, all_cvs = [], []
+    for u in range(num_users):
+        user = {
+            "id": str(uuid.uuid4()),
+            "email": f"bench{u}@example.com",
+            "name": f"Bench User {u}",
+            "password": password_hash,
+            "created_at": start.isoformat(),
+        }
+        main.users.save_user(user)
+        cv_ids = []
+        for c in range(cvs_per_user):
+            stamp = (start + timedelta(minutes=u * cvs_per_user + c)).isoformat()
+            cv = {**local_cv_payload(c), "id": str(uuid.uuid4()), "user_id": user["id"],
+                  "created_at": stamp, "updated_at": stamp}
+            all_cvs.append(cv)
+            cv_ids.append(cv["id"])
+        token = main.create_access_token(data={"sub": user["id"]})
+        seeded.append((user, token, cv_ids))
+    main.storage.save_cvs(all_cvs)
+    return seeded
+
+
+def seed_supabase(stub, num_users: int, cvs_per_user: int):
+    seeded = []
+    for u in range(num_users):
+        user_id = str(uuid.uuid4())
+        cv_ids = []
+        for c in range(cvs_per_user):
+            payload = supabase_cv_payload(c)
+            (cv,) = stub.insert("cvs", {
+                "user_id": user_id, "title": f"Benchmark CV {c}",
+                "template": payload["template"], "personal_info": payload["personalInfo"],
+            })
+            stub.insert("education", [{"cv_id": cv["id"], **e} for e in payload["education"]])
+            stub.insert("experience", [{"cv_id": cv["id"], **e} for e in payload["experience"]])
+            stub.insert("skills", [{"cv_id": cv["id"], **s} for s in payload["skills"]])
+            cv_ids.append(cv["id"])
+        seeded.append(({"id": user_id, "email": f"bench{u}@example.com"}, stub.token_for(user_id), cv_ids))
+    return seeded
+
+
+# --- Traffic ---
+
+def build_requests(backend: str, seeded, count: int):
+    """Pick ``count`` requests per route, spread over random seeded users."""
+    routes = defaultdict(list)
+    for _ in range(count):
+        user, token, cv_ids = random.choice(seeded)
+        auth = {"Authorization": f"Bearer {token}"}
+        cv_id = random.choice(cv_ids) if cv_ids else None
+
+        routes["GET /cvs"].append(("GET", "/cvs", {"headers": auth}))
+        if cv_id:
+            routes["GET /cvs/{id}"].append(("GET", f"/cvs/{cv_id}", {"headers": auth}))
+        if backend == "supabase":
+            routes["POST /cvs"].append(("POST", "/cvs", {"headers": auth, "json": supabase_cv_payload(0)}))
+            continue
+        routes["POST /token"].append(("POST", "/token", {
+            "data": {"username": user["email"], "password": BENCH_PASSWORD},
+        }))
+        if cv_id:
+            routes["PUT /cvs/{id}"].append(("PUT", f"/cvs/{cv_id}", {"headers": auth, "json": local_cv_payload(1)}))
+    return routes
+
+
+async def run_route(client, requests, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statuses = [], defaultdict(int)
+
+    async def one(method, url, kwargs):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(*request) for request in requests))
+    elapsed = time.perf_counter() - started
+    return latencies, statuses, elapsed
+
+
+def report(size_label: str, route: str, latencies, statuses, elapsed):
+    ms = [latency * 1000 for latency in latencies]
+    codes = ",".join(f"{code}x{n}" for code, n in sorted(statuses.items()))
+    print(
+        f"{size_label:>14} {route:<16} {len(ms) / elapsed:>9.1f} "
+        f"{percentile(ms, 50):>8.2f} {percentile(ms, 95):>8.2f} {percentile(ms, 99):>8.2f} "
+        f"{statistics.mean(ms):>8.2f}  {codes}"
+    )
+
+
+async def bench_size(main, args, num_users: int):
+    stub = None
+    if args.backend == "supabase":
+        from benchmarks.postgrest_stub import PostgRESTStub
+
+        stub = PostgRESTStub(latency_ms=args.latency_ms)
+        seeded = seed_supabase(stub, num_users, args.cvs_per_user)
+    else:
+        seeded = seed_local(main, num_users, args.cvs_per_user)
+    routes = build_requests(args.backend, seeded, args.requests)
+
+    # ASGITransport doesn't run the lifespan, so enter it ourselves
+    async with main.app.router.lifespan_context(main.app):
+        if stub is not None:
+            # Send the API's Supabase traffic to the in-memory stub
+            supabase = main.supabase_backend
+            await supabase.client.aclose()
+            supabase.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=stub.app))
+            supabase.SUPABASE_URL = "http://postgrest-stub"
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            size_label = f"{num_users}u/{num_users * args.cvs_per_user}cv"
+            for route, requests in routes.items():
+                before = stub.request_count if stub is not None else 0
+                latencies, statuses, elapsed = await run_route(client, requests, args.concurrency)
+                report(size_label, route, latencies, statuses, elapsed)
+                if stub is not None:
+                    upstream = (stub.request_count - before) / len(requests)
+                    print(f"{'':>14} {'':<16} {upstream:.1f} upstream requests per call")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["sqlite", "json", "supabase"], default="sqlite")
+    parser.add_argument("--users", default="100,1000", help="comma-separated user counts to test")
+    parser.add_argument("--cvs-per-user", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="simulated Supabase round trip")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    if args.backend == "supabase":
+        os.environ["CV_BACKEND"] = "supabase"
+    else:
+        os.environ["CV_BACKEND"] = "local"
+        os.environ["STORAGE_BACKEND"] = args.backend
+    # Importing the API creates ./data, so do it from a scratch directory
+    os.chdir(tempfile.mkdtemp(prefix="shimmercv-bench-"))
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    import api.main as api_main
+
+    print(f"backend={args.backend} requests/route={args.requests} concurrency={args.concurrency}")
+    print(f"{'size':>14} {'route':<16} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'mean ms':>8}  status")
+    for num_users in (int(n) for n in args.users.split(",")):
+        asyncio.run(bench_size(api_main, args, num_users))
+
+
+if __name__ == "__main__":
+    main()
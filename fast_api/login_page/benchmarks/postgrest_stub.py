@@ -0,0 +1,110 @@
+"""In-memory stand-in for Supabase (PostgREST + the auth user endpoint).
+
+Just enough of the API used by ``api/supabase_backend.py`` to benchmark the
+Supabase backend without a network: ``eq.`` filters, ``select=`` with one level of
+resource embedding, ``order=``, ``limit=``, bulk POST and DELETE. Every
+request sleeps for ``latency_ms`` to model the round trip to a real project.
+Writes to the child tables bump their CV's ``updated_at``, like the
+``touch_parent_cv`` triggers in ``supabase/migrations``.
+"""
+
+import asyncio
+import uuid
+from datetime import datetime
+
+from fastapi import FastAPI, HTTPException, Request
+
+CHILD_TABLES = ("education", "experience", "skills")
+
+
+class PostgRESTStub:
+    def __init__(self, latency_ms: float = 20.0):
+        self.latency = latency_ms / 1000
+        self.tables = {"cvs": [], "education": [], "experience": [], "skills": []}
+        self.request_count = 0
+        self.app = self._build_app()
+
+    def token_for(self, user_id: str) -> str:
+        return f"stub-token-{user_id}"
+
+    def insert(self, table: str, rows):
+        now = datetime.utcnow().isoformat()
+        created = []
+        for row in rows if isinstance(rows, list) else [rows]:
+            row = {"id": str(uuid.uuid4()), "created_at": now, "updated_at": now, **row}
+            self.tables[table].append(row)
+            created.append(row)
+        self._touch_parents(table, created)
+        return created
+
+    def _touch_parents(self, table: str, rows: list):
+        if table not in CHILD_TABLES:
+            return
+        cv_ids = {row["cv_id"] for row in rows}
+        now = datetime.utcnow().isoformat()
+        for cv in self.tables["cvs"]:
+            if cv["id"] in cv_ids:
+                cv["updated_at"] = now
+
+    def _filter(self, table: str, params) -> list:
+        rows = self.tables[table]
+        for column, value in params.items():
+            if value.startswith("eq."):
+                rows = [row for row in rows if str(row.get(column)) == value[3:]]
+        return rows
+
+    def _select(self, table: str, rows: list, select: str) -> list:
+        if not select or select == "*":
+            return [dict(row) for row in rows]
+        columns = [part for part in select.split(",") if "(" not in part]
+        embedded = [part.split("(")[0] for part in select.split(",") if "(" in part]
+        result = []
+        for row in rows:
+            item = dict(row) if "*" in columns else {column: row.get(column) for column in columns}
+            for child in embedded:
+                item[child] = [dict(c) for c in self.tables[child] if c["cv_id"] == row["id"]]
+            result.append(item)
+        return result
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.get("/auth/v1/user")
+        async def auth_user(request: Request):
+            self.request_count += 1
+            await asyncio.sleep(self.latency)
+            token = request.headers.get("authorization", "").removeprefix("Bearer ")
+            if not token.startswith("stub-token-"):
+                raise HTTPException(status_code=401)
+            return {"id": token.removeprefix("stub-token-")}
+
+        @app.api_route("/rest/v1/{table}", methods=["GET", "POST", "DELETE"])
+        async def rest(table: str, request: Request):
+            self.request_count += 1
+            await asyncio.sleep(self.latency)
+            if table not in self.tables:
+                raise HTTPException(status_code=404)
+
+            params = dict(request.query_params)
+            select = params.pop("select", "*")
+            limit = params.pop("limit", None)
+            order = params.pop("order", None)
+
+            if request.method == "POST":
+                return self.insert(table, await request.json())
+
+            rows = self._filter(table, params)
+            if request.method == "DELETE":
+                doomed = {id(row) for row in rows}
+                self.tables[table] = [row for row in self.tables[table] if id(row) not in doomed]
+                self._touch_parents(table, rows)
+                return None
+
+            if order:
+                column, _, direction = order.split(",")[0].partition(".")
+                rows = sorted(rows, key=lambda row: str(row.get(column)), reverse=direction == "desc")
+            if limit:
+                rows = rows[: int(limit)]
+            return self._select(table, rows, select)
+
+        return app
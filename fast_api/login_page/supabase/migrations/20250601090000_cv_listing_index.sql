@@ -0,0 +1,9 @@
+/*
+  # CV listing index
+
+  Backs the paginated `GET /cvs` listing: a user's CVs ordered by
+  `updated_at DESC, id DESC`, resumed from an `(updated_at, id)` cursor.
+*/
+
+CREATE INDEX IF NOT EXISTS cvs_user_id_updated_at_id_idx
+  ON cvs (user_id, updated_at DESC, id DESC);
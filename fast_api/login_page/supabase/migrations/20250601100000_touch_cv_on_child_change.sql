@@ -0,0 +1,38 @@
+/*
+  # Touch the CV when its entries change
+
+  `GET /cvs/{id}` keys its ETag and response cache on `cvs.updated_at`, but
+  the edit page updates the `cvs` row first and then deletes and re-inserts
+  the education, experience and skills rows in later requests. These
+  triggers bump the parent CV's `updated_at` on every insert, update and
+  delete of a child row, so a cached response never outlives its entries.
+*/
+
+CREATE OR REPLACE FUNCTION public.touch_parent_cv()
+RETURNS TRIGGER AS $$
+BEGIN
+  -- Once per CV per transaction is enough: now() is fixed for the transaction.
+  -- Rows cascading from a deleted CV find no parent left to update.
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    UPDATE public.cvs SET updated_at = now()
+      WHERE id = NEW.cv_id AND updated_at IS DISTINCT FROM now();
+  END IF;
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    UPDATE public.cvs SET updated_at = now()
+      WHERE id = OLD.cv_id AND updated_at IS DISTINCT FROM now();
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE TRIGGER touch_cv_on_education_change
+  AFTER INSERT OR UPDATE OR DELETE ON public.education
+  FOR EACH ROW EXECUTE PROCEDURE public.touch_parent_cv();
+
+CREATE TRIGGER touch_cv_on_experience_change
+  AFTER INSERT OR UPDATE OR DELETE ON public.experience
+  FOR EACH ROW EXECUTE PROCEDURE public.touch_parent_cv();
+
+CREATE TRIGGER touch_cv_on_skills_change
+  AFTER INSERT OR UPDATE OR DELETE ON public.skills
+  FOR EACH ROW EXECUTE PROCEDURE public.touch_parent_cv();
@@ -1,171 +1,279 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import seaborn as sns
-from wordcloud import WordCloud
-import nltk
-from nltk.corpus import stopwords
 import requests
 import plotly.express as px
-import numpy as np
-import zipfile
-import io
-
-nltk.download('stopwords')
-
-
-# Function to load and preprocess data
-def load_and_preprocess_data(file):
-    data = pd.read_csv(file)
-    if 'CTR' in data.columns:
-        data['CTR'] = data['CTR'].str.rstrip('%').astype('float') / 100
-    if 'Impressions' in data.columns:
-        data['Impressions'] = data['Impressions'].astype(int)
-    if 'Clicks' in data.columns:
-        data['Clicks'] = data['Clicks'].astype(int)
-    if 'Position' in data.columns:
-        data['Position'] = data['Position'].astype(float)
-    return data
+import hashlib
+import os
+import json
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import seo_analysis
+from seo_analysis import CHUNK_SIZE
+
+# Entries kept per cached analysis stage (roughly: uploads x parameter combinations)
+CACHE_ENTRIES = 8
+
+
+# Keyword metrics are cached on disk per (keyword, country_code) so reruns
+# and the five sections that show metrics never fetch a keyword twice
+METRICS_URL = "https://learnwithhasan.com/wp-json/lwh-user-api/v1/seo/get-bulk-keyword-metrics"
+METRICS_CACHE_PATH = os.environ.get('KEYWORD_METRICS_CACHE', 'keyword_metrics_cache.db')
+METRICS_TTL_SECONDS = 7 * 24 * 3600
+METRICS_BATCH_SIZE = 20
+METRICS_WORKERS = 4
+METRICS_REQUESTS_PER_SECOND = 4
+
+
+class RateLimiter:
+    """Spaces out request starts across threads to at most ``rate`` per second."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        time.sleep(max(0.0, slot - now))
+
+
+@st.cache_resource
+def metrics_session():
+    """One pooled HTTP session (and rate limiter) shared by every rerun."""
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=1, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=["GET"], respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=METRICS_WORKERS, max_retries=retry)
+    session.mount("https://", adapter)
+    return session, RateLimiter(METRICS_REQUESTS_PER_SECOND)
+
+
+def metrics_cache():
+    conn = sqlite3.connect(METRICS_CACHE_PATH)
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS keyword_metrics (
+            keyword TEXT NOT NULL,
+            country_code TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            metrics TEXT NOT NULL,
+            PRIMARY KEY (keyword, country_code)
+        )"""
+    )
+    return conn
+
+
+def read_cached_metrics(conn, keywords, country_code):
+    """Return {keyword: metrics} for the keywords still fresh in the cache."""
+    cutoff = time.time() - METRICS_TTL_SECONDS
+    cached = {}
+    # Stay under SQLite's limit on bound parameters
+    for i in range(0, len(keywords), 500):
+        batch = keywords[i:i+500]
+        rows = conn.execute(
+            f"SELECT keyword, metrics FROM keyword_metrics "
+            f"WHERE country_code = ? AND fetched_at >= ? AND keyword IN ({','.join('?' * len(batch))})",
+            [country_code, cutoff, *batch],
+        )
+        cached.update((keyword, json.loads(metrics)) for keyword, metrics in rows)
+    return cached
 
 
 def get_keyword_metrics(keywords, api_key, user_id, country_code):
-    url = "https://learnwithhasan.com/wp-json/lwh-user-api/v1/seo/get-bulk-keyword-metrics"
+    """Fetch one batch of keywords. Runs in worker threads, so it raises instead of calling st."""
+    session, limiter = metrics_session()
     params = {
-        "query": keywords,
-        "keywords_count": 20,
+        "query": ','.join(keywords),
+        "keywords_count": METRICS_BATCH_SIZE,
         "countryCode": country_code
     }
     headers = {
         "X-Auth-Key": api_key,
         "X-User-ID": user_id
     }
-    response = requests.get(url, headers=headers, params=params)
-    if response.status_code == 200:
-        data = response.json()
-        return data
-    else:
-        st.error(f"API Error: {response.status_code}")
-        return None
+    limiter.wait()
+    response = session.get(METRICS_URL, headers=headers, params=params, timeout=30)
+    response.raise_for_status()
+    data = response.json()
+    if not data.get('success'):
+        raise ValueError(data.get('message', 'Unknown error'))
+    return data['result']
+
 
 def fetch_keyword_metrics(keywords, api_key, user_id, country_code):
-    all_metrics = []
-    for i in range(0, len(keywords), 20):
-        batch = keywords[i:i+20]
-        keyword_string = ','.join(batch)
-        try:
-            response = get_keyword_metrics(keyword_string, api_key, user_id, country_code)
-            if response and response.get('success'):
-                all_metrics.extend(response['result'])
-            else:
-                st.warning(f"API Warning for batch {i//20 + 1}: {response.get('message', 'Unknown error')}")
-                all_metrics.extend([{'keyword': kw, 'searchVolume': 'N/A', 'cpc': 'N/A', 'difficulty': 'N/A'} for kw in batch])
-        except Exception as e:
-            st.error(f"Error fetching keyword metrics for batch {i//20 + 1}: {str(e)}")
-            all_metrics.extend([{'keyword': kw, 'searchVolume': 'N/A', 'cpc': 'N/A', 'difficulty': 'N/A'} for kw in batch])
-    
-    return all_metrics
+    """Return metrics for ``keywords``, fetching only those missing from the cache."""
+    keywords = list(dict.fromkeys(keywords))
+    conn = metrics_cache()
+    try:
+        metrics = read_cached_metrics(conn, keywords, country_code)
+        missing = [kw for kw in keywords if kw not in metrics]
+        batches = [missing[i:i+METRICS_BATCH_SIZE] for i in range(0, len(missing), METRICS_BATCH_SIZE)]
+
+        fetched_at = time.time()
+        with ThreadPoolExecutor(max_workers=METRICS_WORKERS) as executor:
+            futures = {
+                executor.submit(get_keyword_metrics, batch, api_key, user_id, country_code): batch
+                for batch in batches
+            }
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    # Failed batches are not cached, so the next run retries them
+                    st.warning(f"Error fetching keyword metrics for {len(batch)} keywords: {str(e)}")
+                    continue
+                # Keywords the API has no data for are cached too, so they aren't requested again
+                fresh = {kw: {} for kw in batch}
+                fresh.update({result['keyword']: result for result in results})
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO keyword_metrics VALUES (?, ?, ?, ?)",
+                        [(kw, country_code, fetched_at, json.dumps(m)) for kw, m in fresh.items()],
+                    )
+                metrics.update(fresh)
+    finally:
+        conn.close()
+
+    return [
+        {'searchVolume': 'N/A', 'cpc': 'N/A', 'difficulty': 'N/A', **metrics.get(kw, {}), 'keyword': kw}
+        for kw in keywords
+    ]
 
 def add_keyword_metrics(df, include_metrics, api_key, user_id, country_code):
     if include_metrics and api_key and user_id:
-        keywords = df['Top queries'].tolist()
-        metrics = fetch_keyword_metrics(keywords, api_key, user_id, country_code)
+        keywords = df['Top queries'].astype(str).tolist()
+        metrics = fetch_keyword_metrics(keywords, api_key, user_id, country_code or '')
         metrics_df = pd.DataFrame(metrics)
         df = df.merge(metrics_df, left_on='Top queries', right_on='keyword', how='left')
         df = df.drop('keyword', axis=1)
     return df
 
+# Analysis stages are cached by the upload's content hash plus their own
+# parameters, so moving one slider only recomputes the view that uses it.
+# Arguments starting with an underscore are not hashed by st.cache_data.
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner="Reading export...")
+def load_export(upload_hash, _uploaded_file, chunksize=None, track=False):
+    """Parse the Queries, Countries and Pages CSVs from the zip, or return None if one is missing."""
+    return seo_analysis.read_export(_uploaded_file, chunksize, track)
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def top_performing_table(upload_hash, _data, n):
+    return seo_analysis.top_performing(_data, n)
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def opportunities_table(upload_hash, _data, min_impressions, max_position):
+    return seo_analysis.keyword_opportunities(_data, min_impressions, max_position)
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def quick_wins_table(upload_hash, _data, min_position, max_position, min_impressions):
+    return seo_analysis.quick_wins(_data, min_position, max_position, min_impressions)
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def query_features(upload_hash, _data):
+    return seo_analysis.query_feature_table(_data)
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def low_hanging_fruits_table(upload_hash, _data):
+    return seo_analysis.low_hanging_fruits(_data, query_features(upload_hash, _data))
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def question_queries_table(upload_hash, _data):
+    return seo_analysis.question_queries(_data, query_features(upload_hash, _data))
+
+
 # Update all analysis functions to include country_code parameter
-def show_top_performing(data, n=20, include_metrics=False, api_key=None, user_id=None, country_code=None):
+def show_top_performing(upload_hash, data, n=20, include_metrics=False, api_key=None, user_id=None, country_code=None):
     st.markdown("---")
     st.subheader(f"Top {n} Performing Queries")
-    top_queries = data.sort_values(by='Clicks', ascending=False).head(n)
+    top_queries = top_performing_table(upload_hash, data, n)
     top_queries = add_keyword_metrics(top_queries, include_metrics, api_key, user_id, country_code)
     st.dataframe(top_queries)
 
-def show_opportunities(data, min_impressions, max_position, include_metrics=False, api_key=None, user_id=None, country_code=None):
+def show_opportunities(upload_hash, data, min_impressions, max_position, include_metrics=False, api_key=None, user_id=None, country_code=None):
     st.markdown("---")
     st.subheader(f"Keyword Opportunities (Position > {max_position})")
     st.write(f"These are keywords ranking beyond position {max_position} with at least {min_impressions} impressions. "
              "They represent opportunities to improve your content and potentially gain more traffic.")
-    opportunities = data[(data['Position'] > max_position) & (data['Impressions'] >= min_impressions)]
-    opportunities = opportunities.sort_values(by='Impressions', ascending=False)
+    opportunities = opportunities_table(upload_hash, data, min_impressions, max_position)
     opportunities = add_keyword_metrics(opportunities, include_metrics, api_key, user_id, country_code)
     st.dataframe(opportunities)
 
-def show_quick_wins(data, min_position, max_position, min_impressions, include_metrics=False, api_key=None, user_id=None, country_code=None):
+def show_quick_wins(upload_hash, data, min_position, max_position, min_impressions, include_metrics=False, api_key=None, user_id=None, country_code=None):
     st.markdown("---")
     st.subheader(f"Quick Wins (Position {min_position}-{max_position})")
     st.write(f"These are keywords ranking between positions {min_position} and {max_position} with at least {min_impressions} impressions. "
              "They are close to the first page or top positions and could be improved with some optimization.")
-    quick_wins = data[(data['Position'] >= min_position) & (data['Position'] <= max_position) & (data['Impressions'] >= min_impressions)]
-    quick_wins = quick_wins.sort_values(by='Position')
+    quick_wins = quick_wins_table(upload_hash, data, min_position, max_position, min_impressions)
     quick_wins = add_keyword_metrics(quick_wins, include_metrics, api_key, user_id, country_code)
     st.dataframe(quick_wins)
 
-def highlight_low_hanging_fruits(data, include_metrics=False, api_key=None, user_id=None, country_code=None):
+def highlight_low_hanging_fruits(upload_hash, data, include_metrics=False, api_key=None, user_id=None, country_code=None):
     st.markdown("---")
     st.subheader("Low-Hanging Fruits")
     st.write("These queries are in the top 3 positions but have a low CTR, representing quick wins if optimized.")
-    low_hanging_fruits = data[(data['Position'] <= 3) & (data['CTR'] < 0.5)]
+    low_hanging_fruits = low_hanging_fruits_table(upload_hash, data)
     low_hanging_fruits = add_keyword_metrics(low_hanging_fruits, include_metrics, api_key, user_id, country_code)
     st.dataframe(low_hanging_fruits)
 
-def identify_question_queries(data, include_metrics=False, api_key=None, user_id=None, country_code=None):
+def identify_question_queries(upload_hash, data, include_metrics=False, api_key=None, user_id=None, country_code=None):
     st.markdown("---")
     st.subheader("Question Queries")
     st.write("These queries are questions that may be targeted with detailed, high-quality content.")
-    question_queries = data[data['Top queries'].str.contains('who|what|where|when|why|how', case=False, na=False)]
+    question_queries = question_queries_table(upload_hash, data)
     question_queries = add_keyword_metrics(question_queries, include_metrics, api_key, user_id, country_code)
     st.dataframe(question_queries)
 
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner="Drawing word cloud...", persist="disk")
+def word_cloud_png(upload_hash, _data):
+    """PNG of the query word cloud. Persisted to disk, so a re-uploaded export isn't redrawn."""
+    return seo_analysis.word_cloud_png(seo_analysis.term_frequencies(_data['Top queries']))
+
+
 # Function to generate word cloud
-def generate_word_cloud(data):
+def generate_word_cloud(upload_hash, data):
     st.markdown("---")
     st.subheader("Keyword Word Cloud")
     st.write("This word cloud visualizes the most common words in your top queries. "
              "It can help identify themes and topics that are performing well in search results.")
-    text = ' '.join(data['Top queries'])
-    stop_words = set(stopwords.words('english'))
-    wordcloud = WordCloud(width=800, height=400, background_color='white', stopwords=stop_words).generate(text)
-    
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.imshow(wordcloud, interpolation='bilinear')
-    ax.axis('off')
-    st.pyplot(fig)
+    png = word_cloud_png(upload_hash, data)
+    if png is None:
+        st.write("No words left to draw after removing stopwords.")
+    else:
+        st.image(png)
     
 
 
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def traffic_potential(upload_hash, _data):
+    return seo_analysis.traffic_potential(_data)
+
+
 # New Function: Traffic Potential Estimation
-def estimate_traffic_potential(data):
+def estimate_traffic_potential(upload_hash, data):
     st.markdown("---")
     st.subheader("Traffic Potential Estimation")
     
-    # Calculate the average CTR for top 10 positions
-    top_10_data = data[data['Position'] <= 10]
-    if len(top_10_data) > 0:
-        top_10_ctr = top_10_data['CTR'].mean()
-    else:
-        top_10_ctr = data['CTR'].mean()  # Fallback if no queries in top 10
-    
-    # Ensure CTR is always between 0 and 1
-    data['CTR'] = data['CTR'].clip(0, 1)
-    
-    # Calculate potential clicks based on position
-    data['Potential CTR'] = np.where(data['Position'] <= 10, data['CTR'], 
-                                     np.maximum(data['CTR'], top_10_ctr))
-    data['Potential Clicks'] = data['Impressions'] * data['Potential CTR']
-    data['Click Potential Increase'] = np.maximum(data['Potential Clicks'] - data['Clicks'], 0)
-    
-    # Filter for meaningful improvements
-    potential_data = data[data['Click Potential Increase'] > 1].sort_values(by='Click Potential Increase', ascending=False)
+    top_10_ctr, top_potential, total_current_clicks, total_potential_clicks = traffic_potential(upload_hash, data)
     
     # Display results
     st.write(f"Average CTR for top 10 positions: {top_10_ctr:.2%}")
-    st.dataframe(potential_data[['Top queries', 'Position', 'Clicks', 'Potential Clicks', 'Click Potential Increase']].head(20))
+    st.dataframe(top_potential)
     
-    # Summary statistics
-    total_current_clicks = data['Clicks'].sum()
-    total_potential_clicks = data['Potential Clicks'].sum()
     total_increase = total_potential_clicks - total_current_clicks
     
     st.write(f"Total current clicks: {total_current_clicks:,.0f}")
@@ -200,83 +308,10 @@ def estimate_traffic_potential(data):
 
 
 
-# Updated Country Performance Dashboard function
-def country_performance_dashboard(country_data):
-    st.markdown("---")
-    st.subheader("Country Performance Dashboard")
-    st.dataframe(country_data.sort_values(by='Clicks', ascending=False))
-    
-    # Comprehensive dictionary to map country names to ISO codes
-    country_code_map = {
-        'India': 'IND', 'United States': 'USA', 'Pakistan': 'PAK', 'Bangladesh': 'BGD',
-        'Nigeria': 'NGA', 'United Kingdom': 'GBR', 'Morocco': 'MAR', 'Germany': 'DEU',
-        'Indonesia': 'IDN', 'Canada': 'CAN', 'Algeria': 'DZA', 'Egypt': 'EGY',
-        'Australia': 'AUS', 'France': 'FRA', 'Vietnam': 'VNM', 'Brazil': 'BRA',
-        'Sri Lanka': 'LKA', 'Spain': 'ESP', 'United Arab Emirates': 'ARE', 'Netherlands': 'NLD',
-        'Italy': 'ITA', 'Turkey': 'TUR', 'Saudi Arabia': 'SAU', 'Kenya': 'KEN',
-        'Poland': 'POL', 'Philippines': 'PHL', 'Malaysia': 'MYS', 'South Korea': 'KOR',
-        'Japan': 'JPN', 'South Africa': 'ZAF', 'Thailand': 'THA', 'Singapore': 'SGP',
-        'Iran': 'IRN', 'Israel': 'ISR', 'Mexico': 'MEX', 'Russia': 'RUS',
-        'Sweden': 'SWE', 'Taiwan': 'TWN', 'Ghana': 'GHA', 'Tunisia': 'TUN',
-        'Romania': 'ROU', 'Nepal': 'NPL', 'Ukraine': 'UKR', 'Belgium': 'BEL',
-        'Portugal': 'PRT', 'China': 'CHN', 'Hong Kong': 'HKG', 'Colombia': 'COL',
-        'Serbia': 'SRB', 'Denmark': 'DNK', 'Switzerland': 'CHE', 'Lebanon': 'LBN',
-        'Jordan': 'JOR', 'Austria': 'AUT', 'Ethiopia': 'ETH', 'Hungary': 'HUN',
-        'Czechia': 'CZE', 'Ireland': 'IRL', 'Argentina': 'ARG', 'Norway': 'NOR',
-        'Peru': 'PER', 'Greece': 'GRC', 'Uganda': 'UGA', 'Bulgaria': 'BGR',
-        'New Zealand': 'NZL', 'Iraq': 'IRQ', 'Finland': 'FIN', 'Qatar': 'QAT',
-        'Somalia': 'SOM', 'Cameroon': 'CMR', 'Tanzania': 'TZA', 'Chile': 'CHL',
-        'Kuwait': 'KWT', 'Yemen': 'YEM', 'Guatemala': 'GTM', 'Venezuela': 'VEN',
-        'Slovakia': 'SVK', 'Cambodia': 'KHM', 'Cyprus': 'CYP', 'Kazakhstan': 'KAZ',
-        'Oman': 'OMN', 'Bosnia & Herzegovina': 'BIH', 'Bahrain': 'BHR', 'Dominican Republic': 'DOM',
-        'Latvia': 'LVA', 'Estonia': 'EST', 'Armenia': 'ARM', "Côte d'Ivoire": 'CIV',
-        'Ecuador': 'ECU', 'Albania': 'ALB', 'Togo': 'TGO', 'Palestine': 'PSE',
-        'Lithuania': 'LTU', 'Belarus': 'BLR', 'Croatia': 'HRV', 'Slovenia': 'SVN',
-        'Rwanda': 'RWA', 'Benin': 'BEN', 'Costa Rica': 'CRI', 'Macedonia': 'MKD',
-        'Luxembourg': 'LUX', 'Georgia': 'GEO', 'Bolivia': 'BOL', 'Azerbaijan': 'AZE',
-        'Libya': 'LBY', 'Panama': 'PAN', 'Syria': 'SYR', 'Zambia': 'ZMB',
-        'Zimbabwe': 'ZWE', 'Trinidad & Tobago': 'TTO', 'Barbados': 'BRB', 'Uzbekistan': 'UZB',
-        'Uruguay': 'URY', 'Moldova': 'MDA', 'Mauritius': 'MUS', 'Sudan': 'SDN',
-        'Malta': 'MLT', 'Madagascar': 'MDG', 'Congo - Kinshasa': 'COD', 'Puerto Rico': 'PRI',
-        'Senegal': 'SEN', 'Myanmar (Burma)': 'MMR', 'Maldives': 'MDV', 'Burkina Faso': 'BFA',
-        'Gambia': 'GMB', 'South Sudan': 'SSD', 'Jamaica': 'JAM', 'Angola': 'AGO',
-        'Mozambique': 'MOZ', 'Malawi': 'MWI', 'Laos': 'LAO', 'Iceland': 'ISL',
-        'Grenada': 'GRD', 'Botswana': 'BWA', 'Afghanistan': 'AFG', 'Congo - Brazzaville': 'COG',
-        'Macau': 'MAC', 'Bhutan': 'BTN', 'Paraguay': 'PRY', 'Mongolia': 'MNG',
-        'Nicaragua': 'NIC', 'Kyrgyzstan': 'KGZ', 'St. Lucia': 'LCA', 'Turkmenistan': 'TKM',
-        'Papua New Guinea': 'PNG', 'Swaziland': 'SWZ', 'Burundi': 'BDI', 'Liberia': 'LBR',
-        'El Salvador': 'SLV', 'Guyana': 'GUY', 'Belize': 'BLZ', 'Montenegro': 'MNE',
-        'Réunion': 'REU', 'Cayman Islands': 'CYM', 'Suriname': 'SUR', 'Namibia': 'NAM',
-        'St. Vincent & Grenadines': 'VCT', 'Cuba': 'CUB', 'Curaçao': 'CUW', 'Tajikistan': 'TJK',
-        'Haiti': 'HTI', 'Andorra': 'AND', 'Martinique': 'MTQ', 'Mali': 'MLI',
-        'Mauritania': 'MRT', 'French Polynesia': 'PYF', 'Guernsey': 'GGY', 'Djibouti': 'DJI',
-        'French Guiana': 'GUF', 'Chad': 'TCD', 'Faroe Islands': 'FRO', 'Guinea': 'GIN',
-        'Liechtenstein': 'LIE', 'Vanuatu': 'VUT', 'Niger': 'NER', 'Timor-Leste': 'TLS',
-        'Honduras': 'HND', 'Bahamas': 'BHS', 'Seychelles': 'SYC', 'Brunei': 'BRN',
-        'Gabon': 'GAB', 'St. Kitts & Nevis': 'KNA', 'Bermuda': 'BMU', 'Antigua & Barbuda': 'ATG',
-        'Kosovo': 'XKX', 'Fiji': 'FJI', 'Guadeloupe': 'GLP', 'Aruba': 'ABW',
-        'British Virgin Islands': 'VGB', 'Guam': 'GUM', 'Sint Maarten': 'SXM', 'Isle of Man': 'IMN',
-        'Jersey': 'JEY', 'Turks & Caicos Islands': 'TCA', 'Dominica': 'DMA', 'Cape Verde': 'CPV',
-        'New Caledonia': 'NCL', 'Gibraltar': 'GIB', 'Lesotho': 'LSO', 'Sierra Leone': 'SLE',
-        'Anguilla': 'AIA', 'Caribbean Netherlands': 'BES', 'Mayotte': 'MYT', 'Monaco': 'MCO',
-        'San Marino': 'SMR', 'U.S. Virgin Islands': 'VIR', 'Micronesia': 'FSM',
-        'São Tomé & Príncipe': 'STP', 'Equatorial Guinea': 'GNQ', 'Samoa': 'WSM',
-        'Montserrat': 'MSR', 'Western Sahara': 'ESH', 'Antarctica': 'ATA', 'North Korea': 'PRK',
-        'Greenland': 'GRL', 'Northern Mariana Islands': 'MNP', 'Marshall Islands': 'MHL',
-        'Central African Republic': 'CAF', 'Tonga': 'TON', 'Solomon Islands': 'SLB',
-        'Palau': 'PLW', 'Kiribati': 'KIR', 'Eritrea': 'ERI', 'St. Pierre & Miquelon': 'SPM',
-        'St. Martin': 'MAF', 'Comoros': 'COM', 'St. Helena': 'SHN', 'American Samoa': 'ASM',
-        'Guinea-Bissau': 'GNB', 'Svalbard & Jan Mayen': 'SJM', 'St. Barthélemy': 'BLM',
-        'Åland Islands': 'ALA', 'Wallis & Futuna': 'WLF', 'Tuvalu': 'TUV',
-        'Unknown Region': 'UNK'
-    }
-    
-    # Function to get ISO code or return original name if not found
-    def get_iso_code(country):
-        return country_code_map.get(country, country)
-    
-    # Apply the mapping to the Country column
-    country_data['Country_Code'] = country_data['Country'].apply(get_iso_code)
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner="Drawing country maps...")
+def country_maps(upload_hash, _country_data):
+    """Return the clicks and impressions choropleths plus the countries they can't place."""
+    country_data = seo_analysis.with_country_codes(_country_data)
     
     # Function to create choropleth map
     def create_choropleth(data, metric, title):
@@ -289,19 +324,29 @@ def country_performance_dashboard(country_data):
         fig.update_layout(title=title)
         return fig
     
-    # Create and display Clicks map
     clicks_fig = create_choropleth(country_data, "Clicks", "Clicks by Country")
+    impressions_fig = create_choropleth(country_data, "Impressions", "Impressions by Country")
+    return clicks_fig, impressions_fig, seo_analysis.unknown_countries(country_data)
+
+
+# Updated Country Performance Dashboard function
+def country_performance_dashboard(upload_hash, country_data):
+    st.markdown("---")
+    st.subheader("Country Performance Dashboard")
+    st.dataframe(country_data.sort_values(by='Clicks', ascending=False))
+    
+    clicks_fig, impressions_fig, unknown_countries = country_maps(upload_hash, country_data)
+    
+    # Display Clicks map
     st.plotly_chart(clicks_fig)
     
-    # Create and display Impressions map
-    impressions_fig = create_choropleth(country_data, "Impressions", "Impressions by Country")
+    # Display Impressions map
     st.plotly_chart(impressions_fig)
     
     # Display countries that might not be showing on the map
-    unknown_countries = country_data[country_data['Country'] == country_data['Country_Code']]
-    if not unknown_countries.empty:
+    if unknown_countries:
         st.write("Countries that might not be showing on the map:")
-        st.write(unknown_countries['Country'].tolist())
+        st.write(unknown_countries)
 
 # New Function: Top Opportunities by Country
 def top_opportunities_by_country(country_data):
@@ -310,44 +355,123 @@ def top_opportunities_by_country(country_data):
     st.subheader("Top Opportunities by Country")
     st.write("These countries have high impressions but low CTR, representing opportunities to improve content for these audiences.")
 
-    low_ctr_countries = country_data[country_data['CTR'] < country_data['CTR'].median()]
-    st.dataframe(low_ctr_countries.sort_values(by='Impressions', ascending=False))
+    st.dataframe(seo_analysis.country_opportunities(country_data))
 
 # New Function: Top Pages Analysis
-def top_pages_analysis(page_data):
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def top_pages_table(upload_hash, _page_data):
+    return seo_analysis.top_pages(_page_data)
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def low_ctr_pages_table(upload_hash, _page_data):
+    return seo_analysis.low_ctr_pages(_page_data)
+
+
+def top_pages_analysis(upload_hash, page_data):
     st.markdown("---")
 
     st.subheader("Top Pages Analysis")
     st.write("These are the top pages driving traffic, sorted by the number of clicks.")
 
-    st.dataframe(page_data.sort_values(by='Clicks', ascending=False))
+    st.dataframe(top_pages_table(upload_hash, page_data))
 
 # New Function: Pages Needing Optimization
-def pages_needing_optimization(page_data):
+def pages_needing_optimization(upload_hash, page_data):
     st.markdown("---")
 
     st.subheader("Pages Needing Optimization")
     st.write("These pages have high impressions but low CTR, representing opportunities for optimization.")
 
-    low_ctr_pages = page_data[page_data['CTR'] < 0.5]
-    st.dataframe(low_ctr_pages.sort_values(by='Impressions', ascending=False))
+    st.dataframe(low_ctr_pages_table(upload_hash, page_data))
+
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def read_trend_store(columns, dates, store_version):
+    """Trend store read, cached until a partition is added or replaced (``store_version``)."""
+    return seo_analysis.read_trend_store(columns, dates)
+
+
+def show_trends(top_n, min_impressions):
+    st.subheader("Trends Across Exports")
+    st.write("Add one Search Console export per period (for example, weekly) to compare periods. "
+             "Exports are kept in a local Parquet store, partitioned by export date.")
+
+    uploaded_file = st.file_uploader("Choose your zip file containing Query, Country, and Page data", type="zip")
+    export_date = st.date_input("Export date")
+    if st.button("Add to trend store"):
+        if uploaded_file is None:
+            st.error("Please upload a zip file first.")
+        else:
+            upload_hash = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+            export = load_export(upload_hash, uploaded_file)
+            if export is None:
+                st.error("Please make sure your zip file contains files named gsc_*.csv, country_*.csv, and page_*.csv")
+            else:
+                seo_analysis.save_to_trend_store(export[0], export_date)
+                st.success(f"Saved the export for {export_date:%Y-%m-%d}.")
+
+    dates = seo_analysis.trend_store_dates()
+    if len(dates) < 2:
+        st.info("Add at least two exports with different dates to see trends.")
+        return
+
+    start, end = st.select_slider("Export dates", options=dates, value=(dates[0], dates[-1]))
+    selected = tuple(date for date in dates if start <= date <= end)
+    if len(selected) < 2:
+        st.info("Select a range covering at least two exports.")
+        return
+    version = seo_analysis.trend_store_version()
+
+    st.markdown("---")
+    st.subheader("Period over Period")
+    summary = seo_analysis.period_summary(read_trend_store(('Clicks', 'Impressions', 'Position'), selected, version))
+    st.line_chart(summary[['Clicks', 'Impressions']])
+    st.dataframe(summary)
+
+    st.markdown("---")
+    st.subheader(f"Rank Movers ({selected[-2]} → {selected[-1]})")
+    st.write(f"Queries with at least {min_impressions} impressions in the latest export, by change in position.")
+    winners, losers = seo_analysis.rank_movers(read_trend_store(('Top queries', 'Impressions', 'Position'), selected[-2:], version),
+                                  min_impressions, top_n)
+    st.write("Biggest gains")
+    st.dataframe(winners, hide_index=True)
+    st.write("Biggest drops")
+    st.dataframe(losers, hide_index=True)
+
+    st.markdown("---")
+    st.subheader(f"Top {top_n} Queries Over Time")
+    sparklines = seo_analysis.query_sparklines(read_trend_store(('Top queries', 'Clicks'), selected, version), top_n)
+    st.dataframe(sparklines, hide_index=True,
+                 column_config={'Trend': st.column_config.LineChartColumn("Clicks per export", y_min=0)})
 
 
 # Main Streamlit app
 def main():
     st.title("Advanced SEO Data Analysis")
     
-    # File uploader
-    uploaded_file = st.file_uploader("Choose your zip file containing Query, Country, and Page data", type="zip")
+    mode = st.sidebar.radio("Mode", ["Single export", "Trends"])
     
     # Sidebar for user inputs
     st.sidebar.header("Analysis Parameters")
     top_n = st.sidebar.slider("Number of top queries to show", 5, 50, 20)
     min_impressions = st.sidebar.slider("Minimum Impressions (Global)", 100, 10000, 1000)
+    
+    if mode == "Trends":
+        show_trends(top_n, min_impressions)
+        return
+    
+    # File uploader
+    uploaded_file = st.file_uploader("Choose your zip file containing Query, Country, and Page data", type="zip")
     max_position_opp = st.sidebar.slider("Maximum Position for Keyword Opportunities", 50, 100, 60)
     min_position_quick = st.sidebar.slider("Minimum Position for Quick Wins", 5, 20, 11)
     max_position_quick = st.sidebar.slider("Maximum Position for Quick Wins", 20, 50, 20)
     
+    st.sidebar.markdown("---")
+    st.sidebar.subheader("Large Exports")
+    streaming_ingest = st.sidebar.checkbox("Stream CSVs in chunks (lower memory)")
+    show_memory = st.sidebar.checkbox("Show peak memory per stage")
+    
     st.sidebar.markdown("---")
     st.sidebar.subheader("⭐ For Power Members")
 
@@ -370,47 +494,50 @@ def main():
         country_name = st.sidebar.selectbox("Select Country", list(country_options.keys()))
         country_code = country_options[country_name]
     
-    # Button to start analysis
+    # Button to start analysis. The choice is remembered so that moving a
+    # slider afterwards re-renders the analysis from the stage caches
     start_analysis = st.button("Start Analysis")
+    if uploaded_file is None:
+        st.session_state['analysis_started'] = False
+        if start_analysis:
+            st.error("Please upload a zip file containing your Google Search Console, Country, and Page data CSV files.")
+    elif start_analysis:
+        st.session_state['analysis_started'] = True
     
-    if start_analysis and uploaded_file is not None:
-        with zipfile.ZipFile(uploaded_file, 'r') as zip_ref:
-            file_names = zip_ref.namelist()
+    if st.session_state.get('analysis_started'):
+        upload_hash = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+        chunksize = CHUNK_SIZE if streaming_ingest else None
+        export = load_export(upload_hash, uploaded_file, chunksize, show_memory)
+        
+        if export is not None:
+            gsc_data, country_data, page_data, memory_report = export
             
-            gsc_file = next((f for f in file_names if f.startswith('Quer')), None)
-            country_file = next((f for f in file_names if f.startswith('Countr')), None)
-            page_file = next((f for f in file_names if f.startswith('Page')), None)
+            st.write("Data successfully loaded and processed.")
+            if memory_report is not None:
+                st.write("Peak memory while loading each file:")
+                st.table(pd.DataFrame(memory_report))
             
-            if gsc_file and country_file and page_file:
-                gsc_data = load_and_preprocess_data(io.BytesIO(zip_ref.read(gsc_file)))
-                country_data = load_and_preprocess_data(io.BytesIO(zip_ref.read(country_file)))
-                page_data = load_and_preprocess_data(io.BytesIO(zip_ref.read(page_file)))
-                
-                st.write("Data successfully loaded and processed.")
-                
-                # Main content
-                show_top_performing(gsc_data, top_n, include_metrics, api_key, user_id, country_code)
-                show_opportunities(gsc_data, min_impressions, max_position_opp, include_metrics, api_key, user_id, country_code)
-                show_quick_wins(gsc_data, min_position_quick, max_position_quick, min_impressions, include_metrics, api_key, user_id, country_code)
-                generate_word_cloud(gsc_data)
-                
-                # Additional features
-                highlight_low_hanging_fruits(gsc_data, include_metrics, api_key, user_id, country_code)
-                identify_question_queries(gsc_data, include_metrics, api_key, user_id, country_code)
-                estimate_traffic_potential(gsc_data)
-                
-                # Country-specific analysis
-                country_performance_dashboard(country_data)
-                top_opportunities_by_country(country_data)
-                
-                # Page-specific analysis
-                top_pages_analysis(page_data)
-                pages_needing_optimization(page_data)
-                
-            else:
-                st.error("Please make sure your zip file contains files named gsc_*.csv, country_*.csv, and page_*.csv")
-    elif start_analysis:
-        st.error("Please upload a zip file containing your Google Search Console, Country, and Page data CSV files.")
+            # Main content
+            show_top_performing(upload_hash, gsc_data, top_n, include_metrics, api_key, user_id, country_code)
+            show_opportunities(upload_hash, gsc_data, min_impressions, max_position_opp, include_metrics, api_key, user_id, country_code)
+            show_quick_wins(upload_hash, gsc_data, min_position_quick, max_position_quick, min_impressions, include_metrics, api_key, user_id, country_code)
+            generate_word_cloud(upload_hash, gsc_data)
+            
+            # Additional features
+            highlight_low_hanging_fruits(upload_hash, gsc_data, include_metrics, api_key, user_id, country_code)
+            identify_question_queries(upload_hash, gsc_data, include_metrics, api_key, user_id, country_code)
+            estimate_traffic_potential(upload_hash, gsc_data)
+            
+            # Country-specific analysis
+            country_performance_dashboard(upload_hash, country_data)
+            top_opportunities_by_country(country_data)
+            
+            # Page-specific analysis
+            top_pages_analysis(upload_hash, page_data)
+            pages_needing_optimization(upload_hash, page_data)
+            
+        else:
+            st.error("Please make sure your zip file contains files named gsc_*.csv, country_*.csv, and page_*.csv")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""Headless batch report for Search Console exports.
+
+Runs the same analysis as the Streamlit app over every export zip in a
+directory (one zip per property) without Streamlit, spreading properties
+over a process pool. For each property it writes the section tables as
+CSV and/or Parquet plus a single ``report.html`` into ``OUT/<property>/``,
+and records how long each stage took in ``OUT/timings.csv``.
+
+    python batch_report.py exports/ --out reports/ --workers 8
+    python batch_report.py exports/ --formats parquet,html --top-n 50
+"""
+
+import argparse
+import html
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+import seo_analysis
+
+FORMATS = ('csv', 'parquet', 'html')
+
+SECTION_TITLES = {
+    'top_performing': "Top Performing Queries",
+    'opportunities': "Keyword Opportunities",
+    'quick_wins': "Quick Wins",
+    'low_hanging_fruits': "Low-Hanging Fruits",
+    'question_queries': "Question Queries",
+    'traffic_potential': "Traffic Potential",
+    'country_opportunities': "Top Opportunities by Country",
+    'top_pages': "Top Pages",
+    'pages_needing_optimization': "Pages Needing Optimization",
+}
+
+
+class StageTimer:
+    def __init__(self):
+        self.seconds = {}
+
+    @contextmanager
+    def __call__(self, stage):
+        started = time.perf_counter()
+        yield
+        self.seconds[stage] = time.perf_counter() - started
+
+
+def analyse(queries, countries, pages, args, timed):
+    """Run every section. Returns (tables, summary lines)."""
+    tables = {}
+    with timed('features'):
+        features = seo_analysis.query_feature_table(queries)
+    with timed('top_performing'):
+        tables['top_performing'] = seo_analysis.top_performing(queries, args.top_n)
+    with timed('opportunities'):
+        tables['opportunities'] = seo_analysis.keyword_opportunities(queries, args.min_impressions, args.max_position_opp)
+    with timed('quick_wins'):
+        tables['quick_wins'] = seo_analysis.quick_wins(
+            queries, args.min_position_quick, args.max_position_quick, args.min_impressions)
+    with timed('low_hanging_fruits'):
+        tables['low_hanging_fruits'] = seo_analysis.low_hanging_fruits(queries, features)
+    with timed('question_queries'):
+        tables['question_queries'] = seo_analysis.question_queries(queries, features)
+    with timed('traffic_potential'):
+        top_10_ctr, tables['traffic_potential'], current, potential = seo_analysis.traffic_potential(queries)
+    with timed('countries'):
+        tables['country_opportunities'] = seo_analysis.country_opportunities(
+            seo_analysis.with_country_codes(countries))
+    with timed('pages'):
+        tables['top_pages'] = seo_analysis.top_pages(pages)
+        tables['pages_needing_optimization'] = seo_analysis.low_ctr_pages(pages)
+
+    summary = [
+        f"Average CTR for top 10 positions: {top_10_ctr:.2%}",
+        f"Total current clicks: {current:,.0f}",
+        f"Total potential clicks: {potential:,.0f}",
+    ]
+    return tables, summary
+
+
+def write_html(path, name, tables, summary, timings, has_word_cloud):
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>",
+        f"<title>SEO report: {html.escape(name)}</title>",
+        "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;font-size:13px}"
+        "td,th{border:1px solid #ccc;padding:3px 6px}</style></head><body>",
+        f"<h1>SEO report: {html.escape(name)}</h1>",
+        "".join(f"<p>{html.escape(line)}</p>" for line in summary),
+    ]
+    if has_word_cloud:
+        parts.append("<h2>Keyword Word Cloud</h2><img src='word_cloud.png' alt='Keyword word cloud'>")
+    for key, table in tables.items():
+        parts.append(f"<h2>{SECTION_TITLES[key]} ({len(table):,} rows)</h2>")
+        parts.append(table.to_html(index=False, max_rows=200))
+    timing_table = pd.DataFrame({'Stage': list(timings), 'Seconds': [round(s, 3) for s in timings.values()]})
+    parts.append("<h2>Stage Timings</h2>" + timing_table.to_html(index=False))
+    # This page is still being written, so its own stage can only go in timings.csv
+    parts.append("<p>Writing this report (the <code>html</code> stage) is timed in <code>timings.csv</code>.</p>")
+    parts.append("</body></html>")
+    path.write_text("".join(parts), encoding='utf-8')
+
+
+def build_report(zip_path, args):
+    """Process one export. Runs in a worker process; returns (property, stage timings)."""
+    name = Path(zip_path).stem
+    timed = StageTimer()
+
+    with timed('load'):
+        export = seo_analysis.read_export(zip_path, args.chunksize)
+    if export is None:
+        raise ValueError("zip must contain Queries, Countries and Pages CSV files")
+    queries, countries, pages, _ = export
+
+    tables, summary = analyse(queries, countries, pages, args, timed)
+
+    out_dir = Path(args.out) / name
+    out_dir.mkdir(parents=True, exist_ok=True)
+    png = None
+    if not args.no_word_cloud:
+        with timed('word_cloud'):
+            png = seo_analysis.word_cloud_png(seo_analysis.term_frequencies(queries['Top queries']))
+        if png is not None:
+            (out_dir / 'word_cloud.png').write_bytes(png)
+
+    with timed('write'):
+        for key, table in tables.items():
+            if 'csv' in args.formats:
+                table.to_csv(out_dir / f"{key}.csv", index=False)
+            if 'parquet' in args.formats:
+                table.to_parquet(out_dir / f"{key}.parquet", index=False)
+    # After 'write' is timed, so the report lists every stage but its own
+    if 'html' in args.formats:
+        with timed('html'):
+            write_html(out_dir / 'report.html', name, tables, summary, dict(timed.seconds), png is not None)
+
+    return name, timed.seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("exports", help="directory containing one Search Console export zip per property")
+    parser.add_argument("--out", default="reports", help="output directory")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--formats", default="csv,parquet,html", help=f"comma-separated, any of {','.join(FORMATS)}")
+    parser.add_argument("--chunksize", type=int, default=None, help="stream CSVs in chunks of this many rows")
+    parser.add_argument("--no-word-cloud", action="store_true", help="skip rendering word_cloud.png")
+    parser.add_argument("--top-n", type=int, default=20)
+    parser.add_argument("--min-impressions", type=int, default=1000)
+    parser.add_argument("--max-position-opp", type=float, default=60)
+    parser.add_argument("--min-position-quick", type=float, default=11)
+    parser.add_argument("--max-position-quick", type=float, default=20)
+    args = parser.parse_args()
+
+    args.formats = {fmt.strip() for fmt in args.formats.split(",") if fmt.strip()}
+    if not args.formats <= set(FORMATS):
+        parser.error(f"--formats must be a subset of {','.join(FORMATS)}")
+    zips = sorted(Path(args.exports).glob("*.zip"))
+    if not zips:
+        parser.error(f"no .zip files in {args.exports}")
+
+    started = time.perf_counter()
+    timings, failed = {}, []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(build_report, str(path), args): path.stem for path in zips}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                _, seconds = future.result()
+            except Exception as e:
+                failed.append(name)
+                print(f"FAILED {name}: {e}", file=sys.stderr)
+                continue
+            timings[name] = seconds
+            print(f"{name:<40} {sum(seconds.values()):>8.2f}s")
+
+    if timings:
+        table = pd.DataFrame.from_dict(timings, orient='index').rename_axis('property')
+        Path(args.out).mkdir(parents=True, exist_ok=True)
+        table.to_csv(Path(args.out) / "timings.csv")
+        print("\nSeconds per stage across properties:")
+        print(table.agg(['mean', 'max']).T.round(3).to_string())
+    print(f"\n{len(timings)} reports, {len(failed)} failed, {time.perf_counter() - started:.1f}s wall time")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
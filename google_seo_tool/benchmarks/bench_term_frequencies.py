@@ -0,0 +1,71 @@
+"""Micro-benchmark for the word-cloud term frequencies.
+
+Compares ``WordCloud.process_text`` over the joined query column (what the
+app used to do) against ``seo_analysis.term_frequencies`` on a synthetic
+query column, and checks both agree. The column mixes cases, plurals,
+possessives, numbers and queries with no word tokens ("...", "?", emoji,
+empty strings).
+
+Run from ``google_seo_tool``:
+
+    python -m benchmarks.bench_term_frequencies --rows 1000000
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+from wordcloud import WordCloud
+
+import seo_analysis
+
+WORDS = ["seo", "SEO", "tools", "tool", "best", "free", "keyword", "keywords", "research", "the", "for",
+         "how", "to", "rank", "google", "google's", "2024", "new", "york"]
+NO_WORD_QUERIES = ["...", "?", "🙂", "", "!!", "-"]
+
+
+def synthetic_queries(rows, seed):
+    rng = np.random.default_rng(seed)
+    distinct = [" ".join(rng.choice(WORDS, rng.integers(1, 6))) for _ in range(5_000)] + NO_WORD_QUERIES
+    return pd.Series(np.array(distinct, dtype=object)[rng.integers(0, len(distinct), rows)])
+
+
+def reference_term_frequencies(queries):
+    return WordCloud(stopwords=seo_analysis.english_stopwords()).process_text(' '.join(queries.astype(str)))
+
+
+def measure(fn, queries, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(queries)
+        times.append(time.perf_counter() - started)
+    return result, statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    queries = synthetic_queries(args.rows, args.seed)
+    print(f"rows={args.rows:,} repeat={args.repeat} distinct={queries.nunique():,}")
+
+    reference, reference_time = measure(reference_term_frequencies, queries, args.repeat)
+    current, current_time = measure(seo_analysis.term_frequencies, queries, args.repeat)
+
+    print(f"{'version':<10} {'median s':>9}")
+    print(f"{'reference':<10} {reference_time:>9.3f}")
+    print(f"{'current':<10} {current_time:>9.3f}")
+    print(f"speedup {reference_time / current_time:.1f}x")
+
+    assert current == reference
+    print("results match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Micro-benchmark for the traffic-potential estimate.
+
+Compares the original in-place version (adds three columns to the shared
+frame, then sorts the whole filtered frame for the top 20) against
+``seo_analysis.traffic_potential`` on a synthetic Queries table, reporting
+wall time and peak Python memory for each, and checks both agree.
+
+Run from ``google_seo_tool``:
+
+    python -m benchmarks.bench_traffic_potential --rows 5000000
+"""
+
+import argparse
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import seo_analysis
+
+
+def synthetic_queries(rows, seed):
+    rng = np.random.default_rng(seed)
+    impressions = rng.integers(10, 50_000, rows).astype('int32')
+    ctr = rng.beta(1, 12, rows).astype('float32')
+    return pd.DataFrame({
+        'Top queries': pd.Categorical.from_codes(np.arange(rows) % 1_000_000,
+                                                 [f"query {i}" for i in range(min(rows, 1_000_000))]),
+        'Clicks': (impressions * ctr).astype('int32'),
+        'Impressions': impressions,
+        'CTR': ctr,
+        'Position': rng.uniform(1, 100, rows).astype('float32'),
+    })
+
+
+def legacy_traffic_potential(data):
+    """The pre-refactor implementation, kept here only for comparison."""
+    top_10_data = data[data['Position'] <= 10]
+    if len(top_10_data) > 0:
+        top_10_ctr = top_10_data['CTR'].mean()
+    else:
+        top_10_ctr = data['CTR'].mean()
+    data['CTR'] = data['CTR'].clip(0, 1)
+    data['Potential CTR'] = np.where(data['Position'] <= 10, data['CTR'],
+                                     np.maximum(data['CTR'], top_10_ctr))
+    data['Potential Clicks'] = data['Impressions'] * data['Potential CTR']
+    data['Click Potential Increase'] = np.maximum(data['Potential Clicks'] - data['Clicks'], 0)
+    potential_data = data[data['Click Potential Increase'] > 1].sort_values(by='Click Potential Increase', ascending=False)
+    top_potential = potential_data[['Top queries', 'Position', 'Clicks', 'Potential Clicks', 'Click Potential Increase']].head(20)
+    return top_10_ctr, top_potential, data['Clicks'].sum(), data['Potential Clicks'].sum()
+
+
+def measure(fn, make_input, repeat):
+    times, peaks, result = [], [], None
+    for _ in range(repeat):
+        data = make_input()
+        tracemalloc.start()
+        started = time.perf_counter()
+        result = fn(data)
+        times.append(time.perf_counter() - started)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return result, statistics.median(times), max(peaks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    data = synthetic_queries(args.rows, args.seed)
+    print(f"rows={args.rows:,} repeat={args.repeat} frame={data.memory_usage(deep=True).sum() / 1024 ** 2:.0f} MB")
+
+    # The legacy version mutates its input, so it gets a fresh copy every run
+    legacy, legacy_time, legacy_peak = measure(legacy_traffic_potential, data.copy, args.repeat)
+    current, current_time, current_peak = measure(seo_analysis.traffic_potential, lambda: data, args.repeat)
+
+    print(f"{'version':<10} {'median s':>9} {'peak MB':>9}")
+    print(f"{'legacy':<10} {legacy_time:>9.3f} {legacy_peak / 1024 ** 2:>9.0f}")
+    print(f"{'current':<10} {current_time:>9.3f} {current_peak / 1024 ** 2:>9.0f}")
+    print(f"speedup {legacy_time / current_time:.1f}x, peak memory {legacy_peak / current_peak:.1f}x lower")
+
+    assert np.isclose(legacy[0], current[0])
+    assert np.isclose(legacy[3], current[3])
+    assert list(data.columns) == ['Top queries', 'Clicks', 'Impressions', 'CTR', 'Position'], "input was modified"
+    pd.testing.assert_series_equal(legacy[1]['Click Potential Increase'].reset_index(drop=True),
+                                   current[1]['Click Potential Increase'].reset_index(drop=True))
+    print("results match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,551 @@
+"""Search Console export analysis, without any Streamlit rendering.
+
+Everything here takes and returns plain pandas objects (or bytes), so the
+same code backs the Streamlit app (``app.py``, which adds caching and
+rendering on top) and the headless batch CLI (``batch_report.py``).
+"""
+
+import io
+import os
+import tracemalloc
+import zipfile
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import lru_cache
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from wordcloud import WordCloud, STOPWORDS
+from wordcloud.tokenization import score as collocation_score
+from nltk.corpus import stopwords
+
+# Compact dtypes for Search Console exports: text columns repeat a lot, so
+# they are stored as categories; CTR stays a string until parse_ctr.
+# Categories are built after parsing because read_csv's own category
+# parser is several times slower on mostly-unique query text.
+TEXT_COLUMNS = ['Top queries', 'Country', 'Page', 'Top pages']
+CSV_DTYPES = {
+    'CTR': 'string',
+    'Position': 'float32',
+}
+
+# Rows per chunk when streaming large exports
+CHUNK_SIZE = 200_000
+
+# Trend mode keeps the Queries table of every export in a Parquet dataset,
+# one hive partition per export date (export_date=YYYY-MM-DD/queries.parquet)
+TREND_STORE_PATH = os.environ.get('SEO_TREND_STORE', 'seo_trend_store')
+TREND_COLUMNS = ['Top queries', 'Clicks', 'Impressions', 'CTR', 'Position']
+
+
+# --- Loading ---
+
+@contextmanager
+def track_memory(stage, report):
+    """Record the peak Python memory used while running a stage into ``report``."""
+    if report is None:
+        yield
+        return
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    yield
+    _, peak = tracemalloc.get_traced_memory()
+    report.append({'Stage': stage, 'Peak memory (MB)': round(peak / 1024 ** 2, 1)})
+
+
+def parse_ctr(ctr):
+    """Turn '12.5%' strings into 0.125 in a single vectorized pass."""
+    return (pd.to_numeric(ctr.str.rstrip('%'), errors='coerce') / 100).astype('float32')
+
+
+def compact_counts(counts):
+    """int32 when the values fit, otherwise int64."""
+    if counts.max() < np.iinfo(np.int32).max:
+        return counts.astype('int32')
+    return counts.astype('int64')
+
+
+def compact_chunk(chunk):
+    for column in TEXT_COLUMNS:
+        if column in chunk.columns:
+            chunk[column] = chunk[column].astype('category')
+    if 'CTR' in chunk.columns:
+        chunk['CTR'] = parse_ctr(chunk['CTR'])
+    for column in ('Clicks', 'Impressions'):
+        if column in chunk.columns:
+            chunk[column] = compact_counts(chunk[column])
+    return chunk
+
+
+def concat_chunks(chunks):
+    """Concatenate chunks while keeping text columns categorical (their categories differ per chunk)."""
+    categories = {
+        column: union_categoricals([chunk[column] for chunk in chunks])
+        for column in chunks[0].columns
+        if isinstance(chunks[0][column].dtype, pd.CategoricalDtype)
+    }
+    data = pd.concat([chunk.drop(columns=list(categories)) for chunk in chunks], ignore_index=True)
+    for column, values in categories.items():
+        data[column] = values
+    return data[chunks[0].columns]
+
+
+# Function to load and preprocess data
+def load_and_preprocess_data(file, chunksize=None):
+    """Read a Search Console CSV with compact dtypes.
+
+    With ``chunksize``, the file is parsed ``chunksize`` rows at a time so the
+    raw text of a huge export never sits in memory alongside the parsed frame.
+    """
+    if chunksize is None:
+        return compact_chunk(pd.read_csv(file, dtype=CSV_DTYPES))
+    chunks = [compact_chunk(chunk) for chunk in pd.read_csv(file, dtype=CSV_DTYPES, chunksize=chunksize)]
+    return concat_chunks(chunks)
+
+
+def read_export(file, chunksize=None, track=False):
+    """Parse the Queries, Countries and Pages CSVs from an export zip.
+
+    Returns ``(queries, countries, pages, memory_report)``, or None if one of
+    the three files is missing. ``memory_report`` is None unless ``track``.
+    """
+    with zipfile.ZipFile(file, 'r') as zip_ref:
+        file_names = zip_ref.namelist()
+
+        gsc_file = next((f for f in file_names if f.startswith('Quer')), None)
+        country_file = next((f for f in file_names if f.startswith('Countr')), None)
+        page_file = next((f for f in file_names if f.startswith('Page')), None)
+        if not (gsc_file and country_file and page_file):
+            return None
+
+        # Members are read straight from the archive instead of being copied into memory first
+        memory_report = [] if track else None
+        with track_memory("Queries", memory_report), zip_ref.open(gsc_file) as f:
+            gsc_data = load_and_preprocess_data(f, chunksize)
+        with track_memory("Countries", memory_report), zip_ref.open(country_file) as f:
+            country_data = load_and_preprocess_data(f, chunksize)
+        with track_memory("Pages", memory_report), zip_ref.open(page_file) as f:
+            page_data = load_and_preprocess_data(f, chunksize)
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    return gsc_data, country_data, page_data, memory_report
+
+
+# --- Features ---
+
+# Comprehensive dictionary to map country names to ISO codes
+COUNTRY_ISO_CODES = {
+    'India': 'IND', 'United States': 'USA', 'Pakistan': 'PAK', 'Bangladesh': 'BGD',
+    'Nigeria': 'NGA', 'United Kingdom': 'GBR', 'Morocco': 'MAR', 'Germany': 'DEU',
+    'Indonesia': 'IDN', 'Canada': 'CAN', 'Algeria': 'DZA', 'Egypt': 'EGY',
+    'Australia': 'AUS', 'France': 'FRA', 'Vietnam': 'VNM', 'Brazil': 'BRA',
+    'Sri Lanka': 'LKA', 'Spain': 'ESP', 'United Arab Emirates': 'ARE', 'Netherlands': 'NLD',
+    'Italy': 'ITA', 'Turkey': 'TUR', 'Saudi Arabia': 'SAU', 'Kenya': 'KEN',
+    'Poland': 'POL', 'Philippines': 'PHL', 'Malaysia': 'MYS', 'South Korea': 'KOR',
+    'Japan': 'JPN', 'South Africa': 'ZAF', 'Thailand': 'THA', 'Singapore': 'SGP',
+    'Iran': 'IRN', 'Israel': 'ISR', 'Mexico': 'MEX', 'Russia': 'RUS',
+    'Sweden': 'SWE', 'Taiwan': 'TWN', 'Ghana': 'GHA', 'Tunisia': 'TUN',
+    'Romania': 'ROU', 'Nepal': 'NPL', 'Ukraine': 'UKR', 'Belgium': 'BEL',
+    'Portugal': 'PRT', 'China': 'CHN', 'Hong Kong': 'HKG', 'Colombia': 'COL',
+    'Serbia': 'SRB', 'Denmark': 'DNK', 'Switzerland': 'CHE', 'Lebanon': 'LBN',
+    'Jordan': 'JOR', 'Austria': 'AUT', 'Ethiopia': 'ETH', 'Hungary': 'HUN',
+    'Czechia': 'CZE', 'Ireland': 'IRL', 'Argentina': 'ARG', 'Norway': 'NOR',
+    'Peru': 'PER', 'Greece': 'GRC', 'Uganda': 'UGA', 'Bulgaria': 'BGR',
+    'New Zealand': 'NZL', 'Iraq': 'IRQ', 'Finland': 'FIN', 'Qatar': 'QAT',
+    'Somalia': 'SOM', 'Cameroon': 'CMR', 'Tanzania': 'TZA', 'Chile': 'CHL',
+    'Kuwait': 'KWT', 'Yemen': 'YEM', 'Guatemala': 'GTM', 'Venezuela': 'VEN',
+    'Slovakia': 'SVK', 'Cambodia': 'KHM', 'Cyprus': 'CYP', 'Kazakhstan': 'KAZ',
+    'Oman': 'OMN', 'Bosnia & Herzegovina': 'BIH', 'Bahrain': 'BHR', 'Dominican Republic': 'DOM',
+    'Latvia': 'LVA', 'Estonia': 'EST', 'Armenia': 'ARM', "Côte d'Ivoire": 'CIV',
+    'Ecuador': 'ECU', 'Albania': 'ALB', 'Togo': 'TGO', 'Palestine': 'PSE',
+    'Lithuania': 'LTU', 'Belarus': 'BLR', 'Croatia': 'HRV', 'Slovenia': 'SVN',
+    'Rwanda': 'RWA', 'Benin': 'BEN', 'Costa Rica': 'CRI', 'Macedonia': 'MKD',
+    'Luxembourg': 'LUX', 'Georgia': 'GEO', 'Bolivia': 'BOL', 'Azerbaijan': 'AZE',
+    'Libya': 'LBY', 'Panama': 'PAN', 'Syria': 'SYR', 'Zambia': 'ZMB',
+    'Zimbabwe': 'ZWE', 'Trinidad & Tobago': 'TTO', 'Barbados': 'BRB', 'Uzbekistan': 'UZB',
+    'Uruguay': 'URY', 'Moldova': 'MDA', 'Mauritius': 'MUS', 'Sudan': 'SDN',
+    'Malta': 'MLT', 'Madagascar': 'MDG', 'Congo - Kinshasa': 'COD', 'Puerto Rico': 'PRI',
+    'Senegal': 'SEN', 'Myanmar (Burma)': 'MMR', 'Maldives': 'MDV', 'Burkina Faso': 'BFA',
+    'Gambia': 'GMB', 'South Sudan': 'SSD', 'Jamaica': 'JAM', 'Angola': 'AGO',
+    'Mozambique': 'MOZ', 'Malawi': 'MWI', 'Laos': 'LAO', 'Iceland': 'ISL',
+    'Grenada': 'GRD', 'Botswana': 'BWA', 'Afghanistan': 'AFG', 'Congo - Brazzaville': 'COG',
+    'Macau': 'MAC', 'Bhutan': 'BTN', 'Paraguay': 'PRY', 'Mongolia': 'MNG',
+    'Nicaragua': 'NIC', 'Kyrgyzstan': 'KGZ', 'St. Lucia': 'LCA', 'Turkmenistan': 'TKM',
+    'Papua New Guinea': 'PNG', 'Swaziland': 'SWZ', 'Burundi': 'BDI', 'Liberia': 'LBR',
+    'El Salvador': 'SLV', 'Guyana': 'GUY', 'Belize': 'BLZ', 'Montenegro': 'MNE',
+    'Réunion': 'REU', 'Cayman Islands': 'CYM', 'Suriname': 'SUR', 'Namibia': 'NAM',
+    'St. Vincent & Grenadines': 'VCT', 'Cuba': 'CUB', 'Curaçao': 'CUW', 'Tajikistan': 'TJK',
+    'Haiti': 'HTI', 'Andorra': 'AND', 'Martinique': 'MTQ', 'Mali': 'MLI',
+    'Mauritania': 'MRT', 'French Polynesia': 'PYF', 'Guernsey': 'GGY', 'Djibouti': 'DJI',
+    'French Guiana': 'GUF', 'Chad': 'TCD', 'Faroe Islands': 'FRO', 'Guinea': 'GIN',
+    'Liechtenstein': 'LIE', 'Vanuatu': 'VUT', 'Niger': 'NER', 'Timor-Leste': 'TLS',
+    'Honduras': 'HND', 'Bahamas': 'BHS', 'Seychelles': 'SYC', 'Brunei': 'BRN',
+    'Gabon': 'GAB', 'St. Kitts & Nevis': 'KNA', 'Bermuda': 'BMU', 'Antigua & Barbuda': 'ATG',
+    'Kosovo': 'XKX', 'Fiji': 'FJI', 'Guadeloupe': 'GLP', 'Aruba': 'ABW',
+    'British Virgin Islands': 'VGB', 'Guam': 'GUM', 'Sint Maarten': 'SXM', 'Isle of Man': 'IMN',
+    'Jersey': 'JEY', 'Turks & Caicos Islands': 'TCA', 'Dominica': 'DMA', 'Cape Verde': 'CPV',
+    'New Caledonia': 'NCL', 'Gibraltar': 'GIB', 'Lesotho': 'LSO', 'Sierra Leone': 'SLE',
+    'Anguilla': 'AIA', 'Caribbean Netherlands': 'BES', 'Mayotte': 'MYT', 'Monaco': 'MCO',
+    'San Marino': 'SMR', 'U.S. Virgin Islands': 'VIR', 'Micronesia': 'FSM',
+    'São Tomé & Príncipe': 'STP', 'Equatorial Guinea': 'GNQ', 'Samoa': 'WSM',
+    'Montserrat': 'MSR', 'Western Sahara': 'ESH', 'Antarctica': 'ATA', 'North Korea': 'PRK',
+    'Greenland': 'GRL', 'Northern Mariana Islands': 'MNP', 'Marshall Islands': 'MHL',
+    'Central African Republic': 'CAF', 'Tonga': 'TON', 'Solomon Islands': 'SLB',
+    'Palau': 'PLW', 'Kiribati': 'KIR', 'Eritrea': 'ERI', 'St. Pierre & Miquelon': 'SPM',
+    'St. Martin': 'MAF', 'Comoros': 'COM', 'St. Helena': 'SHN', 'American Samoa': 'ASM',
+    'Guinea-Bissau': 'GNB', 'Svalbard & Jan Mayen': 'SJM', 'St. Barthélemy': 'BLM',
+    'Åland Islands': 'ALA', 'Wallis & Futuna': 'WLF', 'Tuvalu': 'TUV',
+    'Unknown Region': 'UNK'
+}
+
+
+# Question words are matched anywhere in the query, as before
+QUESTION_PATTERN = 'who|what|where|when|why|how'
+POSITION_BUCKETS = [0, 3, 10, 20, 50, 100, np.inf]
+POSITION_BUCKET_LABELS = ['1-3', '4-10', '11-20', '21-50', '51-100', '100+']
+
+
+def country_iso_codes(countries):
+    """ISO-3 code per row, or the country name itself when it isn't in COUNTRY_ISO_CODES.
+
+    The lookup runs once per distinct country and is then broadcast over the
+    categorical codes, rather than once per row.
+    """
+    names = countries.astype('category').cat.categories
+    lookup = pd.Series(names, index=names)
+    return countries.map(lookup.map(COUNTRY_ISO_CODES).fillna(lookup))
+
+
+def query_feature_table(data):
+    """Per-query features used by the analysis sections, aligned with ``data``'s index.
+
+    Text features are computed once per distinct query (category) and
+    broadcast via the codes, so every section becomes a boolean mask.
+    """
+    queries = data['Top queries'].astype('category')
+    names = queries.cat.categories.to_series(index=range(len(queries.cat.categories)))
+    codes = queries.cat.codes.to_numpy()
+    is_question = names.str.contains(QUESTION_PATTERN, case=False).to_numpy()
+    token_count = names.str.split().str.len().to_numpy(dtype='int16')
+    # Missing queries have code -1
+    missing = codes < 0
+    return pd.DataFrame({
+        'is_question': np.where(missing, False, is_question[codes]),
+        'token_count': np.where(missing, 0, token_count[codes]).astype('int16'),
+        'position_bucket': pd.cut(data['Position'], POSITION_BUCKETS, labels=POSITION_BUCKET_LABELS, include_lowest=True),
+    }, index=data.index)
+
+
+# --- Query sections ---
+
+def top_performing(data, n):
+    return data.sort_values(by='Clicks', ascending=False).head(n)
+
+
+def keyword_opportunities(data, min_impressions, max_position):
+    opportunities = data[(data['Position'] > max_position) & (data['Impressions'] >= min_impressions)]
+    return opportunities.sort_values(by='Impressions', ascending=False)
+
+
+def quick_wins(data, min_position, max_position, min_impressions):
+    wins = data[(data['Position'] >= min_position) & (data['Position'] <= max_position) & (data['Impressions'] >= min_impressions)]
+    return wins.sort_values(by='Position')
+
+
+def low_hanging_fruits(data, features):
+    return data[(features['position_bucket'] == '1-3') & (data['CTR'] < 0.5)]
+
+
+def question_queries(data, features):
+    questions = data[features['is_question']]
+    return questions.assign(Words=features['token_count'][features['is_question']])
+
+
+def estimate_traffic_potential(data):
+    """Potential CTR, clicks and click increase per query, aligned with ``data``'s index.
+
+    Pure: ``data`` is not modified and only the three derived columns are
+    built, straight from the underlying numpy arrays. Queries outside the
+    top 10 are assumed able to reach the average CTR of the top 10.
+    """
+    ctr = data['CTR'].to_numpy()
+    in_top_10 = data['Position'].to_numpy() <= 10
+    # Average CTR of the top 10, falling back to the overall average
+    top_10_ctr = np.nanmean(ctr[in_top_10]) if in_top_10.any() else np.nanmean(ctr)
+
+    # CTR is kept between 0 and 1
+    clipped_ctr = np.clip(ctr, 0, 1)
+    potential_ctr = np.where(in_top_10, clipped_ctr, np.maximum(clipped_ctr, top_10_ctr))
+    potential_clicks = data['Impressions'].to_numpy() * potential_ctr
+    increase = np.maximum(potential_clicks - data['Clicks'].to_numpy(), 0)
+    return pd.DataFrame({
+        'Potential CTR': potential_ctr,
+        'Potential Clicks': potential_clicks,
+        'Click Potential Increase': increase,
+    }, index=data.index), top_10_ctr
+
+
+def traffic_potential(data, n=20):
+    """Return (top 10 CTR, top ``n`` potential gains, current clicks, potential clicks)."""
+    potential, top_10_ctr = estimate_traffic_potential(data)
+
+    # Only the n biggest gains are needed, so skip sorting the whole frame;
+    # gains of 1 click or less aren't meaningful
+    top = potential['Click Potential Increase'].nlargest(n)
+    top = top[top > 1].index
+    top_potential = data.loc[top, ['Top queries', 'Position', 'Clicks']].join(
+        potential.loc[top, ['Potential Clicks', 'Click Potential Increase']])
+
+    total_current_clicks = data['Clicks'].sum()
+    total_potential_clicks = potential['Potential Clicks'].sum()
+    return top_10_ctr, top_potential, total_current_clicks, total_potential_clicks
+
+
+# --- Word cloud ---
+
+@lru_cache(maxsize=None)
+def english_stopwords():
+    """NLTK's English stopwords if the corpus is installed, else the list bundled with wordcloud.
+
+    Nothing is downloaded, so starting the app never touches the network.
+    To use NLTK's list, run ``python -m nltk.downloader stopwords`` once.
+    """
+    try:
+        return frozenset(stopwords.words('english'))
+    except LookupError:
+        return frozenset(STOPWORDS)
+
+
+# WordCloud.process_text's defaults: its token pattern and the score a
+# bigram needs to count as a collocation
+TOKEN_PATTERN = r"\w[\w']*"
+COLLOCATION_THRESHOLD = 30
+
+
+def term_frequencies(queries):
+    """Word counts for the word cloud, skipping stopwords.
+
+    Gives the same result as ``WordCloud(stopwords=english_stopwords())
+    .process_text(' '.join(queries))``: same tokens, trailing "'s" and
+    numbers dropped, cases and plurals merged, and bigrams kept as
+    collocations when they score high enough over the whole text. But each
+    distinct query is tokenized once and weighted by how often it appears,
+    and the joined text is never built.
+    """
+    codes, distinct = pd.factorize(queries.astype(str))
+    # Codes are numbered in order of first appearance
+    occurrences = np.bincount(codes, minlength=len(distinct))
+    first_row = np.unique(codes, return_index=True)[1]
+
+    tokens = pd.Series(distinct, dtype=object).str.findall(TOKEN_PATTERN).explode().dropna()
+    tokens = tokens.where(~tokens.str.lower().str.endswith("'s"), tokens.str[:-2])
+    tokens = tokens[~tokens.str.isdigit()]
+    if tokens.empty:
+        return {}
+
+    # One entry per token, in the order they appear in the joined text
+    query = tokens.index.to_numpy()
+    word_ids, vocabulary = tokens.factorize()
+    stopword_set = {word.lower() for word in english_stopwords()}
+    is_stop = np.asarray(vocabulary.str.lower().isin(stopword_set))
+    weights = occurrences[query]
+
+    kept = ~is_stop[word_ids]
+    unigram_counts = np.bincount(word_ids[kept], weights=weights[kept], minlength=len(vocabulary)).astype(np.int64)
+    unigrams = dict(zip(vocabulary[~is_stop], unigram_counts[~is_stop].tolist()))
+    n_words = int(weights[kept].sum())
+
+    # Bigrams inside a query, placed at the query's first appearance
+    position = pd.Series(query).groupby(query, sort=False).cumcount().to_numpy()
+    inside = query[:-1] == query[1:]
+    first, second = word_ids[:-1][inside], word_ids[1:][inside]
+    pair_counts = [weights[:-1][inside]]
+    pair_order = [(first_row[query[:-1][inside]], position[:-1][inside] + 1)]
+
+    # Bigrams across the space joining one query to the next
+    last_word = np.full(len(distinct), -1)
+    last_word[query] = word_ids
+    first_word = np.full(len(distinct), -1)
+    first_word[query[::-1]] = word_ids[::-1]
+    rows = np.flatnonzero(last_word[codes] >= 0)
+    first = np.concatenate([first, last_word[codes[rows[:-1]]]])
+    second = np.concatenate([second, first_word[codes[rows[1:]]]])
+    pair_counts.append(np.ones(len(rows) - 1, dtype=np.int64))
+    pair_order.append((rows[1:], 0))
+
+    pairs = pd.DataFrame({
+        'pair': first * len(vocabulary) + second,
+        'count': np.concatenate(pair_counts),
+        'order': np.concatenate([row * (position.max() + 2) + offset for row, offset in pair_order]),
+    })
+    pairs = pairs[~is_stop[first] & ~is_stop[second]]
+    pairs = pairs.groupby('pair').agg(count=('count', 'sum'), order=('order', 'min')).sort_values('order')
+    pair_ids = pairs.index.to_numpy()
+    names = vocabulary[pair_ids // len(vocabulary)] + " " + vocabulary[pair_ids % len(vocabulary)]
+    bigrams = dict(zip(names, pairs['count'].tolist()))
+
+    return _with_collocations(unigrams, bigrams, n_words)
+
+
+def _merge_cases(counts):
+    """``wordcloud.tokenization.process_tokens`` for words given with their counts.
+
+    ``counts`` must be in order of first appearance, so that ties between
+    spellings resolve the way they do over the word list.
+    """
+    spellings = defaultdict(dict)
+    for word, count in counts.items():
+        spellings[word.lower()][word] = count
+    merged_plurals = {}
+    for key in list(spellings):
+        if key.endswith('s') and not key.endswith('ss') and key[:-1] in spellings:
+            singular = spellings[key[:-1]]
+            for word, count in spellings.pop(key).items():
+                singular[word[:-1]] = singular.get(word[:-1], 0) + count
+            merged_plurals[key] = key[:-1]
+    merged, standard_forms = {}, {}
+    for key, forms in spellings.items():
+        most_common = max(forms.items(), key=itemgetter(1))[0]
+        merged[most_common] = sum(forms.values())
+        standard_forms[key] = most_common
+    for plural, singular in merged_plurals.items():
+        standard_forms[plural] = standard_forms[singular]
+    return merged, standard_forms
+
+
+def _with_collocations(unigrams, bigrams, n_words):
+    """``wordcloud.tokenization.unigrams_and_bigrams`` from counted unigrams and bigrams."""
+    counts, standard_forms = _merge_cases(unigrams)
+    bigram_counts, _ = _merge_cases(bigrams)
+    unigram_counts = counts.copy()
+    for bigram, count in bigram_counts.items():
+        word1, word2 = (standard_forms[word.lower()] for word in bigram.split(" "))
+        if collocation_score(count, unigram_counts[word1], unigram_counts[word2], n_words) > COLLOCATION_THRESHOLD:
+            counts[word1] -= count
+            counts[word2] -= count
+            counts[bigram] = count
+    return {word: count for word, count in counts.items() if count > 0}
+
+
+def word_cloud_png(frequencies):
+    """Render term frequencies as a PNG, or None when there are no words."""
+    if not frequencies:
+        return None
+    wordcloud = WordCloud(width=800, height=400, background_color='white').generate_from_frequencies(frequencies)
+    png = io.BytesIO()
+    wordcloud.to_image().save(png, format='PNG')
+    return png.getvalue()
+
+
+# --- Countries and pages ---
+
+def with_country_codes(country_data):
+    return country_data.assign(Country_Code=country_iso_codes(country_data['Country']))
+
+
+def unknown_countries(country_data):
+    """Countries without an ISO code, which the choropleths can't place."""
+    return country_data.loc[~country_data['Country'].isin(COUNTRY_ISO_CODES), 'Country'].tolist()
+
+
+def country_opportunities(country_data):
+    low_ctr_countries = country_data[country_data['CTR'] < country_data['CTR'].median()]
+    return low_ctr_countries.sort_values(by='Impressions', ascending=False)
+
+
+def top_pages(page_data):
+    return page_data.sort_values(by='Clicks', ascending=False)
+
+
+def low_ctr_pages(page_data):
+    pages = page_data[page_data['CTR'] < 0.5]
+    return pages.sort_values(by='Impressions', ascending=False)
+
+
+# --- Trend store ---
+
+def save_to_trend_store(data, export_date):
+    """Write (or replace) the partition for one export date."""
+    partition = os.path.join(TREND_STORE_PATH, f"export_date={export_date:%Y-%m-%d}")
+    os.makedirs(partition, exist_ok=True)
+    path = os.path.join(partition, "queries.parquet")
+    # Write next to the target and swap it in, so readers never see half a file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    data[TREND_COLUMNS].to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def trend_store_dates():
+    """Export dates in the store, oldest first."""
+    if not os.path.isdir(TREND_STORE_PATH):
+        return []
+    return sorted(
+        name.split('=', 1)[1] for name in os.listdir(TREND_STORE_PATH)
+        if name.startswith('export_date=') and os.path.isfile(os.path.join(TREND_STORE_PATH, name, 'queries.parquet'))
+    )
+
+
+def trend_store_version():
+    """Changes whenever a partition is added or replaced; part of every trend cache key."""
+    return tuple(
+        (date, os.path.getmtime(os.path.join(TREND_STORE_PATH, f"export_date={date}", 'queries.parquet')))
+        for date in trend_store_dates()
+    )
+
+
+def read_trend_store(columns, dates):
+    """Read only ``columns`` from only the ``dates`` partitions.
+
+    Both are pushed down to pyarrow, so other partitions are never opened and
+    other columns are never decoded.
+    """
+    history = pd.read_parquet(TREND_STORE_PATH, columns=['export_date', *columns],
+                              filters=[('export_date', 'in', list(dates))])
+    history['export_date'] = pd.to_datetime(history['export_date'].astype(str))
+    return history
+
+
+def period_summary(history):
+    """Totals per export date with changes against the previous export."""
+    history = history.assign(weighted_position=history['Position'] * history['Impressions'])
+    summary = history.groupby('export_date').agg(
+        Clicks=('Clicks', 'sum'), Impressions=('Impressions', 'sum'), weighted_position=('weighted_position', 'sum'))
+    summary['CTR'] = summary['Clicks'] / summary['Impressions']
+    summary['Avg. Position'] = summary.pop('weighted_position') / summary['Impressions']
+    summary['Clicks Δ%'] = summary['Clicks'].pct_change() * 100
+    summary['Impressions Δ%'] = summary['Impressions'].pct_change() * 100
+    summary['Position Δ'] = summary['Avg. Position'].diff()
+    return summary
+
+
+def rank_movers(history, min_impressions, n):
+    """Queries whose position changed most between the two export dates in ``history``."""
+    previous_date, latest_date = sorted(history['export_date'].unique())[-2:]
+    by_date = history.set_index('Top queries')
+    previous = by_date[by_date['export_date'] == previous_date]
+    latest = by_date[by_date['export_date'] == latest_date]
+    movers = latest[['Position', 'Impressions']].join(previous[['Position']], rsuffix=' before', how='inner')
+    movers = movers[movers['Impressions'] >= min_impressions]
+    # Positive means the query moved up (towards position 1)
+    movers['Change'] = movers['Position before'] - movers['Position']
+    movers = movers.reset_index()[['Top queries', 'Position before', 'Position', 'Change', 'Impressions']]
+    return movers.nlargest(n, 'Change'), movers.nsmallest(n, 'Change')
+
+
+def query_sparklines(history, n):
+    """Click history for the top ``n`` queries of the latest export, one list per query."""
+    latest = history[history['export_date'] == history['export_date'].max()]
+    top_queries = latest.nlargest(n, 'Clicks')['Top queries'].astype(str)
+    history = history.assign(query=history['Top queries'].astype(str))
+    clicks = (history[history['query'].isin(top_queries)]
+              .pivot_table(index='query', columns='export_date', values='Clicks', aggfunc='sum', fill_value=0))
+    clicks = clicks.reindex(top_queries)
+    return pd.DataFrame({
+        'Top queries': clicks.index,
+        'Clicks': clicks.iloc[:, -1].to_numpy(),
+        'Trend': clicks.to_numpy().tolist(),
+    })
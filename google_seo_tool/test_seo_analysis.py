@@ -0,0 +1,41 @@
+"""Tests for the word-cloud term frequencies.
+
+Run from ``google_seo_tool``:
+
+    python -m pytest test_seo_analysis.py
+"""
+
+import pandas as pd
+import pytest
+from wordcloud import WordCloud
+
+import seo_analysis
+
+
+def process_text(queries):
+    """What the app used to feed the word cloud: WordCloud's own processing of the joined queries."""
+    return WordCloud(stopwords=seo_analysis.english_stopwords()).process_text(' '.join(queries))
+
+
+@pytest.mark.parametrize('queries', [
+    pytest.param(["best laptops 2024", "laptop deals 2024", "top 10 laptops", "2024"], id='numbers'),
+    pytest.param(["laptops", "laptop", "Laptops for students", "glass", "glasses", "class"], id='plurals'),
+    pytest.param(["john's laptop", "Google's tools", "google tools", "it's free"], id='possessives'),
+    pytest.param(["SEO tools", "seo tools", "Seo Tools", "seo tool"], id='cases'),
+    pytest.param(["new york hotels"] * 40 + ["york pizza", "new car", "cheap hotel"] * 3, id='collocations'),
+    pytest.param(["seo tools", "...", "?", "🙂", "", "seo"], id='no-word-queries'),
+])
+def test_term_frequencies_match_wordcloud(queries):
+    frequencies = seo_analysis.term_frequencies(pd.Series(queries))
+    assert frequencies == process_text(queries)
+    # Same order too, so words with equal counts are laid out the same way
+    assert list(frequencies) == list(process_text(queries))
+
+
+def test_term_frequencies_normalizes_like_wordcloud():
+    frequencies = seo_analysis.term_frequencies(pd.Series(["best laptops 2024", "john's laptop", "laptop"]))
+    assert frequencies == {"best": 1, "laptop": 3, "john": 1}
+
+
+def test_term_frequencies_without_words():
+    assert seo_analysis.term_frequencies(pd.Series(["...", "?", "", "2024"])) == {}